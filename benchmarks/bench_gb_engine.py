@@ -0,0 +1,48 @@
+"""
+Benchmark: gradient boosting engines in train_gradient_boosting
+Compares fit time and test ROC-AUC of the exact GradientBoostingClassifier
+engine with the histogram-based engine (early stopping) on synthetic customers
+
+Usage:
+    python benchmarks/bench_gb_engine.py [n_rows] [n_customers]
+"""
+
+import io
+import os
+import sys
+import time
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from synthetic import make_booking_data
+from data_loader import preprocess_data, aggregate_to_customer_level
+from models import prepare_features, split_and_scale_data, train_gradient_boosting
+
+
+def main(n_rows=689_742, n_customers=300_000):
+    from sklearn.metrics import roc_auc_score
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        customer_df = aggregate_to_customer_level(preprocess_data(make_booking_data(n_rows, n_customers)))
+        X, y, _, _ = prepare_features(customer_df, save_feature_cols=False, inplace=True)
+        X_train, X_test, y_train, y_test, _, _, _ = split_and_scale_data(X, y, save_scaler=False)
+    print(f"{len(X_train):,} training / {len(X_test):,} test customers, {X.shape[1]} features")
+    
+    print(f"\n{'Engine':10} {'Train (s)':>9} {'Iterations':>11} {'ROC-AUC':>9}")
+    print("-" * 45)
+    times = {}
+    for engine in ['exact', 'hist']:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            model, _, y_prob = train_gradient_boosting(X_train, y_train, X_test, y_test,
+                                                       save_model=False, engine=engine)
+        times[engine] = time.perf_counter() - start
+        n_iter = model.n_iter_ if engine == 'hist' else model.n_estimators_
+        print(f"{engine:10} {times[engine]:>9.2f} {n_iter:>11} {roc_auc_score(y_test, y_prob):>9.4f}")
+    
+    print(f"\nSpeedup (hist vs exact): {times['exact'] / times['hist']:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
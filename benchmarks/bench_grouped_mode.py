@@ -0,0 +1,53 @@
+"""
+Benchmark: primary platform / channel in aggregate_to_customer_level
+Compares the per-customer Series.mode lambda with the vectorized grouped mode
+
+Usage:
+    python benchmarks/bench_grouped_mode.py [n_rows] [n_customers]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from synthetic import make_booking_data
+from data_loader import preprocess_data, _grouped_mode
+
+
+def legacy_mode(df_processed, column):
+    """Per-customer mode as previously computed in aggregate_to_customer_level."""
+    return df_processed.groupby('email_address')[column].agg(
+        lambda x: x.mode().iloc[0] if len(x.mode()) > 0 else 'Unknown'
+    ).to_numpy()
+
+
+def vectorized_mode(df_processed, column):
+    """Per-customer mode using integer codes and a single bincount."""
+    group_codes, uniques = pd.factorize(df_processed['email_address'], sort=True)
+    return _grouped_mode(group_codes, len(uniques), df_processed[column])
+
+
+def main(n_rows=689_742, n_customers=300_000):
+    df_processed = preprocess_data(make_booking_data(n_rows, n_customers))
+    
+    print(f"\n{'Column':20} {'Legacy (s)':>12} {'Vectorized (s)':>15} {'Speedup':>9}")
+    print("-" * 60)
+    for column in ['platform', 'marketing_channel']:
+        start = time.perf_counter()
+        expected = legacy_mode(df_processed, column)
+        legacy_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        result = vectorized_mode(df_processed, column)
+        vectorized_time = time.perf_counter() - start
+        
+        assert np.array_equal(expected, result), f"Mismatch for {column}"
+        print(f"{column:20} {legacy_time:>12.2f} {vectorized_time:>15.3f} {legacy_time / vectorized_time:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
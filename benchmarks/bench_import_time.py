@@ -0,0 +1,74 @@
+"""
+Benchmark: import time of the pipeline modules
+Each module is imported in a fresh interpreter; data and scoring modules must
+not load matplotlib, seaborn, scipy or scikit-learn and must stay within a
+time budget on top of the pandas/numpy import they cannot avoid
+
+Usage:
+    python benchmarks/bench_import_time.py [repeats]
+
+Exits with status 1 if a module is over budget. tests/test_imports.py checks
+the same budgets.
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'scipy', 'sklearn']
+
+# module: (seconds allowed beyond the pandas/numpy baseline, heavy modules it may load)
+BUDGETS = {
+    'config': (0.05, []),
+    'data_loader': (0.25, []),
+    'models': (0.25, []),
+    'statistical_tests': (0.25, []),
+    'visualizations': (1.5, ['matplotlib']),
+}
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [name for name in {heavy!r} if name in sys.modules]]))
+"""
+
+
+def time_import(statement, repeats):
+    """Best-of-repeats import time (s) in fresh interpreters and the heavy modules loaded."""
+    times, loaded = [], []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+                                cwd=SRC_DIR, capture_output=True, text=True, check=True).stdout
+        elapsed, loaded = json.loads(output.strip().splitlines()[-1])
+        times.append(elapsed)
+    return min(times), loaded
+
+
+def main(repeats=5):
+    baseline, _ = time_import('import numpy, pandas', repeats)
+    print(f"Baseline (numpy + pandas): {baseline:.3f}s\n")
+    print(f"{'Module':20} {'Import (s)':>11} {'Budget (s)':>11}  Heavy modules loaded")
+    print("-" * 70)
+    
+    failures = []
+    for module, (allowance, allowed_heavy) in BUDGETS.items():
+        elapsed, loaded = time_import(f'import {module}', repeats)
+        budget = baseline + allowance
+        unexpected = [name for name in loaded if name not in allowed_heavy]
+        ok = elapsed <= budget and not unexpected
+        if not ok:
+            failures.append(module)
+        print(f"{module:20} {elapsed:>11.3f} {budget:>11.3f}  {', '.join(loaded) or '-'}"
+              f"{'' if ok else '  ✗ OVER BUDGET'}")
+    
+    print(f"\n{'✓ All modules within budget' if not failures else '✗ Over budget: ' + ', '.join(failures)}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
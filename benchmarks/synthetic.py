@@ -0,0 +1,83 @@
+"""
+Synthetic booking data for benchmarks
+Generates a dataframe with the same columns and value ranges as the case study file
+"""
+
+import numpy as np
+import pandas as pd
+
+PLATFORMS = ['Desktop', 'App', 'MWeb', 'Offline', 'Other']
+PLATFORM_P = [0.465, 0.284, 0.227, 0.019, 0.005]
+
+CHANNELS = ['Direct', 'Meta', 'Affiliates', 'CRM', 'SEM Unbranded', 'SEO', 'SEM Branded',
+            'Offline', 'Paid Online', 'Social Media', 'Unknown or Other', '']
+CHANNEL_P = [0.594, 0.121, 0.069, 0.063, 0.052, 0.042, 0.025, 0.019, 0.007, 0.001, 0.001, 0.006]
+
+
+def make_booking_data(n_rows=689_742, n_customers=300_000, seed=42):
+    """
+    Generate raw booking-level data shaped like PIP_case_study_data.csv.
+    
+    Parameters:
+    -----------
+    n_rows : int
+        Number of bookings
+    n_customers : int
+        Number of distinct email addresses
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    pd.DataFrame
+        Raw dataframe as returned by data_loader.load_data
+    """
+    rng = np.random.default_rng(seed)
+    emails = np.array([f'{h:030x}' for h in rng.integers(0, 2 ** 62, n_customers)])
+    customer = rng.integers(0, n_customers, n_rows)
+    
+    dates = pd.date_range('2018-06-01', '2019-07-31')
+    bk_date = dates[rng.integers(0, len(dates), n_rows)]
+    cancelled = rng.random(n_rows) < 0.18
+    cancel_date = (bk_date + pd.to_timedelta(rng.integers(0, 30, n_rows), unit='D')).strftime('%Y-%m-%d')
+    cancel_date = np.asarray(cancel_date, dtype=object)
+    cancel_date[~cancelled] = np.nan
+    cancel_flag = cancelled.astype(float)
+    cancel_flag[rng.random(n_rows) < 0.0001] = np.nan
+    
+    minutes = np.round(rng.lognormal(4, 1.3, n_rows))
+    minutes[rng.random(n_rows) < 0.02] = 0
+    minutes[rng.random(n_rows) < 0.0001] = np.nan
+    
+    channel_p = np.array(CHANNEL_P) / sum(CHANNEL_P)
+    channel = rng.choice(CHANNELS, n_rows, p=channel_p).astype(object)
+    channel[channel == ''] = np.nan  # empty strings are read as missing from the CSV
+    return pd.DataFrame({
+        'email_address': emails[customer],
+        'booking_id': -rng.integers(10 ** 12, 2 * 10 ** 12, n_rows).astype(float),
+        'bk_date': bk_date.strftime('%Y-%m-%d'),
+        'coupon_flag': (rng.random(n_rows) < 0.77).astype(int),
+        'pay_now_flag': (rng.random(n_rows) < 0.36).astype(int),
+        'cancel_flag': cancel_flag,
+        'cancel_date': cancel_date,
+        'customer_type': rng.choice(['Existing', 'New'], n_rows, p=[0.71, 0.29]),
+        'loyalty_tier': rng.integers(0, 3, n_rows),
+        'platform': rng.choice(PLATFORMS, n_rows, p=PLATFORM_P),
+        'marketing_channel': channel,
+        'total_visit_minutes': minutes,
+        'total_visit_pages': rng.poisson(110, n_rows),
+        'landing_pages_count': rng.integers(-2, 10, n_rows),
+        'search_pages_count': rng.poisson(27, n_rows),
+        'property_pages_count': rng.poisson(36, n_rows),
+        'bkg_confirmation_pages_count': rng.poisson(3, n_rows),
+        'bounce_visits_count': rng.poisson(5, n_rows),
+        'searched_destinations_count': rng.poisson(8, n_rows),
+        'hotel_star_rating': rng.integers(0, 2, n_rows),
+        'churn_flag': (rng.random(n_rows) < 0.44).astype(int),
+    })
+
+
+def write_booking_csv(filepath, **kwargs):
+    """Write synthetic booking data to CSV and return the path."""
+    make_booking_data(**kwargs).to_csv(filepath, index=False)
+    return filepath
@@ -12,26 +12,33 @@ This script orchestrates the complete churn analysis pipeline:
 Run this script to execute the full analysis.
 
 Usage:
-    python main.py
+    python main.py [--low-memory] [--resampling] [--headless] [--no-cache] [--tuned] [--cv]
 """
 
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Use the package modules in src/ (ahead of the legacy copies next to this script)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
 # Import configuration and setup
 from config import (setup_plot_style, CATEGORICAL_COLS, NUMERICAL_COLS, 
-                    BINARY_FLAGS, COLORS, CHURN_COLORS)
+                    BINARY_FLAGS, COLORS, CHURN_COLORS, FIGURES_DIR)
 
 # Import custom modules
-from data_loader import load_data, preprocess_data, aggregate_to_customer_level, get_data_summary
+from data_loader import get_data_summary
 from visualizations import (plot_churn_distribution, plot_churn_by_category, plot_binary_flags,
                             plot_numerical_distributions, plot_correlation_heatmap,
                             plot_model_comparison, plot_confusion_matrices,
-                            plot_feature_importance, plot_risk_segmentation)
-from statistical_tests import perform_ttest, perform_chi_square_tests, calculate_mean_comparison
-from models import (prepare_features, split_and_scale_data, 
-                    train_logistic_regression, train_random_forest, train_gradient_boosting,
-                    get_logistic_regression_odds_ratios, score_customers)
+                            plot_feature_importance, plot_risk_segmentation, plot_cv_comparison,
+                            set_render_mode, render_figures, figure_cache_stats)
+from statistical_tests import calculate_mean_comparison
+from models import export_customer_scores, print_training_times
+from pipeline import build_analysis_pipeline, train_model_stages, cross_validate_stages
+from cross_validation import summarize_cv_results, print_cv_summary
+from tuning import load_tuning_results
 
 
 def print_header(title):
@@ -41,13 +48,63 @@ def print_header(title):
     print("=" * 70 + "\n")
 
 
-def run_analysis():
-    """Run the complete churn analysis pipeline."""
+def run_analysis(low_memory=False, resampling=False, figures_dir=None, use_cache=True, tuned=False,
+                 cross_validate=False):
+    """
+    Run the complete churn analysis pipeline.
+    
+    Steps 1, 3, 4, 5 and 7 are stages of a memoized DAG (see pipeline.py):
+    a rerun recomputes only the stages whose inputs, parameters or code
+    changed, and everything downstream of them.
+    
+    Parameters:
+    -----------
+    low_memory : bool
+        Avoid defensive copies by transforming frames in place (customer_df
+        in the results then holds the model-ready columns when the features
+        stage runs) and report the peak memory of each computed stage
+    resampling : bool
+        Also run permutation and bootstrap tests on all cores (slow on the
+        full data for features whose p-value is close to alpha)
+    figures_dir : str, optional
+        Save every chart to this directory (Agg backend) instead of showing
+        it; the EDA charts render in a background process pool
+    use_cache : bool
+        Reuse stage outputs stored by previous runs; False recomputes all
+    tuned : bool
+        Train the Random Forest and Gradient Boosting with the best
+        parameters found by tune.py (where it has been run)
+    cross_validate : bool
+        Also compare the models by stratified k-fold cross-validation
+        (mean ± std of each metric; folds are cached for reuse)
+    
+    Returns:
+    --------
+    dict
+        Key objects of the analysis; df_processed, customer_df and
+        customer_scores are keyed by customer_key, which customer_index
+        maps back to email addresses (see data_loader.decode_customer_keys)
+    """
+    memory_report = []
     
     # Setup
     print_header("HOTELS.COM CUSTOMER CHURN ANALYSIS")
     print("Setting up plot style and configuration...")
     setup_plot_style()
+    if figures_dir is not None:
+        set_render_mode(figures_dir)
+    model_params = {}
+    if tuned:
+        rf_tuning, gb_tuning = load_tuning_results('random_forest'), load_tuning_results('gradient_boosting')
+        if rf_tuning:
+            model_params['rf_params'] = rf_tuning['best_params']
+        if gb_tuning:
+            model_params.update(gb_params=gb_tuning['best_params'], gb_engine=gb_tuning['engine'])
+        tuned_models = [name for name, tuning in [('Random Forest', rf_tuning), ('Gradient Boosting', gb_tuning)]
+                        if tuning]
+        print(f"✓ Tuned parameters: {', '.join(tuned_models) or 'none saved yet (run tune.py)'}")
+    pipeline = build_analysis_pipeline(resampling=resampling, low_memory=low_memory, use_cache=use_cache,
+                                       memory_report=memory_report if low_memory else None, **model_params)
     print("✓ Configuration loaded\n")
     
     # =========================================================================
@@ -55,100 +112,87 @@ def run_analysis():
     # =========================================================================
     print_header("STEP 1: DATA LOADING AND PREPROCESSING")
     
-    # Load raw data
-    df = load_data()
+    # Load and preprocess data; customers are identified by integer keys,
+    # emails are restored only when exporting
+    df_processed, customer_index, df = pipeline['preprocess']
     
-    # Get data summary
+    # Get data summary (of the raw data)
     get_data_summary(df)
     
-    # Preprocess data
-    df_processed = preprocess_data(df)
-    
     # =========================================================================
     # STEP 2: EXPLORATORY DATA ANALYSIS
     # =========================================================================
     print_header("STEP 2: EXPLORATORY DATA ANALYSIS")
     
-    # 2.1 Churn distribution
-    print("\n--- 2.1 Overall Churn Distribution ---")
-    plot_churn_distribution(df_processed)
-    
-    # 2.2 Churn by categorical variables
-    print("\n--- 2.2 Churn by Categorical Variables ---")
-    
-    print("\n📌 Customer Type:")
-    plot_churn_by_category(df_processed, 'customer_type', 'Customer Type')
-    
-    print("\n📌 Loyalty Tier:")
-    print("  0 = Not a member, 1 = Base member, 2 = Silver/Gold member")
-    plot_churn_by_category(df_processed, 'loyalty_tier', 'Loyalty Tier')
-    
-    print("\n📌 Platform:")
-    plot_churn_by_category(df_processed, 'platform', 'Platform')
-    
-    print("\n📌 Marketing Channel:")
-    plot_churn_by_category(df_processed, 'marketing_channel', 'Marketing Channel', figsize=(12, 6))
-    
-    # 2.3 Binary flags
-    print("\n--- 2.3 Churn by Binary Flags ---")
-    plot_binary_flags(df_processed, BINARY_FLAGS)
-    
-    # 2.4 Numerical distributions
-    print("\n--- 2.4 Numerical Feature Analysis ---")
-    calculate_mean_comparison(df_processed, NUMERICAL_COLS)
-    plot_numerical_distributions(df_processed, NUMERICAL_COLS)
-    
-    # 2.5 Correlation analysis
-    print("\n--- 2.5 Correlation Analysis ---")
-    plot_correlation_heatmap(df_processed)
+    # 2.1 - 2.5 as (heading, function, args, kwargs): charts, churn rates,
+    # mean comparison and correlations
+    eda_charts = [
+        ("\n--- 2.1 Overall Churn Distribution ---", plot_churn_distribution, (df_processed,), {}),
+        ("\n--- 2.2 Churn by Categorical Variables ---\n\n📌 Customer Type:",
+         plot_churn_by_category, (df_processed, 'customer_type', 'Customer Type'), {}),
+        ("\n📌 Loyalty Tier:\n  0 = Not a member, 1 = Base member, 2 = Silver/Gold member",
+         plot_churn_by_category, (df_processed, 'loyalty_tier', 'Loyalty Tier'), {}),
+        ("\n📌 Platform:", plot_churn_by_category, (df_processed, 'platform', 'Platform'), {}),
+        ("\n📌 Marketing Channel:", plot_churn_by_category,
+         (df_processed, 'marketing_channel', 'Marketing Channel'), {'figsize': (12, 6)}),
+        ("\n--- 2.3 Churn by Binary Flags ---", plot_binary_flags, (df_processed, BINARY_FLAGS), {}),
+        ("\n--- 2.4 Numerical Feature Analysis ---", calculate_mean_comparison,
+         (df_processed, NUMERICAL_COLS), {}),
+        (None, plot_numerical_distributions, (df_processed, NUMERICAL_COLS), {}),
+        ("\n--- 2.5 Correlation Analysis ---", plot_correlation_heatmap, (df_processed,), {}),
+    ]
+    
+    # Steps 3-5 only need the preprocessed data: the tests, the customer
+    # aggregation and the feature preparation run in background threads
+    # while the charts are drawn (their output is printed at their step)
+    background_stages = ['tests', 'aggregate', 'features']
+    
+    eda_pack = None
+    if figures_dir is None:
+        pipeline.start(background_stages)
+        for heading, plot_func, args, kwargs in eda_charts:
+            if heading:
+                print(heading)
+            plot_func(*args, **kwargs)
+    else:
+        # Render in background processes while the analysis continues
+        eda_pack = render_figures(eda_charts, figures_dir, wait=False)
+        pipeline.start(background_stages)
+        print(f"✓ Rendering {len(eda_charts)} EDA charts in the background to {figures_dir}/")
     
     # =========================================================================
     # STEP 3: STATISTICAL SIGNIFICANCE TESTING
     # =========================================================================
     print_header("STEP 3: STATISTICAL SIGNIFICANCE TESTING")
     
-    # T-tests for numerical variables
-    ttest_results = perform_ttest(df_processed, NUMERICAL_COLS)
-    
-    # Chi-square tests for categorical variables
-    chi_square_cols = ['customer_type', 'loyalty_tier', 'platform', 'marketing_channel',
-                       'coupon_flag', 'pay_now_flag', 'cancel_flag']
-    chi_square_results = perform_chi_square_tests(df_processed, chi_square_cols)
+    # T-tests, chi-square tests, optional resampling tests and segmented tests
+    pipeline['tests']
     
     # =========================================================================
     # STEP 4: CUSTOMER-LEVEL AGGREGATION
     # =========================================================================
     print_header("STEP 4: CUSTOMER-LEVEL AGGREGATION")
     
-    customer_df = aggregate_to_customer_level(df_processed)
+    customer_df = pipeline['aggregate']
     
     # =========================================================================
     # STEP 5: MODEL TRAINING AND EVALUATION
     # =========================================================================
     print_header("STEP 5: MODEL TRAINING AND EVALUATION")
     
-    # Prepare features
-    X, y, feature_cols, model_df_dummies = prepare_features(customer_df)
+    # Prepare features, split and scale data
+    features = pipeline['features']
+    feature_cols, y_test = features['feature_cols'], features['y_test']
     
-    # Split and scale data
-    (X_train, X_test, y_train, y_test, 
-     X_train_scaled, X_test_scaled, scaler) = split_and_scale_data(X, y)
-    
-    # Train models
+    # Train models (those not cached are trained concurrently, one process each)
     print("\n--- Training Models ---\n")
+    training_results = train_model_stages(pipeline)
     
-    # Logistic Regression
-    lr_model, y_pred_lr, y_prob_lr = train_logistic_regression(
-        X_train_scaled, y_train, X_test_scaled, y_test
-    )
-    
-    # Get odds ratios
-    odds_ratios = get_logistic_regression_odds_ratios(lr_model, feature_cols)
+    # Logistic Regression, with its odds ratios
+    lr_model, y_pred_lr, y_prob_lr, odds_ratios = pipeline['train_lr']
     
     # Random Forest
-    rf_model, y_pred_rf, y_prob_rf = train_random_forest(
-        X_train, y_train, X_test, y_test
-    )
+    rf_model, y_pred_rf, y_prob_rf = pipeline['train_rf']
     
     # Feature importance
     print("\n--- Random Forest Feature Importance ---")
@@ -158,9 +202,9 @@ def run_analysis():
     )
     
     # Gradient Boosting
-    gb_model, y_pred_gb, y_prob_gb = train_gradient_boosting(
-        X_train, y_train, X_test, y_test
-    )
+    gb_model, y_pred_gb, y_prob_gb = pipeline['train_gb']
+    if training_results:
+        print_training_times(training_results)
     
     # =========================================================================
     # STEP 6: MODEL COMPARISON
@@ -177,14 +221,29 @@ def run_analysis():
     print("\n--- Confusion Matrices ---")
     plot_confusion_matrices(y_test, y_pred_lr, y_pred_rf, y_pred_gb)
     
+    # k-fold cross-validation (less noisy than the single holdout above)
+    cv_summary = None
+    if cross_validate:
+        print("\n--- Cross-Validation ---")
+        cv_results = cross_validate_stages(pipeline)
+        cv_summary = summarize_cv_results(cv_results)
+        print_cv_summary(cv_summary, cv_results['Fold'].nunique())
+        plot_cv_comparison(cv_summary, cv_results['Fold'].nunique())
+    
     # =========================================================================
     # STEP 7: CUSTOMER RISK SCORING
     # =========================================================================
     print_header("STEP 7: CUSTOMER RISK SCORING")
     
     # Score customers using Random Forest (best model)
-    customer_scores = score_customers(rf_model, X, model_df_dummies)
+    customer_scores = pipeline['score']
     plot_risk_segmentation(customer_scores)
+    export_customer_scores(customer_scores, customer_index)
+    
+    if eda_pack is not None:
+        print_header("EDA CHART PACK")
+        eda_pack.collect()
+        print(f"\n✓ Charts saved to {figures_dir}/")
     
     # =========================================================================
     # FINAL SUMMARY
@@ -212,6 +271,19 @@ def run_analysis():
     └─────────────────────────────────────────────────────────────────────┘
     """)
     
+    pipeline.report()
+    
+    if memory_report:
+        print("📊 Peak memory by stage:")
+        for entry in memory_report:
+            print(f"   • {entry['stage']:25} {entry['peak_mb']:>10,.0f} MB  ({entry['seconds']:.1f}s)")
+        print()
+    
+    cache_stats = figure_cache_stats()
+    if cache_stats is not None:
+        print(f"📊 Figure cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['entries']} charts, {cache_stats['size_mb']:.1f} MB)\n")
+    
     print("✅ All visualizations generated successfully!")
     print("✅ Analysis ready for presentation to leadership team\n")
     
@@ -226,10 +298,15 @@ def run_analysis():
             'gradient_boosting': gb_model
         },
         'metrics': metrics_comparison,
-        'customer_scores': customer_scores
+        'cv_metrics': cv_summary,
+        'customer_scores': customer_scores,
+        'customer_index': customer_index
     }
 
 
 if __name__ == "__main__":
-    results = run_analysis()
+    results = run_analysis(low_memory='--low-memory' in sys.argv, resampling='--resampling' in sys.argv,
+                           figures_dir=FIGURES_DIR if '--headless' in sys.argv else None,
+                           use_cache='--no-cache' not in sys.argv, tuned='--tuned' in sys.argv,
+                           cross_validate='--cv' in sys.argv)
 
@@ -1,12 +1,22 @@
 """
 Hotels.com Customer Churn Analysis - Source Package
+
+Submodules are imported on first attribute access, so `import src` does not
+load matplotlib, scipy or scikit-learn for jobs that never touch them.
 """
 
-from . import config
-from . import data_loader
-from . import visualizations
-from . import statistical_tests
-from . import models
+import importlib
 
 __all__ = ['config', 'data_loader', 'visualizations', 'statistical_tests', 'models']
 
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module(f'.{name}', __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,109 @@
+"""
+Code dependency hashing for Hotels.com Churn Analysis
+Content keys of functions together with the helpers and settings they use
+"""
+
+import os
+import sys
+import hashlib
+import inspect
+
+# Directory of the repository modules (src/)
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Values hashed by repr; other objects are left out
+_PLAIN_TYPES = (bool, int, float, complex, str, bytes, type(None))
+
+
+def _is_local(obj):
+    """Whether a function or class is defined in a repository module."""
+    module = sys.modules.get(getattr(obj, '__module__', None) or '')
+    filename = getattr(module, '__file__', None) or ''
+    return os.path.dirname(os.path.abspath(filename)) == _SRC_DIR
+
+
+def _code_names(code):
+    """Global and attribute names used by a code object and the code nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _code_sources(obj, sources=None):
+    """
+    Source of a function or class and of everything of this repository it uses.
+    
+    Follows the global names the code refers to: repository functions and
+    classes (also inside containers such as dispatch dicts) contribute their
+    source, recursively; constants, such as those imported from config, and
+    default argument values contribute their value.
+    
+    Returns:
+    --------
+    dict
+        Qualified name -> source or value
+    """
+    sources = {} if sources is None else sources
+    name = f"{obj.__module__}.{obj.__qualname__}"
+    if name in sources:
+        return sources
+    sources[name] = inspect.getsource(obj)
+    
+    if inspect.isclass(obj):
+        members = [member for member in vars(obj).values()
+                   if inspect.isfunction(inspect.unwrap(getattr(member, '__func__', member)))]
+        for member in members:
+            _code_sources(inspect.unwrap(getattr(member, '__func__', member)), sources)
+        return sources
+    
+    func = inspect.unwrap(obj)
+    # Default argument values are evaluated once, so their names are not in the code
+    defaults = list(func.__defaults__ or ()) + list((func.__kwdefaults__ or {}).values())
+    _value_sources(f"{name}.__defaults__", defaults, sources)
+    for global_name in sorted(_code_names(func.__code__)):
+        if global_name in func.__globals__:
+            _value_sources(f"{func.__module__}.{global_name}", func.__globals__[global_name], sources)
+    return sources
+
+
+def _value_sources(name, value, sources):
+    """Add a global referenced by the code to its sources (see _code_sources)."""
+    if (inspect.isfunction(value) or inspect.isclass(value)) and _is_local(value):
+        _code_sources(value, sources)
+    elif isinstance(value, dict):
+        for item_key, item in value.items():
+            _value_sources(f"{name}[{item_key!r}]", item, sources)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        for i, item in enumerate(items):
+            _value_sources(f"{name}[{i}]", item, sources)
+    elif isinstance(value, _PLAIN_TYPES):
+        sources[name] = repr(value)
+
+
+def code_digest(funcs):
+    """
+    Hash of functions together with everything of this repository they use.
+    
+    Cache keys built from it change whenever a function, a helper it calls
+    (directly or indirectly) or a setting it reads is edited.
+    
+    Parameters:
+    -----------
+    funcs : iterable
+        Functions (or classes)
+    
+    Returns:
+    --------
+    str
+        Hex digest
+    """
+    sources = {}
+    for func in funcs:
+        _code_sources(func, sources)
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(sources):
+        digest.update(f"{name}|{sources[name]}".encode())
+    return digest.hexdigest()
@@ -1,10 +1,10 @@
 """
 Configuration file for Hotels.com Customer Churn Analysis
 Contains unified colour scheme and global settings
-"""
 
-import matplotlib.pyplot as plt
-from matplotlib.colors import LinearSegmentedColormap
+matplotlib is imported inside the plotting helpers only, so that data and
+scoring jobs importing this module do not pay for it.
+"""
 
 # =============================================================================
 # UNIFIED COLOUR SCHEME FOR ALL VISUALISATIONS
@@ -54,17 +54,20 @@ CAT_PALETTE = [COLORS['cat_1'], COLORS['cat_2'], COLORS['cat_3'], COLORS['cat_4'
 # Custom colormaps
 def get_custom_cmap():
     """Returns custom colormap for correlation heatmaps (teal to white to red)"""
+    from matplotlib.colors import LinearSegmentedColormap
     return LinearSegmentedColormap.from_list('custom', 
         [COLORS['retained'], '#ffffff', COLORS['churned']])
 
 def get_confusion_matrix_cmap():
     """Returns custom colormap for confusion matrices"""
+    from matplotlib.colors import LinearSegmentedColormap
     return LinearSegmentedColormap.from_list('custom_cm', 
         ['#ffffff', COLORS['cat_2'], COLORS['cat_1']])
 
 
 def setup_plot_style():
     """Configure matplotlib defaults with unified colour scheme"""
+    import matplotlib.pyplot as plt
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.rcParams['axes.prop_cycle'] = plt.cycler(color=CAT_PALETTE)
     plt.rcParams['figure.facecolor'] = 'white'
@@ -81,6 +84,104 @@ def setup_plot_style():
 # Data file path
 DATA_FILE = 'PIP_case_study_data.csv'
 
+# Explicit schema for typed ingest (see data_loader.load_data)
+# cancel_flag has a handful of missing values, so it cannot be held as int8
+BOOKING_DTYPES = {
+    'email_address': 'object',
+    'booking_id': 'float64',
+    'coupon_flag': 'int8',
+    'pay_now_flag': 'int8',
+    'cancel_flag': 'float32',
+    'customer_type': 'category',
+    'loyalty_tier': 'int8',
+    'platform': 'category',
+    'marketing_channel': 'category',
+    'total_visit_minutes': 'float32',
+    'total_visit_pages': 'float32',
+    'landing_pages_count': 'float32',
+    'search_pages_count': 'float32',
+    'property_pages_count': 'float32',
+    'bkg_confirmation_pages_count': 'float32',
+    'bounce_visits_count': 'float32',
+    'searched_destinations_count': 'float32',
+    'hotel_star_rating': 'int8',
+    'churn_flag': 'int8',
+}
+DATE_COLS = ['bk_date', 'cancel_date']
+
+# Memory budget (MB) for streaming ingest
+MEMORY_BUDGET_MB = 2048
+
+# Rows per chunk when accumulating co-moments for correlations
+CORRELATION_CHUNKSIZE = 100_000
+
+# On-disk cache for preprocessed data and incremental customer state
+CACHE_DIR = '.cache'
+CUSTOMER_STATE_DIR = '.cache/customer_state'
+
+# Memoized pipeline stage outputs (see pipeline.py)
+STAGE_CACHE_DIR = '.cache/stages'
+
+# Headless figure output
+FIGURES_DIR = 'results/figures'
+FIGURE_FORMATS = ('png', 'svg')
+FIGURE_DPI = 150
+
+# Content-addressed cache of rendered figures (LRU by total size)
+FIGURE_CACHE_DIR = '.cache/figures'
+FIGURE_CACHE_MAX_MB = 256
+
+# Histogram resolution for approximate box plot quantiles
+QUANTILE_BINS = 4096
+
+# Resampling (permutation / bootstrap) tests
+ALPHA = 0.05
+N_RESAMPLES = 10_000
+RESAMPLE_BATCH_SIZE = 25
+RESAMPLE_SEED = 42
+
+# Segments for segmented significance testing
+SEGMENT_COLS = ['platform', 'marketing_channel', 'customer_type']
+
+# Cores shared by concurrently running pipeline steps (None for all cores)
+N_CORES = None
+
+# Model hyperparameters (overridable per call through the train_* params argument)
+LR_PARAMS = {'max_iter': 1000, 'random_state': 42, 'class_weight': 'balanced'}
+RF_PARAMS = {'n_estimators': 200, 'max_depth': 15, 'min_samples_split': 10,
+             'random_state': 42, 'class_weight': 'balanced', 'n_jobs': -1}
+GB_PARAMS = {'n_estimators': 150, 'max_depth': 5, 'learning_rate': 0.1,
+             'random_state': 42, 'min_samples_split': 10}
+
+# Gradient boosting engine: 'exact' (GradientBoostingClassifier) or 'hist' (binned
+# HistGradientBoostingClassifier: multi-threaded, NaN-aware, early stopping on a
+# validation split of the training data)
+GB_ENGINE = 'exact'
+HIST_GB_PARAMS = {'max_iter': 500, 'max_depth': 5, 'learning_rate': 0.1, 'min_samples_leaf': 20,
+                  'early_stopping': True, 'validation_fraction': 0.1, 'n_iter_no_change': 10,
+                  'random_state': 42}
+GB_ENGINE_PARAMS = {'exact': GB_PARAMS, 'hist': HIST_GB_PARAMS}
+
+# Hyperparameter search spaces for tuning.py (successive halving). The tree
+# count (n_estimators / max_iter) is the budget that grows between rounds
+RF_PARAM_SPACE = {'max_depth': [8, 12, 15, 20, None], 'min_samples_split': [2, 5, 10, 20],
+                  'min_samples_leaf': [1, 2, 5, 10], 'max_features': ['sqrt', 0.3, 0.5]}
+GB_PARAM_SPACE = {'max_depth': [3, 4, 5, 6], 'learning_rate': [0.03, 0.05, 0.1, 0.2],
+                  'subsample': [0.7, 0.85, 1.0], 'min_samples_split': [2, 10, 50]}
+HIST_GB_PARAM_SPACE = {'max_depth': [3, 5, 7, None], 'learning_rate': [0.03, 0.05, 0.1, 0.2],
+                       'min_samples_leaf': [10, 20, 50, 100], 'l2_regularization': [0.0, 0.1, 1.0],
+                       'max_leaf_nodes': [15, 31, 63]}
+TUNING_CANDIDATES = 27      # configurations sampled in the first round
+TUNING_ETA = 3              # 1/ETA of the candidates survive each round, with ETA times the budget
+TUNING_VALIDATION_SIZE = 0.2  # share of the training set held out to score candidates
+TUNING_SEED = 42
+
+# Cross-validation (cross_validation.py): stratified folds, with the fold
+# assignment and per-fold scaled matrices cached on disk for reuse
+CV_FOLDS = 5
+CV_SEED = 42
+CV_CACHE_DIR = '.cache/folds'
+
 # Numerical columns for analysis
 NUMERICAL_COLS = [
     'total_visit_minutes', 'total_visit_pages', 'landing_pages_count', 
@@ -91,6 +192,14 @@ NUMERICAL_COLS = [
 # Categorical columns for analysis
 CATEGORICAL_COLS = ['customer_type', 'loyalty_tier', 'platform', 'marketing_channel']
 
+# Columns for the correlation heatmap
+CORRELATION_COLS = [
+    'churn_flag', 'coupon_flag', 'pay_now_flag', 'cancel_flag', 'loyalty_tier',
+    'total_visit_minutes', 'total_visit_pages', 'search_pages_count',
+    'property_pages_count', 'bounce_visits_count', 'searched_destinations_count',
+    'hotel_star_rating', 'pages_per_minute', 'property_page_ratio'
+]
+
 # Binary flag columns
 BINARY_FLAGS = [
     ('coupon_flag', 'Coupon Usage'), 
@@ -0,0 +1,218 @@
+"""
+Cross-validation module for Hotels.com Churn Analysis
+Stratified k-fold evaluation of the churn models on cached fold matrices
+
+The fold assignment and the per-fold scaled matrices (float32) are computed
+once per feature matrix and stored under a content key, so repeated
+experiments memory-map them instead of re-splitting and re-scaling. The
+(model, fold) fits run in parallel worker processes.
+"""
+
+import io
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from config import CV_FOLDS, CV_SEED, CV_CACHE_DIR
+from data_loader import data_fingerprint
+from models import MODEL_TRAINERS, _trainer_kwargs, _share_arrays, _load_shared
+from scheduler import CORES
+
+# Bump when the stored fold layout changes
+FOLD_CACHE_VERSION = 1
+
+CV_METRICS = ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'ROC-AUC']
+
+
+def _folds_key(X, y, n_splits, seed):
+    """Content key of a fold set: feature matrix, target, split settings and layout version."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(data_fingerprint(X).encode())
+    digest.update(np.ascontiguousarray(np.asarray(y, dtype=np.int64)))
+    digest.update(f"v{FOLD_CACHE_VERSION}|folds={n_splits}|seed={seed}".encode())
+    return digest.hexdigest()
+
+
+def prepare_folds(X, y, n_splits=CV_FOLDS, seed=CV_SEED, cache_dir=CV_CACHE_DIR):
+    """
+    Compute (or reuse) stratified k-fold matrices for cross-validation.
+    
+    Stored per fold set: the features (float32), the target, the fold of
+    every row and, for each fold, the features scaled with a scaler fitted
+    on that fold's training rows (float32).
+    
+    Parameters:
+    -----------
+    X : pd.DataFrame
+        Feature matrix
+    y : pd.Series
+        Target variable
+    n_splits : int
+        Number of folds
+    seed : int
+        Random seed of the fold assignment
+    cache_dir : str
+        Directory for the stored fold sets
+    
+    Returns:
+    --------
+    dict
+        path (directory of the .npy files), n_splits, columns and n_samples
+    """
+    key = _folds_key(X, y, n_splits, seed)
+    path = os.path.join(cache_dir, key)
+    folds = {'path': path, 'n_splits': n_splits, 'columns': list(X.columns), 'n_samples': len(X)}
+    if os.path.exists(os.path.join(path, 'folds.json')):
+        print(f"✓ Reusing {n_splits} cached folds ({key[:12]})")
+        return folds
+    
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.preprocessing import StandardScaler
+    
+    started = time.perf_counter()
+    X_values = X.to_numpy(dtype=np.float32)
+    y_values = np.asarray(y)
+    fold_ids = np.empty(len(X), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    for fold, (_, test_idx) in enumerate(splitter.split(X_values, y_values)):
+        fold_ids[test_idx] = fold
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix='.tmp-', dir=cache_dir)
+    try:
+        _share_arrays(tmp_path, X=X_values, y=y_values, fold_ids=fold_ids)
+        for fold in range(n_splits):
+            # Scaled in float64 like split_and_scale_data, stored in float32
+            scaler = StandardScaler().fit(X_values[fold_ids != fold].astype(np.float64))
+            _share_arrays(tmp_path, **{f'X_scaled_{fold}': scaler.transform(X_values.astype(np.float64))
+                                       .astype(np.float32)})
+        with open(os.path.join(tmp_path, 'folds.json'), 'w') as f:
+            json.dump(folds, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Another process stored the same fold set first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    
+    print(f"✓ {n_splits} stratified folds prepared and cached to {path} "
+          f"({time.perf_counter() - started:.1f}s)")
+    return folds
+
+
+def fold_indices(folds, fold):
+    """Training and test row indices of a fold."""
+    fold_ids = _load_shared(folds['path'], 'fold_ids')
+    return np.flatnonzero(fold_ids != fold), np.flatnonzero(fold_ids == fold)
+
+
+def _cv_worker(folds, name, fold, params, n_jobs, gb_engine):
+    """Train one model on one fold's memory-mapped matrices; returns its test metrics and seconds."""
+    from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+    
+    train_func, scaled = MODEL_TRAINERS[name]
+    X = _load_shared(folds['path'], f'X_scaled_{fold}' if scaled else 'X')
+    y = _load_shared(folds['path'], 'y')
+    train_idx, test_idx = fold_indices(folds, fold)
+    
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, y_pred, y_prob = train_func(X[train_idx], y[train_idx], X[test_idx], y[test_idx], save_model=False,
+                                       **_trainer_kwargs(name, params, n_jobs, gb_engine))
+    seconds = time.perf_counter() - started
+    
+    y_test = y[test_idx]
+    return {'Accuracy': accuracy_score(y_test, y_pred), 'Precision': precision_score(y_test, y_pred),
+            'Recall': recall_score(y_test, y_pred), 'F1-Score': f1_score(y_test, y_pred),
+            'ROC-AUC': roc_auc_score(y_test, y_prob)}, seconds
+
+
+def cross_validate_models(folds, models=None, params=None, gb_engine=None, n_jobs=-1):
+    """
+    Evaluate each model on every fold of a fold set from prepare_folds.
+    
+    Parameters:
+    -----------
+    folds : dict
+        Fold set from prepare_folds
+    models : list, optional
+        Names from models.MODEL_TRAINERS (all three by default)
+    params : dict, optional
+        Model name -> hyperparameters overriding the defaults in config
+    gb_engine : str, optional
+        Gradient boosting engine ('exact' or 'hist'; config.GB_ENGINE by default)
+    n_jobs : int
+        Cores to use (-1 for all free cores of the shared budget)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        One row per model and fold: Model, Fold, the CV_METRICS and Seconds
+        (see summarize_cv_results)
+    """
+    models = list(MODEL_TRAINERS) if models is None else list(models)
+    params = params or {}
+    # Slowest model first, so its folds are not left running on their own at the end
+    tasks = [(name, fold) for name in sorted(models, key=lambda name: name != 'Gradient Boosting')
+             for fold in range(folds['n_splits'])]
+    
+    n_cores = CORES.acquire(n_jobs)
+    try:
+        n_threads = max(1, n_cores // len(tasks))
+        if n_cores == 1:
+            # In-process; the core goes back to the budget, as the multi-threaded models reserve their own
+            CORES.release(n_cores)
+            n_cores = 0
+            outputs = {task: _cv_worker(folds, *task, params.get(task[0]), n_threads, gb_engine) for task in tasks}
+        else:
+            # Spawned rather than forked, as in models.train_models
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(n_cores, len(tasks)), mp_context=context) as executor:
+                futures = {task: executor.submit(_cv_worker, folds, *task, params.get(task[0]), n_threads,
+                                                 gb_engine)
+                           for task in tasks}
+                outputs = {task: future.result() for task, future in futures.items()}
+    finally:
+        CORES.release(n_cores)
+    
+    rows = [{'Model': name, 'Fold': fold + 1, **outputs[name, fold][0], 'Seconds': outputs[name, fold][1]}
+            for name in models for fold in range(folds['n_splits'])]
+    return pd.DataFrame(rows)
+
+
+def summarize_cv_results(cv_results):
+    """
+    Mean and standard deviation of every metric per model.
+    
+    Parameters:
+    -----------
+    cv_results : pd.DataFrame
+        Per-fold results from cross_validate_models
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Model, then '<metric>' (mean over folds) and '<metric> std' for each
+        of CV_METRICS, in the order the models were evaluated
+    """
+    grouped = cv_results.groupby('Model', sort=False)[CV_METRICS]
+    means, stds = grouped.mean(), grouped.std()
+    summary = pd.concat([means, stds.add_suffix(' std')], axis=1)
+    summary = summary[[column for metric in CV_METRICS for column in (metric, f'{metric} std')]]
+    return summary.reset_index()
+
+
+def print_cv_summary(cv_summary, n_splits):
+    """Print mean ± std of every metric per model."""
+    print(f"\n📊 Cross-validated performance ({n_splits} folds, mean ± std):")
+    table = pd.DataFrame({'Model': cv_summary['Model']})
+    for metric in CV_METRICS:
+        table[metric] = [f"{mean:.4f} ± {std:.4f}"
+                         for mean, std in zip(cv_summary[metric], cv_summary[f'{metric} std'])]
+    print(table.to_string(index=False))
@@ -0,0 +1,281 @@
+"""
+Customer state store for Hotels.com Churn Analysis
+Columnar on-disk table of per-customer rows, updated in place by key
+"""
+
+import os
+import copy
+import json
+
+import numpy as np
+import pandas as pd
+
+_MANIFEST_FILE = 'manifest.json'
+_KEYS_FILE = 'keys.txt'
+_UNDO_FILE = 'undo.npz'
+
+
+class CustomerStateStore:
+    """
+    Per-customer rows stored on disk column by column, indexed by key.
+    
+    Each column is a flat binary file of fixed-width values (text columns
+    hold int32 codes into a value table) that is memory-mapped for reading
+    and updating; keys are appended to a text file, one per line. An update
+    overwrites the rows of known keys in place and appends new keys, so it
+    costs time and I/O proportional to the rows it touches. The order of
+    the keys is kept as a permutation that new keys are merged into, so rows
+    can be read sorted by key without sorting them.
+    
+    A JSON manifest with the row count, column types, value tables and the
+    caller's metadata is replaced last. The old values of the rows an update
+    overwrites are saved to an undo file first, so an interrupted update is
+    rolled back the next time the store is opened.
+    
+    Parameters:
+    -----------
+    store_dir : str
+        Directory of the store (created by the first update)
+    """
+    
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        if os.path.exists(self._path(_UNDO_FILE)):
+            self._rollback()
+        self._manifest = {'n_rows': 0, 'keys_bytes': 0, 'next_file': 0, 'order_file': None,
+                          'columns': {}, 'meta': None}
+        if os.path.exists(self._path(_MANIFEST_FILE)):
+            with open(self._path(_MANIFEST_FILE)) as f:
+                self._manifest = json.load(f)
+        self.keys = self._read_keys()
+    
+    def __len__(self):
+        return self._manifest['n_rows']
+    
+    @property
+    def meta(self):
+        """Metadata stored by the last update (None for an empty store)."""
+        return self._manifest['meta']
+    
+    @property
+    def columns(self):
+        return list(self._manifest['columns'])
+    
+    def _path(self, name):
+        return os.path.join(self.store_dir, name)
+    
+    def _read_keys(self):
+        if self._manifest['keys_bytes'] == 0:
+            return pd.Index([], dtype=object)
+        with open(self._path(_KEYS_FILE), 'rb') as f:
+            keys = f.read(self._manifest['keys_bytes']).decode('utf-8').split('\n')[:-1]
+        return pd.Index(keys, dtype=object)
+    
+    def _column(self, column, manifest=None, mode='r'):
+        """Memory map of a stored column (an empty array when the store has no rows)."""
+        manifest = manifest or self._manifest
+        spec = manifest['columns'][column]
+        if manifest['n_rows'] == 0:
+            return np.empty(0, dtype=spec['dtype'])
+        return np.memmap(self._path(spec['file']), dtype=spec['dtype'], mode=mode,
+                         shape=(manifest['n_rows'],))
+    
+    def _order(self, manifest=None):
+        """Row positions of the keys in sorted order."""
+        manifest = manifest or self._manifest
+        if manifest['order_file'] is None:
+            return np.arange(manifest['n_rows'])
+        return np.fromfile(self._path(manifest['order_file']), dtype=np.int64)
+    
+    def read(self, keys=None, columns=None, sort=False):
+        """
+        Read rows of the store.
+        
+        Parameters:
+        -----------
+        keys : array-like, optional
+            Keys of the rows to read, all of them stored (all rows by default)
+        columns : list, optional
+            Columns to read (all by default)
+        sort : bool
+            Return all rows sorted by key instead of in storage order
+        
+        Returns:
+        --------
+        pd.DataFrame
+            The rows indexed by key; text columns hold NaN for missing values
+        """
+        if keys is None and sort:
+            positions = self._order()
+            index = self.keys[positions]
+        elif keys is None:
+            index, positions = self.keys, slice(None)
+        else:
+            index = pd.Index(keys, dtype=object)
+            positions = self.keys.get_indexer(index)
+            if (positions < 0).any():
+                raise KeyError(f"{int((positions < 0).sum())} keys are not in the customer state store")
+        
+        data = {}
+        for column in (self.columns if columns is None else columns):
+            values = np.array(self._column(column)[positions])
+            table = self._manifest['columns'][column]['values']
+            if table is not None:
+                # Code -1 (missing) picks the trailing NaN
+                values = np.array(table + [np.nan], dtype=object)[values]
+            data[column] = values
+        return pd.DataFrame(data, index=index)
+    
+    def update(self, frame, meta=None):
+        """
+        Write rows: known keys are overwritten in place, new keys appended.
+        
+        Columns missing from frame keep their stored values (new rows get
+        zero, NaN, NaT or a missing text value); new columns are added with
+        those fill values for the rows not in frame.
+        
+        Parameters:
+        -----------
+        frame : pd.DataFrame
+            Rows indexed by key
+        meta : dict, optional
+            JSON-serializable metadata stored with the update (see meta)
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+        old = self._manifest
+        manifest = copy.deepcopy(old)
+        manifest['meta'] = meta
+        
+        positions = self.keys.get_indexer(frame.index)
+        seen = positions >= 0
+        new_keys = frame.index[~seen]
+        n_old, n_new = old['n_rows'], old['n_rows'] + len(new_keys)
+        positions[~seen] = np.arange(n_old, n_new)
+        
+        encoded = {column: self._encode(manifest, column, frame[column]) for column in frame.columns}
+        rewritten = {column for column, spec in manifest['columns'].items()
+                     if column not in old['columns'] or spec['file'] != old['columns'][column]['file']}
+        
+        # Old values of the rows about to be overwritten, for _rollback
+        undo = {'manifest': np.array(json.dumps(old)), 'positions': positions[seen]}
+        for i, column in enumerate(old['columns']):
+            if column in encoded and column not in rewritten:
+                undo[f'column_{i}'] = np.array(self._column(column)[positions[seen]])
+        np.savez(self._path(_UNDO_FILE + '.tmp.npz'), **undo)
+        os.replace(self._path(_UNDO_FILE + '.tmp.npz'), self._path(_UNDO_FILE))
+        
+        for column, spec in manifest['columns'].items():
+            dtype = np.dtype(spec['dtype'])
+            if column in rewritten:
+                # New column, or a stored one whose type was promoted: written to a new file
+                base = (np.array(self._column(column), dtype=dtype) if column in old['columns']
+                        else np.full(n_old, _fill_value(spec), dtype=dtype))
+                base.tofile(self._path(spec['file']))
+            values = encoded.get(column)
+            if values is not None and seen.any():
+                stored = self._column(column, {**manifest, 'n_rows': n_old}, mode='r+')
+                stored[positions[seen]] = values[seen]
+                del stored
+            appended = (values[~seen] if values is not None
+                        else np.full(len(new_keys), _fill_value(spec), dtype=dtype))
+            with open(self._path(spec['file']), 'ab') as f:
+                f.write(np.ascontiguousarray(appended, dtype=dtype).tobytes())
+        
+        with open(self._path(_KEYS_FILE), 'ab') as f:
+            f.write(''.join(f'{key}\n' for key in new_keys).encode('utf-8'))
+        if len(new_keys) > 0:
+            # Merge the new keys into the sorted order (written to a new file, like promoted columns)
+            order = self._order()
+            new_order = np.argsort(new_keys.to_numpy(dtype=object), kind='stable')
+            at = np.searchsorted(self.keys.to_numpy(dtype=object)[order],
+                                 new_keys.to_numpy(dtype=object)[new_order])
+            manifest['order_file'] = f"order_{manifest['next_file']}.bin"
+            manifest['next_file'] += 1
+            np.insert(order, at, n_old + new_order).astype(np.int64).tofile(self._path(manifest['order_file']))
+        manifest['n_rows'] = n_new
+        manifest['keys_bytes'] = os.path.getsize(self._path(_KEYS_FILE))
+        with open(self._path(_MANIFEST_FILE + '.tmp'), 'w') as f:
+            json.dump(manifest, f)
+        os.replace(self._path(_MANIFEST_FILE + '.tmp'), self._path(_MANIFEST_FILE))
+        os.remove(self._path(_UNDO_FILE))
+        
+        self._manifest = manifest
+        self.keys = self.keys.append(pd.Index(new_keys, dtype=object))
+        self._remove_unreferenced(manifest)
+    
+    def _encode(self, manifest, column, series):
+        """Stored representation of a column update; adds or promotes the column in manifest."""
+        spec = manifest['columns'].get(column)
+        if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype):
+            if spec is not None and spec['values'] is None:
+                raise TypeError(f"Column {column!r} is stored as {spec['dtype']}, not text")
+            table = spec['values'] if spec is not None else []
+            lookup = {value: code for code, value in enumerate(table)}
+            local_codes, uniques = pd.factorize(series.astype(object))
+            uniques = [str(value) for value in uniques]
+            for value in uniques:
+                if value not in lookup:
+                    lookup[value] = len(table)
+                    table.append(value)
+            codes = np.append(np.array([lookup[value] for value in uniques], dtype=np.int32), -1)
+            if spec is None:
+                manifest['columns'][column] = self._new_spec(manifest, np.int32, table)
+            return codes[local_codes]
+        
+        values = series.to_numpy()
+        if spec is None:
+            manifest['columns'][column] = self._new_spec(manifest, values.dtype, None)
+        elif spec['values'] is not None:
+            raise TypeError(f"Column {column!r} is stored as text, not {values.dtype}")
+        else:
+            dtype = np.promote_types(spec['dtype'], values.dtype)
+            if dtype != np.dtype(spec['dtype']):
+                manifest['columns'][column] = self._new_spec(manifest, dtype, None)
+        return values.astype(manifest['columns'][column]['dtype'], copy=False)
+    
+    @staticmethod
+    def _new_spec(manifest, dtype, values):
+        spec = {'file': f"column_{manifest['next_file']}.bin", 'dtype': np.dtype(dtype).str, 'values': values}
+        manifest['next_file'] += 1
+        return spec
+    
+    def _rollback(self):
+        """Undo an interrupted update: restore overwritten rows, drop appended rows and new files."""
+        with np.load(self._path(_UNDO_FILE)) as undo:
+            manifest = json.loads(str(undo['manifest']))
+            positions = undo['positions']
+            for i, column in enumerate(manifest['columns']):
+                if f'column_{i}' in undo.files and len(positions) > 0:
+                    stored = self._column(column, manifest, mode='r+')
+                    stored[positions] = undo[f'column_{i}']
+                    del stored
+        for spec in manifest['columns'].values():
+            with open(self._path(spec['file']), 'r+b') as f:
+                f.truncate(manifest['n_rows'] * np.dtype(spec['dtype']).itemsize)
+        if os.path.exists(self._path(_KEYS_FILE)):
+            with open(self._path(_KEYS_FILE), 'r+b') as f:
+                f.truncate(manifest['keys_bytes'])
+        with open(self._path(_MANIFEST_FILE + '.tmp'), 'w') as f:
+            json.dump(manifest, f)
+        os.replace(self._path(_MANIFEST_FILE + '.tmp'), self._path(_MANIFEST_FILE))
+        self._remove_unreferenced(manifest)
+        os.remove(self._path(_UNDO_FILE))
+    
+    def _remove_unreferenced(self, manifest):
+        """Delete column and order files the manifest no longer refers to (replaced or rolled back)."""
+        referenced = {spec['file'] for spec in manifest['columns'].values()} | {manifest['order_file']}
+        for name in os.listdir(self.store_dir):
+            if name.endswith('.bin') and name not in referenced:
+                os.remove(self._path(name))
+
+
+def _fill_value(spec):
+    """Value of a column in rows that were never written to it."""
+    if spec['values'] is not None:
+        return -1
+    kind = np.dtype(spec['dtype']).kind
+    if kind == 'f':
+        return np.nan
+    if kind in 'mM':
+        return np.datetime64('NaT')
+    return 0
@@ -2,12 +2,33 @@
 Data loading and preprocessing module for Hotels.com Churn Analysis
 """
 
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from config import DATA_FILE
+from config import (DATA_FILE, BOOKING_DTYPES, DATE_COLS, MEMORY_BUDGET_MB, CACHE_DIR,
+                    CUSTOMER_STATE_DIR)
+from code_sources import code_digest
+from customer_state import CustomerStateStore
+from profiling import sample_peak_memory
+from scheduler import CORES
 
+# Rough in-memory cost of a parsed CSV row relative to its size on disk
+PARSE_OVERHEAD = 8
 
-def load_data(filepath=DATA_FILE):
+# Bump when preprocess_data changes in a way its source hash would not capture
+PREPROCESS_VERSION = 2
+
+# Format of bk_date and cancel_date in the source file
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def load_data(filepath=DATA_FILE, streaming=False, memory_budget_mb=MEMORY_BUDGET_MB, chunksize=None):
     """
     Load the customer booking data from CSV file.
     
@@ -15,19 +36,129 @@ def load_data(filepath=DATA_FILE):
     -----------
     filepath : str
         Path to the CSV file
-        
+    streaming : bool
+        Read the file in bounded-size chunks using the typed schema
+        (config.BOOKING_DTYPES) instead of a single untyped read
+    memory_budget_mb : float
+        Peak RSS budget for streaming ingest: chunks are sized to a quarter
+        of it and filled into preallocated typed columns, so the peak is
+        the typed frame plus one parsed chunk; the measured peak is
+        reported against the budget
+    chunksize : int, optional
+        Rows per chunk; overrides the size derived from memory_budget_mb
+    
     Returns:
     --------
     pd.DataFrame
         Raw dataframe
     """
-    df = pd.read_csv(filepath)
+    if streaming:
+        df = _read_csv_streaming(filepath, memory_budget_mb, chunksize)
+    else:
+        df = pd.read_csv(filepath)
+    date_min, date_max = df['bk_date'].min(), df['bk_date'].max()
+    if streaming:
+        date_min, date_max = date_min.date(), date_max.date()
     print(f"✓ Data loaded: {df.shape[0]:,} rows × {df.shape[1]} columns")
-    print(f"  Date range: {df['bk_date'].min()} to {df['bk_date'].max()}")
+    print(f"  Date range: {date_min} to {date_max}")
     return df
 
 
-def preprocess_data(df):
+def _read_csv_streaming(filepath, memory_budget_mb, chunksize=None):
+    """
+    Read the CSV chunk by chunk with category, int8, float32 and date dtypes.
+    
+    The typed output columns are allocated up front from a row count and
+    filled one chunk at a time, so only a single parsed chunk is alive on
+    top of the result (categories are stored as codes until the end). The
+    memory the read adds is sampled while it runs and checked against the
+    budget.
+    """
+    if chunksize is None:
+        chunksize = _rows_per_chunk(filepath, memory_budget_mb)
+    n_rows = _count_rows(filepath)
+    
+    with sample_peak_memory() as memory:
+        columns, categories = {}, {}
+        filled = 0
+        for chunk in pd.read_csv(filepath, dtype=BOOKING_DTYPES, parse_dates=DATE_COLS, chunksize=chunksize):
+            if not columns:
+                for col in chunk.columns:
+                    if BOOKING_DTYPES.get(col) == 'category':
+                        columns[col] = np.full(n_rows, -1, dtype=np.int32)
+                        categories[col] = {}
+                    elif col in DATE_COLS:
+                        columns[col] = np.empty(n_rows, dtype='datetime64[ns]')
+                    else:
+                        columns[col] = np.empty(n_rows, dtype=BOOKING_DTYPES.get(col, chunk[col].dtype))
+            end = filled + len(chunk)
+            for col, values in chunk.items():
+                if col in categories:
+                    # Chunk codes -> codes of the categories seen so far (-1 stays missing)
+                    lookup = categories[col]
+                    chunk_codes = [lookup.setdefault(category, len(lookup))
+                                   for category in values.cat.categories]
+                    codes = np.array(chunk_codes + [-1], dtype=np.int32)
+                    columns[col][filled:end] = codes[values.cat.codes.to_numpy()]
+                elif col in DATE_COLS:
+                    columns[col][filled:end] = pd.to_datetime(values).to_numpy(dtype='datetime64[ns]')
+                else:
+                    columns[col][filled:end] = values.to_numpy()
+            filled = end
+            del chunk
+        
+        df = pd.DataFrame({col: (_sorted_categorical(values[:filled], categories[col]) if col in categories
+                                 else values[:filled])
+                           for col, values in columns.items()}, copy=False)
+        del columns
+    
+    _print_peak_memory(f"Streaming ingest: {chunksize:,} rows/chunk", memory, memory_budget_mb)
+    return df
+
+
+def _print_peak_memory(label, memory, memory_budget_mb):
+    """Print the peak RSS growth measured by sample_peak_memory against a memory budget."""
+    start_mb, peak_mb = memory['start_mb'], memory['peak_mb']
+    if peak_mb is None:
+        return
+    # Without RSS sampling only the process-wide high-water mark is known
+    used_mb = peak_mb - start_mb if start_mb is not None else peak_mb
+    status = "within" if used_mb <= memory_budget_mb else "OVER"
+    growth = f"+{used_mb:,.0f} MB" if start_mb is not None else f"{peak_mb:,.0f} MB (process)"
+    print(f"  {label}, peak RSS {growth} ({status} {memory_budget_mb:,.0f} MB budget)")
+
+
+def _count_rows(filepath, block_size=1 << 20):
+    """Upper bound on the data rows of a CSV: its line count minus the header."""
+    n_lines, last = 0, b'\n'
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            n_lines += block.count(b'\n')
+            last = block[-1:]
+    return max(0, n_lines + (last != b'\n') - 1)
+
+
+def _sorted_categorical(codes, lookup):
+    """Categorical from codes into lookup's categories, with the categories sorted (codes remapped in place)."""
+    categories = np.array(list(lookup), dtype=object)
+    order = np.argsort(categories)
+    rank = np.empty(len(order), dtype=np.int32)
+    rank[order] = np.arange(len(order), dtype=np.int32)
+    present = codes >= 0
+    codes[present] = rank[codes[present]]
+    return pd.Categorical.from_codes(codes, categories=categories[order])
+
+
+def _rows_per_chunk(filepath, memory_budget_mb, sample_lines=1000):
+    """Estimate how many CSV rows can be parsed at once within a quarter of the budget."""
+    with open(filepath, 'rb') as f:
+        f.readline()  # header
+        sample = [len(line) for _, line in zip(range(sample_lines), f)]
+    bytes_per_row = (sum(sample) / max(len(sample), 1)) * PARSE_OVERHEAD
+    return max(10_000, int(memory_budget_mb * 1024 ** 2 * 0.25 / max(bytes_per_row, 1)))
+
+
+def preprocess_data(df, verbose=True, inplace=False):
     """
     Preprocess the booking data with feature engineering.
     
@@ -35,20 +166,24 @@ def preprocess_data(df):
     -----------
     df : pd.DataFrame
         Raw dataframe
-        
+    verbose : bool
+        Whether to print a summary line
+    inplace : bool
+        Add the derived features to df itself instead of to a copy
+    
     Returns:
     --------
     pd.DataFrame
         Preprocessed dataframe with derived features
     """
-    df_processed = df.copy()
-    
-    # Convert date columns to datetime
-    df_processed['bk_date'] = pd.to_datetime(df_processed['bk_date'])
-    df_processed['cancel_date'] = pd.to_datetime(df_processed['cancel_date'], errors='coerce')
+    df_processed = df if inplace else df.copy()
     
-    # Handle cancel_date - replace 'NA' with NaT
-    df_processed.loc[df_processed['cancel_date'].isna(), 'cancel_date'] = pd.NaT
+    # Convert date columns to datetime, parsing each distinct date string once
+    # (unparseable cancel dates, e.g. 'NA', become NaT)
+    bk_codes, bk_dates = factorize_dates(df_processed['bk_date'])
+    cancel_codes, cancel_dates = factorize_dates(df_processed['cancel_date'], errors='coerce')
+    df_processed['bk_date'] = _take_unique(bk_dates, bk_codes, df_processed.index)
+    df_processed['cancel_date'] = _take_unique(cancel_dates, cancel_codes, df_processed.index)
     
     # Convert loyalty_tier to integer
     df_processed['loyalty_tier'] = df_processed['loyalty_tier'].astype(int)
@@ -57,53 +192,467 @@ def preprocess_data(df):
     # 1. Days until cancellation (if cancelled)
     df_processed['days_to_cancel'] = (df_processed['cancel_date'] - df_processed['bk_date']).dt.days
     
-    # 2. Booking month and day of week
-    df_processed['booking_month'] = df_processed['bk_date'].dt.month
-    df_processed['booking_dayofweek'] = df_processed['bk_date'].dt.dayofweek
+    # 2. Booking month and day of week (derived from the distinct dates)
+    df_processed['booking_month'] = _take_unique(bk_dates.month, bk_codes, df_processed.index)
+    df_processed['booking_dayofweek'] = _take_unique(bk_dates.dayofweek, bk_codes, df_processed.index)
     
     # 3. Pages per minute engagement ratio
-    df_processed['pages_per_minute'] = np.where(
-        df_processed['total_visit_minutes'] > 0,
-        df_processed['total_visit_pages'] / df_processed['total_visit_minutes'],
-        0
-    )
+    df_processed['pages_per_minute'] = _safe_ratio(
+        df_processed['total_visit_pages'], df_processed['total_visit_minutes'])
     
     # 4. Property page ratio
-    df_processed['property_page_ratio'] = np.where(
-        df_processed['total_visit_pages'] > 0,
-        df_processed['property_pages_count'] / df_processed['total_visit_pages'],
-        0
-    )
+    df_processed['property_page_ratio'] = _safe_ratio(
+        df_processed['property_pages_count'], df_processed['total_visit_pages'])
     
     # 5. Search efficiency
-    df_processed['search_efficiency'] = np.where(
-        df_processed['total_visit_minutes'] > 0,
-        df_processed['searched_destinations_count'] / df_processed['total_visit_minutes'],
-        0
-    )
+    df_processed['search_efficiency'] = _safe_ratio(
+        df_processed['searched_destinations_count'], df_processed['total_visit_minutes'])
     
     # Replace empty marketing_channel with 'Unknown'
     df_processed['marketing_channel'] = df_processed['marketing_channel'].replace('', 'Unknown')
     
-    print(f"✓ Data preprocessed: {df_processed.shape[0]:,} rows × {df_processed.shape[1]} columns")
+    if verbose:
+        print(f"✓ Data preprocessed: {df_processed.shape[0]:,} rows × {df_processed.shape[1]} columns")
     return df_processed
 
 
-def aggregate_to_customer_level(df_processed):
+def _safe_ratio(numerator, denominator):
+    """
+    numerator / denominator where denominator > 0, else 0.
+    
+    Written straight into one preallocated float64 buffer, so no full-length
+    quotient or np.where temporaries are created.
+    """
+    denominator = denominator.to_numpy()
+    out = np.zeros(len(denominator), dtype=np.float64)
+    np.divide(numerator.to_numpy(), denominator, out=out, where=denominator > 0)
+    return out
+
+
+def factorize_dates(values, errors='raise', date_format=DATE_FORMAT):
+    """
+    Parse a date column once per distinct value.
+    
+    Distinct strings are parsed with a fixed format; if any of them does not
+    match it, they are re-parsed with pandas' format inference, as
+    pd.to_datetime(values, errors=errors) would do.
+    
+    Parameters:
+    -----------
+    values : pd.Series
+        Date strings (or already parsed datetimes)
+    errors : str
+        'raise' or 'coerce', as for pd.to_datetime
+    date_format : str
+        Expected strptime format
+    
+    Returns:
+    --------
+    tuple
+        codes (row -> position in the unique table, -1 for missing),
+        pd.DatetimeIndex of the distinct dates
+    """
+    codes, uniques = pd.factorize(values)
+    if pd.api.types.is_datetime64_any_dtype(uniques):
+        return codes, pd.DatetimeIndex(uniques)
+    
+    dates = pd.to_datetime(uniques, format=date_format, errors='coerce')
+    if dates.isna().any():
+        dates = pd.to_datetime(uniques, errors=errors)
+    return codes, pd.DatetimeIndex(dates)
+
+
+def _take_unique(table, codes, index):
+    """Broadcast per-distinct-value results back to the rows (-1 codes become missing)."""
+    return pd.Series(table).reindex(codes).set_axis(index)
+
+
+def load_preprocessed_data(filepath=DATA_FILE, cache_dir=CACHE_DIR, use_cache=True, streaming=False,
+                           return_raw=False, **load_kwargs):
+    """
+    Load and preprocess the booking data, reusing an on-disk columnar cache.
+    
+    The cache is keyed by a hash of the source file and of the loading and
+    preprocessing code, including the helpers and config settings it uses,
+    so it is rebuilt automatically when any of them changes. Cached columns
+    are stored as .npy files and memory-mapped on load.
+    
+    Parameters:
+    -----------
+    filepath : str
+        Path to the CSV file
+    cache_dir : str
+        Directory holding the cache
+    use_cache : bool
+        Whether to read from and write to the cache
+    streaming : bool
+        Passed to load_data (changes dtypes, so it is part of the cache key)
+    return_raw : bool
+        Also return the raw frame as loaded by load_data (cached as a
+        separate entry, so preprocessing can still work in place)
+    **load_kwargs
+        Further keyword arguments passed to load_data
+    
+    Returns:
+    --------
+    pd.DataFrame or tuple
+        Preprocessed dataframe, or (raw dataframe, preprocessed dataframe)
+        with return_raw
+    """
+    # Entries are named <file>.<variant>.<key>; a new entry only replaces those of its own variant
+    variant = 'streaming' if streaming else 'eager'
+    fingerprint = file_fingerprint(filepath)
+    cache_path = os.path.join(cache_dir, f"{os.path.basename(filepath)}.{variant}."
+                                         f"{_cache_key(fingerprint, streaming, [load_data, preprocess_data])}")
+    raw_path = os.path.join(cache_dir, f"{os.path.basename(filepath)}.raw-{variant}."
+                                       f"{_cache_key(fingerprint, streaming, [load_data])}")
+    
+    if (use_cache and os.path.exists(os.path.join(cache_path, 'meta.json'))
+            and (not return_raw or os.path.exists(os.path.join(raw_path, 'meta.json')))):
+        df_processed = _read_column_cache(cache_path)
+        print(f"✓ Preprocessed data loaded from cache: {df_processed.shape[0]:,} rows × "
+              f"{df_processed.shape[1]} columns")
+        return (_read_column_cache(raw_path), df_processed) if return_raw else df_processed
+    
+    df = load_data(filepath, streaming=streaming, **load_kwargs)
+    if return_raw:
+        if use_cache:
+            # The raw frame is kept as a memory-mapped copy of its cache entry
+            _write_column_cache(df, raw_path)
+            df_raw = _read_column_cache(raw_path)
+        else:
+            df_raw = df.copy()
+    df_processed = preprocess_data(df, inplace=True)
+    
+    if use_cache:
+        _write_column_cache(df_processed, cache_path)
+        print(f"✓ Preprocessed data cached to {cache_path}")
+    return (df_raw, df_processed) if return_raw else df_processed
+
+
+def file_fingerprint(filepath, block_size=1 << 20):
+    """Return a content hash of a file (remembered while its size and modification time are unchanged)."""
+    stat = os.stat(filepath)
+    memo_key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _FILE_FINGERPRINTS:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        _FILE_FINGERPRINTS[memo_key] = digest.hexdigest()
+    return _FILE_FINGERPRINTS[memo_key]
+
+
+# (path, size, mtime) -> content hash, so the stage and column cache keys hash a file once
+_FILE_FINGERPRINTS = {}
+
+
+def data_fingerprint(df, cols=None):
+    """
+    Return a content hash of dataframe columns (values, dtypes and names).
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe to fingerprint
+    cols : list, optional
+        Columns to include (all columns by default)
+    
+    Returns:
+    --------
+    str
+        Hex digest
+    """
+    cols = list(df.columns) if cols is None else list(cols)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(col, str(df[col].dtype)) for col in cols]).encode())
+    for col in cols:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values.dtype) and isinstance(values.dtype, np.dtype):
+            digest.update(np.ascontiguousarray(values.to_numpy()))
+        else:
+            digest.update(pd.util.hash_pandas_object(values, index=False).to_numpy())
+    return digest.hexdigest()
+
+
+def _cache_key(fingerprint, streaming, funcs):
+    """
+    Combine the source file hash with the code version and the source of funcs
+    and of the helpers and config settings they use (see code_sources.code_digest).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(fingerprint.encode())
+    digest.update(f"v{PREPROCESS_VERSION}|streaming={streaming}".encode())
+    digest.update(code_digest(funcs).encode())
+    return digest.hexdigest()
+
+
+def _write_column_cache(df, cache_path):
+    """Write one .npy file per column; strings are stored as codes plus categories."""
+    tmp_path = cache_path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    
+    meta = {'columns': [], 'kinds': {}}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object:
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                kind = 'category'
+                codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                kind = 'object'
+                codes, categories = pd.factorize(series)
+            np.save(os.path.join(tmp_path, f'{i}.npy'), codes)
+            np.save(os.path.join(tmp_path, f'{i}.categories.npy'),
+                    np.asarray(categories, dtype=object), allow_pickle=True)
+        else:
+            kind = 'array'
+            np.save(os.path.join(tmp_path, f'{i}.npy'), series.to_numpy())
+        meta['columns'].append(col)
+        meta['kinds'][col] = kind
+    
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    
+    # Drop stale entries for the same source file and variant, then publish atomically
+    prefix = os.path.basename(cache_path).rsplit('.', 1)[0] + '.'
+    parent = os.path.dirname(cache_path)
+    for entry in os.listdir(parent):
+        if entry.startswith(prefix) and not entry.endswith('.tmp'):
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+    os.replace(tmp_path, cache_path)
+
+
+def _read_column_cache(cache_path):
+    """Rebuild the dataframe from memory-mapped (copy-on-write) column files."""
+    with open(os.path.join(cache_path, 'meta.json')) as f:
+        meta = json.load(f)
+    
+    columns = {}
+    for i, col in enumerate(meta['columns']):
+        # np.asarray gives a plain ndarray view onto the mapped file
+        values = np.asarray(np.load(os.path.join(cache_path, f'{i}.npy'), mmap_mode='c'))
+        kind = meta['kinds'][col]
+        if kind == 'array':
+            columns[col] = values
+            continue
+        categories = np.load(os.path.join(cache_path, f'{i}.categories.npy'), allow_pickle=True)
+        categorical = pd.Categorical.from_codes(values, categories=categories)
+        columns[col] = categorical if kind == 'category' else np.asarray(categorical, dtype=object)
+    
+    return pd.DataFrame(columns, copy=False)
+
+
+def encode_customer_keys(df):
+    """
+    Replace email_address with a dense integer customer_key, in place.
+    
+    Keys follow the sorted order of the email addresses, so grouping by
+    customer_key gives the same customer order as grouping by email.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Booking-level dataframe with an email_address column
+    
+    Returns:
+    --------
+    pd.Index
+        Mapping table: customer_index[key] is the customer's email address
+    """
+    keys, customer_index = pd.factorize(df['email_address'], sort=True)
+    key_dtype = np.int32 if len(customer_index) < np.iinfo(np.int32).max else np.int64
+    df.insert(df.columns.get_loc('email_address'), 'customer_key', keys.astype(key_dtype))
+    del df['email_address']
+    
+    print(f"✓ Customer keys encoded: {len(customer_index):,} customers ({np.dtype(key_dtype).name})")
+    return pd.Index(customer_index, name='email_address')
+
+
+def decode_customer_keys(df, customer_index):
+    """
+    Return a copy of df with email_address translated back from customer_key.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe with a customer_key column
+    customer_index : pd.Index
+        Mapping table from encode_customer_keys
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Dataframe with email_address in place of customer_key
+    """
+    df = df.copy()
+    df.insert(df.columns.get_loc('customer_key'), 'email_address',
+              customer_index.take(df['customer_key'].to_numpy()))
+    return df.drop(columns='customer_key')
+
+
+def customer_id_column(df):
+    """Return the customer identifier column: customer_key if encoded, else email_address."""
+    return 'customer_key' if 'customer_key' in df.columns else 'email_address'
+
+
+# Booking columns read by the customer-level aggregation (besides the identifier)
+AGGREGATION_INPUT_COLS = [
+    'booking_id', 'churn_flag', 'coupon_flag', 'pay_now_flag', 'cancel_flag', 'loyalty_tier',
+    'platform', 'marketing_channel', 'customer_type', 'total_visit_minutes', 'total_visit_pages',
+    'search_pages_count', 'property_pages_count', 'bounce_visits_count',
+    'searched_destinations_count', 'hotel_star_rating', 'pages_per_minute', 'property_page_ratio',
+    'bk_date'
+]
+
+
+def aggregate_to_customer_level(df_processed, n_jobs=1):
     """
     Aggregate booking-level data to customer level.
     
     Parameters:
     -----------
     df_processed : pd.DataFrame
-        Preprocessed booking-level dataframe
-        
+        Preprocessed booking-level dataframe, keyed by customer_key
+        (see encode_customer_keys) or email_address
+    n_jobs : int
+        Number of worker processes; bookings are hash-partitioned by customer
+        and each partition is aggregated separately (-1 uses all free cores
+        of the shared budget, see scheduler.CORES)
+    
     Returns:
     --------
     pd.DataFrame
         Customer-level aggregated dataframe
     """
-    customer_df = df_processed.groupby('email_address').agg({
+    if n_jobs != 1:
+        with CORES.reserve(n_jobs) as n_workers:
+            customer_df = (_aggregate_partitioned(df_processed, n_workers) if n_workers > 1
+                           else _aggregate_customers(df_processed))
+    else:
+        customer_df = _aggregate_customers(df_processed)
+    
+    _print_customer_summary(customer_df)
+    return customer_df
+
+
+def _aggregate_partitioned(df_processed, n_jobs):
+    """
+    Aggregate hash partitions of the bookings in a process pool.
+    
+    The rows of each partition are written as their own column cache (see
+    _write_column_cache), in booking order, and handed to a worker as soon
+    as they are written; a worker memory-maps only its partition, so its
+    work is proportional to the partition, and only the (much smaller)
+    customer-level results are pickled back.
+    """
+    id_col = customer_id_column(df_processed)
+    ids = df_processed[id_col]
+    if id_col == 'customer_key':
+        buckets = ids.to_numpy() % n_jobs
+    else:
+        buckets = pd.util.hash_array(ids.to_numpy()) % np.uint64(n_jobs)
+    # Stable, so every partition keeps the booking order ('last' values depend on it)
+    order = np.argsort(buckets, kind='stable')
+    bounds = np.searchsorted(buckets[order], np.arange(n_jobs + 1))
+    col_positions = df_processed.columns.get_indexer([id_col] + AGGREGATION_INPUT_COLS)
+    
+    # Spawned rather than forked, as in models.train_models: this can run in a stage thread
+    with tempfile.TemporaryDirectory(prefix='aggregate_') as tmp_dir, \
+            ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = []
+        for bucket in range(n_jobs):
+            part_path = os.path.join(tmp_dir, f'part_{bucket}')
+            rows = order[bounds[bucket]:bounds[bucket + 1]]
+            _write_column_cache(df_processed.iloc[rows, col_positions], part_path)
+            futures.append(pool.submit(_aggregate_partition, part_path))
+        parts = [future.result() for future in futures]
+    
+    customer_df = pd.concat(parts, ignore_index=True)
+    return customer_df.sort_values(id_col, ignore_index=True)
+
+
+def _aggregate_partition(part_path):
+    """Worker: aggregate the bookings of one partition from its memory-mapped columns."""
+    return _aggregate_customers(_read_column_cache(part_path))
+
+
+def aggregate_out_of_core(filepath=DATA_FILE, memory_budget_mb=MEMORY_BUDGET_MB, scratch_dir=None,
+                          n_partitions=None):
+    """
+    Aggregate a booking file larger than memory to customer level.
+    
+    The CSV is streamed in chunks, each chunk is preprocessed and its rows
+    are spilled to one of n_partitions partitions by a hash of
+    email_address, as a column cache per chunk (the format of the
+    preprocessed-data cache). Each partition then holds complete customers
+    and is aggregated on its own from its memory-mapped chunks, so only one
+    chunk or one partition is resident at a time (plus the customer-level
+    result). The memory this adds is sampled and checked against the
+    budget.
+    
+    Parameters:
+    -----------
+    filepath : str
+        Path to the CSV file
+    memory_budget_mb : float
+        Memory budget used to size the chunks and the partitions
+    scratch_dir : str, optional
+        Directory for the partition files (a temporary directory by default)
+    n_partitions : int, optional
+        Number of partitions; derived from the file size and budget if omitted
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Customer-level aggregated dataframe, as from
+        aggregate_to_customer_level(preprocess_data(load_data(filepath)))
+    """
+    chunksize = _rows_per_chunk(filepath, memory_budget_mb)
+    if n_partitions is None:
+        # Keep each partition to about a quarter of the budget once parsed
+        file_bytes = os.path.getsize(filepath) * PARSE_OVERHEAD
+        n_partitions = max(1, int(np.ceil(file_bytes / (memory_budget_mb * 1024 ** 2 * 0.25))))
+    
+    with sample_peak_memory() as memory, \
+            tempfile.TemporaryDirectory(prefix='spill_', dir=scratch_dir) as spill_dir:
+        part_dirs = [os.path.join(spill_dir, f'part_{i:04d}') for i in range(n_partitions)]
+        cols = ['email_address'] + AGGREGATION_INPUT_COLS
+        
+        # Pass 1: stream, preprocess and spill rows by customer hash, one column cache per chunk
+        n_rows = 0
+        reader = pd.read_csv(filepath, dtype=BOOKING_DTYPES, parse_dates=DATE_COLS, chunksize=chunksize)
+        for i, chunk in enumerate(reader):
+            chunk = preprocess_data(chunk, verbose=False)[cols]
+            buckets = pd.util.hash_array(chunk['email_address'].to_numpy()) % np.uint64(n_partitions)
+            for bucket, part in chunk.groupby(buckets, sort=False):
+                os.makedirs(part_dirs[bucket], exist_ok=True)
+                _write_column_cache(part, os.path.join(part_dirs[bucket], f'chunk_{i:05d}.cols'))
+            n_rows += len(chunk)
+        print(f"✓ Spilled {n_rows:,} bookings to {n_partitions} partitions ({chunksize:,} rows/chunk)")
+        
+        # Pass 2: aggregate one partition at a time from its memory-mapped chunks
+        parts = []
+        for part_dir in part_dirs:
+            if os.path.isdir(part_dir):
+                chunks = [_read_column_cache(os.path.join(part_dir, name))
+                          for name in sorted(os.listdir(part_dir))]
+                parts.append(_aggregate_customers(pd.concat(chunks, ignore_index=True)))
+                del chunks
+        
+        customer_df = pd.concat(parts, ignore_index=True).sort_values('email_address', ignore_index=True)
+    
+    _print_peak_memory("Out-of-core aggregation", memory, memory_budget_mb)
+    _print_customer_summary(customer_df)
+    return customer_df
+
+
+def _aggregate_customers(df_processed):
+    """Aggregate bookings to one row per customer, sorted by customer."""
+    id_col = customer_id_column(df_processed)
+    grouped = df_processed.groupby(id_col)
+    customer_df = grouped.agg({
         # Booking behaviour
         'booking_id': 'count',
         'churn_flag': 'max',
@@ -116,12 +665,6 @@ def aggregate_to_customer_level(df_processed):
         # Loyalty
         'loyalty_tier': 'max',
         
-        # Platform preference
-        'platform': lambda x: x.mode().iloc[0] if len(x.mode()) > 0 else 'Unknown',
-        
-        # Marketing channel
-        'marketing_channel': lambda x: x.mode().iloc[0] if len(x.mode()) > 0 else 'Unknown',
-        
         # Customer type
         'customer_type': 'last',
         
@@ -159,8 +702,6 @@ def aggregate_to_customer_level(df_processed):
         'cancel_flag_sum': 'cancelled_bookings',
         'cancel_flag_mean': 'cancellation_rate',
         'loyalty_tier_max': 'max_loyalty_tier',
-        'platform_<lambda>': 'primary_platform',
-        'marketing_channel_<lambda>': 'primary_channel',
         'customer_type_last': 'customer_type',
         'total_visit_minutes_mean': 'avg_visit_minutes',
         'total_visit_pages_mean': 'avg_visit_pages',
@@ -175,11 +716,297 @@ def aggregate_to_customer_level(df_processed):
         'bk_date_max': 'last_booking'
     })
     
+    # Platform and marketing channel preference (most frequent value per customer)
+    group_codes, _ = pd.factorize(df_processed[id_col], sort=True)
+    loc = customer_df.columns.get_loc('max_loyalty_tier') + 1
+    customer_df.insert(loc, 'primary_platform',
+                       _grouped_mode(group_codes, grouped.ngroups, df_processed['platform']))
+    customer_df.insert(loc + 1, 'primary_channel',
+                       _grouped_mode(group_codes, grouped.ngroups, df_processed['marketing_channel']))
+    
+    # Plain values regardless of input dtype (typed ingest reads customer_type as category)
+    customer_df['customer_type'] = customer_df['customer_type'].astype(object)
+    
     # Calculate customer tenure
     customer_df['tenure_days'] = (customer_df['last_booking'] - customer_df['first_booking']).dt.days
     
+    return customer_df
+
+
+def _print_customer_summary(customer_df):
+    """Print the customer count and customer-level churn rate."""
     print(f"✓ Customer-level aggregation: {len(customer_df):,} unique customers")
     print(f"  Churn rate at customer level: {customer_df['churned'].mean()*100:.2f}%")
+
+
+def _grouped_mode(group_codes, n_groups, values, fill_value='Unknown'):
+    """
+    Most frequent non-null value per group, computed on integer codes.
+    
+    Counts every (group, value) pair with a single bincount. Ties resolve to
+    the smallest value, matching Series.mode().iloc[0]; groups with no
+    non-null values get fill_value.
+    
+    Parameters:
+    -----------
+    group_codes : np.ndarray
+        Group index (0..n_groups-1) of each row, -1 for rows to ignore
+    n_groups : int
+        Number of groups
+    values : pd.Series
+        Values to take the mode of
+    
+    Returns:
+    --------
+    np.ndarray
+        Mode per group (object dtype)
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        value_codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        value_codes, uniques = pd.factorize(values, sort=True)
+    
+    n_values = len(uniques)
+    if n_values == 0:
+        return _mode_from_counts(np.zeros((n_groups, 0), dtype=np.int64), uniques, fill_value)
+    
+    valid = (group_codes >= 0) & (value_codes >= 0)
+    pair_codes = group_codes[valid].astype(np.int64) * n_values + value_codes[valid]
+    counts = np.bincount(pair_codes, minlength=n_groups * n_values).reshape(n_groups, n_values)
+    return _mode_from_counts(counts, uniques, fill_value)
+
+
+def _mode_from_counts(counts, uniques, fill_value='Unknown'):
+    """Pick the most frequent value per row of a (groups × sorted values) count matrix."""
+    if len(uniques) == 0:
+        return np.full(counts.shape[0], fill_value, dtype=object)
+    # argmax returns the first (smallest) value among equally frequent ones
+    modes = np.asarray(uniques, dtype=object)[counts.argmax(axis=1)]
+    modes[counts.sum(axis=1) == 0] = fill_value
+    return modes
+
+
+# Mergeable per-customer state used by incremental aggregation:
+# flag columns -> (count output, rate output), kept as sum and non-null count
+_STATE_RATE_COLS = {
+    'coupon_flag': ('coupon_bookings', 'coupon_rate'),
+    'pay_now_flag': ('pay_now_bookings', 'pay_now_rate'),
+    'cancel_flag': ('cancelled_bookings', 'cancellation_rate'),
+}
+# engagement columns -> mean output, kept as sum and non-null count
+_STATE_MEAN_COLS = {
+    'total_visit_minutes': 'avg_visit_minutes',
+    'total_visit_pages': 'avg_visit_pages',
+    'search_pages_count': 'avg_search_pages',
+    'property_pages_count': 'avg_property_pages',
+    'bounce_visits_count': 'avg_bounce_visits',
+    'searched_destinations_count': 'avg_destinations_searched',
+    'hotel_star_rating': 'avg_star_rating',
+    'pages_per_minute': 'avg_pages_per_minute',
+    'property_page_ratio': 'avg_property_ratio',
+}
+# mode columns -> output, kept as one count column per value ('platform=App', ...)
+_STATE_MODE_COLS = {'platform': 'primary_platform', 'marketing_channel': 'primary_channel'}
+
+
+def aggregate_incremental(df_new, state_dir=CUSTOMER_STATE_DIR, customer_index=None):
+    """
+    Aggregate to customer level by folding new bookings into a stored state.
+    
+    The per-customer state (counts, sums, value counts and min/max dates) and
+    the finalized customer rows are kept in a CustomerStateStore together
+    with a watermark, the latest bk_date already folded in. Only rows of
+    df_new with bk_date after the watermark are aggregated, and only the
+    customers they touch are read back, merged, finalized and written, so a
+    daily update costs time proportional to the new bookings. Bookings are
+    assumed to arrive in whole days and in file order.
+    
+    Parameters:
+    -----------
+    df_new : pd.DataFrame
+        Preprocessed bookings; either the new rows only or the full history
+    state_dir : str
+        Directory of the customer state store
+    customer_index : pd.Index, optional
+        Mapping table from encode_customer_keys, required when df_new is
+        keyed by customer_key. The stored state is always keyed by email
+        address, because customer keys are not stable between loads
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Customer-level dataframe keyed by email_address, identical to
+        aggregate_to_customer_level on the full history (up to floating-point
+        rounding of the running sums)
+    """
+    store = CustomerStateStore(state_dir)
+    meta = store.meta
+    watermark = pd.Timestamp(meta['watermark']) if meta is not None else None
+    
+    delta = df_new if watermark is None else df_new[df_new['bk_date'] > watermark]
+    print(f"✓ Incremental aggregation: folding {len(delta):,} new bookings"
+          + (f" after {watermark.date()}" if watermark is not None else ""))
+    
+    if len(delta) > 0:
+        delta_state = build_customer_state(delta, customer_index)
+        known = delta_state.index.isin(store.keys)
+        state = delta_state
+        if meta is not None:
+            state = merge_customer_state(store.read(delta_state.index[known], meta['state_columns']),
+                                         delta_state)
+        customers = finalize_customer_state(state).set_index('email_address')
+        watermark = delta['bk_date'].max() if watermark is None else max(watermark, delta['bk_date'].max())
+        
+        store.update(state.join(customers),
+                     meta={'watermark': watermark.isoformat(), 'state_columns': list(state.columns),
+                           'customer_columns': list(customers.columns)})
+        meta = store.meta
+        print(f"✓ Customer state: {int(known.sum()):,} customers updated, {int((~known).sum()):,} added")
+    elif meta is None:
+        raise ValueError("No bookings to aggregate and no stored customer state")
+    
+    customer_df = store.read(columns=meta['customer_columns'], sort=True)
+    customer_df = customer_df.rename_axis('email_address').reset_index()
+    _print_customer_summary(customer_df)
+    return customer_df
+
+
+def build_customer_state(df_processed, customer_index=None):
+    """
+    Reduce preprocessed bookings to a mergeable per-customer state.
+    
+    Parameters:
+    -----------
+    df_processed : pd.DataFrame
+        Preprocessed booking-level dataframe
+    customer_index : pd.Index, optional
+        Mapping table used to label customer_key groups with their email
+    
+    Returns:
+    --------
+    pd.DataFrame
+        State indexed by email_address
+    """
+    agg = {
+        'booking_id': ['count'],
+        'churn_flag': ['max'],
+        'loyalty_tier': ['max'],
+        'customer_type': ['last'],
+        'bk_date': ['min', 'max'],
+    }
+    for col in list(_STATE_RATE_COLS) + list(_STATE_MEAN_COLS):
+        agg[col] = ['sum', 'count']
+    
+    id_col = customer_id_column(df_processed)
+    state = df_processed.groupby(id_col).agg(agg)
+    state.columns = ['_'.join(col) for col in state.columns]
+    state['customer_type_last'] = state['customer_type_last'].astype(object)
+    
+    for col in _STATE_MODE_COLS:
+        counts = df_processed.groupby([id_col, col], observed=True).size().unstack(fill_value=0)
+        counts.columns = [f'{col}={value}' for value in counts.columns]
+        state = state.join(counts)
+        state[counts.columns] = state[counts.columns].fillna(0).astype(np.int64)
+    
+    if id_col == 'customer_key':
+        if customer_index is None:
+            raise ValueError("customer_index is required for data keyed by customer_key")
+        state.index = customer_index.take(state.index.to_numpy())
+    return state
+
+
+def merge_customer_state(state, delta):
+    """
+    Fold a delta state into a stored state.
+    
+    Only customers present in the delta are touched; new customers are
+    appended. Both states must come from build_customer_state.
+    
+    Parameters:
+    -----------
+    state : pd.DataFrame
+        Stored customer state
+    delta : pd.DataFrame
+        State built from the new bookings
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Merged customer state
+    """
+    # Value-count columns for values not seen before start at zero
+    for col in delta.columns.difference(state.columns):
+        state[col] = 0
+    delta = delta.reindex(columns=state.columns)
+    count_cols = [col for col in state.columns if _state_op(col) == 'sum' and '=' in col]
+    delta[count_cols] = delta[count_cols].fillna(0).astype(np.int64)
+    
+    seen = delta.index.isin(state.index)
+    old, new = state.loc[delta.index[seen]], delta[seen]
+    
+    merged = {}
+    for col in state.columns:
+        op = _state_op(col)
+        if op == 'sum':
+            merged[col] = old[col] + new[col]
+        elif op == 'max':
+            merged[col] = pd.concat([old[col], new[col]], axis=1).max(axis=1)
+        elif op == 'min':
+            merged[col] = pd.concat([old[col], new[col]], axis=1).min(axis=1)
+        else:  # last non-null value wins
+            merged[col] = new[col].where(new[col].notna(), old[col])
+    state.loc[new.index, list(merged)] = pd.DataFrame(merged)
+    
+    return pd.concat([state, delta[~seen]])
+
+
+def _state_op(col):
+    """How a state column combines across deltas."""
+    if '=' in col or col.endswith('_sum') or col.endswith('_count'):
+        return 'sum'
+    return col.rsplit('_', 1)[1]
+
+
+def finalize_customer_state(state):
+    """
+    Turn a customer state into the customer-level dataframe.
+    
+    Parameters:
+    -----------
+    state : pd.DataFrame
+        Customer state from build_customer_state / merge_customer_state
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Customer-level dataframe with the columns of aggregate_to_customer_level
+    """
+    state = state.sort_index()
+    
+    def ratio(col):
+        num, den = state[f'{col}_sum'].to_numpy(dtype=float), state[f'{col}_count'].to_numpy()
+        return np.divide(num, den, out=np.full(len(state), np.nan), where=den > 0)
+    
+    customer_df = pd.DataFrame({'email_address': state.index.to_numpy()})
+    customer_df['total_bookings'] = state['booking_id_count'].to_numpy()
+    customer_df['churned'] = state['churn_flag_max'].to_numpy()
+    for col, (sum_name, rate_name) in _STATE_RATE_COLS.items():
+        customer_df[sum_name] = state[f'{col}_sum'].to_numpy()
+        customer_df[rate_name] = ratio(col)
+    customer_df['max_loyalty_tier'] = state['loyalty_tier_max'].to_numpy()
+    
+    for col, name in _STATE_MODE_COLS.items():
+        prefix = f'{col}='
+        values = sorted(c[len(prefix):] for c in state.columns if c.startswith(prefix))
+        counts = state[[prefix + value for value in values]].to_numpy()
+        customer_df[name] = _mode_from_counts(counts, values)
+    
+    customer_df['customer_type'] = state['customer_type_last'].to_numpy()
+    for col, name in _STATE_MEAN_COLS.items():
+        customer_df[name] = ratio(col)
+    customer_df['first_booking'] = state['bk_date_min'].to_numpy()
+    customer_df['last_booking'] = state['bk_date_max'].to_numpy()
+    customer_df['tenure_days'] = (customer_df['last_booking'] - customer_df['first_booking']).dt.days
     
     return customer_df
 
@@ -0,0 +1,102 @@
+"""
+Figure cache for Hotels.com Churn Analysis
+Content-addressed store of rendered charts with LRU eviction by disk size
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+
+_ENTRY_FILE = 'entry.pkl'
+
+
+class FigureCache:
+    """
+    Rendered figures stored on disk under a content key.
+    
+    Each entry is a directory holding the image files of one chart plus a
+    pickled payload (e.g. the chart function's printed output and return
+    value). Entries are evicted least recently used first once the cache
+    exceeds its size budget; a hit refreshes the entry's modification time.
+    
+    Parameters:
+    -----------
+    cache_dir : str
+        Directory for the entries
+    max_mb : float
+        Total size budget in MB
+    """
+    
+    def __init__(self, cache_dir, max_mb):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 ** 2
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.evict()
+    
+    def get(self, key):
+        """
+        Look up an entry.
+        
+        Returns:
+        --------
+        tuple or None
+            (image paths, payload) on a hit, None on a miss
+        """
+        path = os.path.join(self.cache_dir, key)
+        try:
+            with open(os.path.join(path, _ENTRY_FILE), 'rb') as f:
+                files, payload = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [os.path.join(path, name) for name in files], payload
+    
+    def put(self, key, paths, payload):
+        """Store copies of the image files at paths with payload under key."""
+        tmp_path = tempfile.mkdtemp(prefix='.tmp-', dir=self.cache_dir)
+        try:
+            for src in paths:
+                shutil.copyfile(src, os.path.join(tmp_path, os.path.basename(src)))
+            with open(os.path.join(tmp_path, _ENTRY_FILE), 'wb') as f:
+                pickle.dump(([os.path.basename(src) for src in paths], payload), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, os.path.join(self.cache_dir, key))
+        except OSError:
+            # Another process stored the same key first (or the disk is full)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+    
+    def evict(self):
+        """Remove least recently used entries until the cache fits its budget."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith('.tmp-') or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+    
+    def stats(self):
+        """Return hit/miss counters with the number and total size (MB) of entries."""
+        n_entries, size = 0, 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if os.path.isdir(path) and not name.startswith('.tmp-'):
+                n_entries += 1
+                size += sum(entry.stat().st_size for entry in os.scandir(path))
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': n_entries, 'size_mb': size / 1024 ** 2}
@@ -1,25 +1,32 @@
 """
 Machine Learning Models module for Hotels.com Churn Analysis
 Contains model training, evaluation, and feature preparation functions
+
+scikit-learn is imported inside the functions that fit or evaluate models,
+so scoring with an already trained model does not import it up front.
 """
 
+import io
 import os
+import time
 import pickle
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.metrics import (classification_report, accuracy_score, precision_score, 
-                             recall_score, f1_score, roc_auc_score)
+from config import LR_PARAMS, RF_PARAMS, GB_ENGINE, GB_ENGINE_PARAMS
+from data_loader import decode_customer_keys, customer_id_column
+from scheduler import CORES
 
 # Results directory
 RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'results')
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
 
-def prepare_features(customer_df, save_feature_cols=True):
+def prepare_features(customer_df, save_feature_cols=True, inplace=False):
     """
     Prepare features for model training.
     
@@ -29,7 +36,9 @@ def prepare_features(customer_df, save_feature_cols=True):
         Customer-level aggregated dataframe
     save_feature_cols : bool
         Whether to save feature column names to disk
-        
+    inplace : bool
+        Drop, fill and encode columns on customer_df itself instead of a copy
+    
     Returns:
     --------
     tuple
@@ -39,13 +48,16 @@ def prepare_features(customer_df, save_feature_cols=True):
     print("FEATURE PREPARATION FOR MODELLING")
     print("=" * 60)
     
-    model_df = customer_df.copy()
+    from sklearn.preprocessing import LabelEncoder
+    
+    model_df = customer_df if inplace else customer_df.copy()
     
-    # Drop identifier and date columns
-    model_df = model_df.drop(['email_address', 'first_booking', 'last_booking'], axis=1)
+    # Drop date columns; the customer identifier is kept for scoring but is not a feature
+    id_col = customer_id_column(model_df)
+    model_df.drop(['first_booking', 'last_booking'], axis=1, inplace=True)
     
     # Handle NaN values
-    model_df = model_df.fillna(0)
+    model_df.fillna(0, inplace=True)
     
     # Encode categorical variables
     categorical_cols_model = ['primary_platform', 'primary_channel', 'customer_type']
@@ -58,7 +70,7 @@ def prepare_features(customer_df, save_feature_cols=True):
     model_df_dummies = pd.get_dummies(model_df, columns=categorical_cols_model, drop_first=True)
     
     # Get feature columns
-    feature_cols = [col for col in model_df_dummies.columns if col != 'churned' 
+    feature_cols = [col for col in model_df_dummies.columns if col not in ('churned', id_col)
                     and not col.endswith('_bookings') and col not in categorical_cols_model]
     
     X = model_df_dummies[feature_cols]
@@ -94,12 +106,15 @@ def split_and_scale_data(X, y, test_size=0.25, random_state=42, save_scaler=True
         Random seed
     save_scaler : bool
         Whether to save the scaler to disk
-        
+    
     Returns:
     --------
     tuple
         X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled, scaler
     """
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=test_size, random_state=random_state, stratify=y
     )
@@ -120,7 +135,7 @@ def split_and_scale_data(X, y, test_size=0.25, random_state=42, save_scaler=True
     return X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled, scaler
 
 
-def train_logistic_regression(X_train_scaled, y_train, X_test_scaled, y_test, save_model=True):
+def train_logistic_regression(X_train_scaled, y_train, X_test_scaled, y_test, save_model=True, params=None):
     """
     Train and evaluate Logistic Regression model.
     
@@ -132,7 +147,9 @@ def train_logistic_regression(X_train_scaled, y_train, X_test_scaled, y_test, sa
         Target variables
     save_model : bool
         Whether to save the model to disk
-        
+    params : dict, optional
+        Hyperparameters overriding the defaults in config
+    
     Returns:
     --------
     tuple
@@ -142,7 +159,8 @@ def train_logistic_regression(X_train_scaled, y_train, X_test_scaled, y_test, sa
     print("MODEL 1: LOGISTIC REGRESSION")
     print("=" * 60)
     
-    model = LogisticRegression(max_iter=1000, random_state=42, class_weight='balanced')
+    from sklearn.linear_model import LogisticRegression
+    model = LogisticRegression(**{**LR_PARAMS, **(params or {})})
     model.fit(X_train_scaled, y_train)
     
     y_pred = model.predict(X_test_scaled)
@@ -159,7 +177,7 @@ def train_logistic_regression(X_train_scaled, y_train, X_test_scaled, y_test, sa
     return model, y_pred, y_prob
 
 
-def train_random_forest(X_train, y_train, X_test, y_test, save_model=True):
+def train_random_forest(X_train, y_train, X_test, y_test, save_model=True, params=None):
     """
     Train and evaluate Random Forest model.
     
@@ -171,7 +189,9 @@ def train_random_forest(X_train, y_train, X_test, y_test, save_model=True):
         Target variables
     save_model : bool
         Whether to save the model to disk
-        
+    params : dict, optional
+        Hyperparameters overriding the defaults in config
+    
     Returns:
     --------
     tuple
@@ -181,14 +201,16 @@ def train_random_forest(X_train, y_train, X_test, y_test, save_model=True):
     print("MODEL 2: RANDOM FOREST")
     print("=" * 60)
     
-    model = RandomForestClassifier(
-        n_estimators=200, max_depth=15, min_samples_split=10,
-        random_state=42, class_weight='balanced', n_jobs=-1
-    )
-    model.fit(X_train, y_train)
+    from sklearn.ensemble import RandomForestClassifier
+    params = {**RF_PARAMS, **(params or {})}
     
-    y_pred = model.predict(X_test)
-    y_prob = model.predict_proba(X_test)[:, 1]
+    # Trees are built on the cores free in the shared budget
+    with CORES.reserve(params['n_jobs']) as n_jobs:
+        model = RandomForestClassifier(**{**params, 'n_jobs': n_jobs})
+        model.fit(X_train, y_train)
+        
+        y_pred = model.predict(X_test)
+        y_prob = model.predict_proba(X_test)[:, 1]
     
     _print_model_performance(y_test, y_pred, y_prob)
     
@@ -201,7 +223,8 @@ def train_random_forest(X_train, y_train, X_test, y_test, save_model=True):
     return model, y_pred, y_prob
 
 
-def train_gradient_boosting(X_train, y_train, X_test, y_test, save_model=True):
+def train_gradient_boosting(X_train, y_train, X_test, y_test, save_model=True, params=None,
+                            engine=None, n_jobs=-1):
     """
     Train and evaluate Gradient Boosting model.
     
@@ -213,24 +236,50 @@ def train_gradient_boosting(X_train, y_train, X_test, y_test, save_model=True):
         Target variables
     save_model : bool
         Whether to save the model to disk
-        
+    params : dict, optional
+        Hyperparameters overriding the engine's defaults in config
+    engine : str, optional
+        'exact' (GradientBoostingClassifier) or 'hist' (HistGradientBoostingClassifier
+        with early stopping); config.GB_ENGINE by default
+    n_jobs : int
+        Threads for the 'hist' engine, taken from the shared core budget
+        (-1 for all free cores)
+    
     Returns:
     --------
     tuple
         model, y_pred, y_prob
     """
+    engine = engine or GB_ENGINE
+    if engine not in GB_ENGINE_PARAMS:
+        raise ValueError(f"Unknown gradient boosting engine {engine!r}; "
+                         f"expected one of {sorted(GB_ENGINE_PARAMS)}")
+    
     print("=" * 60)
     print("MODEL 3: GRADIENT BOOSTING")
     print("=" * 60)
     
-    model = GradientBoostingClassifier(
-        n_estimators=150, max_depth=5, learning_rate=0.1,
-        random_state=42, min_samples_split=10
-    )
-    model.fit(X_train, y_train)
-    
-    y_pred = model.predict(X_test)
-    y_prob = model.predict_proba(X_test)[:, 1]
+    params = {**GB_ENGINE_PARAMS[engine], **(params or {})}
+    if engine == 'exact':
+        from sklearn.ensemble import GradientBoostingClassifier
+        model = GradientBoostingClassifier(**params)
+        model.fit(X_train, y_train)
+        
+        y_pred = model.predict(X_test)
+        y_prob = model.predict_proba(X_test)[:, 1]
+    else:
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        from threadpoolctl import threadpool_limits
+        
+        # Histograms are built with OpenMP threads, limited to the cores free in the shared budget
+        with CORES.reserve(n_jobs) as n_threads, threadpool_limits(n_threads, user_api='openmp'):
+            model = HistGradientBoostingClassifier(**params)
+            model.fit(X_train, y_train)
+            
+            y_pred = model.predict(X_test)
+            y_prob = model.predict_proba(X_test)[:, 1]
+        if params.get('early_stopping'):
+            print(f"✓ Early stopping after {model.n_iter_} of {params['max_iter']} iterations")
     
     _print_model_performance(y_test, y_pred, y_prob)
     
@@ -245,6 +294,9 @@ def train_gradient_boosting(X_train, y_train, X_test, y_test, save_model=True):
 
 def _print_model_performance(y_test, y_pred, y_prob):
     """Print model performance metrics."""
+    from sklearn.metrics import (classification_report, accuracy_score, precision_score,
+                                 recall_score, f1_score, roc_auc_score)
+    
     print("\n📊 Model Performance:")
     print("-" * 40)
     print(f"Accuracy: {accuracy_score(y_test, y_pred):.4f}")
@@ -257,6 +309,151 @@ def _print_model_performance(y_test, y_pred, y_prob):
     print(classification_report(y_test, y_pred, target_names=['Retained', 'Churned']))
 
 
+# Model name -> (training function, whether it uses the scaled features)
+MODEL_TRAINERS = {
+    'Logistic Regression': (train_logistic_regression, True),
+    'Random Forest': (train_random_forest, False),
+    'Gradient Boosting': (train_gradient_boosting, False),
+}
+
+
+def _share_arrays(data_dir, **arrays):
+    """Write arrays as .npy files in data_dir for worker processes to memory-map (see _load_shared)."""
+    for key, values in arrays.items():
+        np.save(os.path.join(data_dir, f'{key}.npy'), values)
+
+
+def _load_shared(data_dir, key):
+    """Read-only memory map of an array written by _share_arrays."""
+    return np.load(os.path.join(data_dir, f'{key}.npy'), mmap_mode='r')
+
+
+def _trainer_kwargs(name, params, n_jobs, gb_engine=None):
+    """Keyword arguments of a MODEL_TRAINERS function, with n_jobs cores for the multi-threaded models."""
+    kwargs = {'params': params}
+    if name == 'Random Forest':
+        kwargs['params'] = {**(params or {}), 'n_jobs': n_jobs}
+    elif name == 'Gradient Boosting':
+        kwargs.update(engine=gb_engine, n_jobs=n_jobs)
+    return kwargs
+
+
+def _train_worker(name, data_dir, columns, params, n_jobs, gb_engine=None):
+    """Train one model on the memory-mapped matrices; returns its outputs, fit seconds and printed text."""
+    train_func, scaled = MODEL_TRAINERS[name]
+    load = lambda key: _load_shared(data_dir, key)
+    if scaled:
+        X_train, X_test = load('X_train_scaled'), load('X_test_scaled')
+    else:
+        # Wrapped without copying; the column names keep feature_names_in_ as before
+        X_train = pd.DataFrame(load('X_train'), columns=columns, copy=False)
+        X_test = pd.DataFrame(load('X_test'), columns=columns, copy=False)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        model, y_pred, y_prob = train_func(X_train, load('y_train'), X_test, load('y_test'),
+                                           **_trainer_kwargs(name, params, n_jobs, gb_engine))
+    return model, y_pred, y_prob, time.perf_counter() - started, output.getvalue()
+
+
+def train_models(X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled, models=None,
+                 params=None, n_jobs=-1, gb_engine=None, verbose=True):
+    """
+    Train several churn models concurrently, one process per model.
+    
+    The training and test matrices are written once as .npy files that
+    every (spawned) worker memory-maps, so they are shared rather than
+    copied or pickled. Cores
+    come from the shared budget (scheduler.CORES): each model gets one and
+    the multi-threaded models (Random Forest, 'hist' Gradient Boosting)
+    share the rest. Each worker's printed output is
+    captured and printed in model order, so the report matches training
+    the models one after another.
+    
+    Parameters:
+    -----------
+    X_train, X_test : pd.DataFrame
+        Feature matrices
+    y_train, y_test : array
+        Target variables
+    X_train_scaled, X_test_scaled : array
+        Scaled feature matrices (for Logistic Regression)
+    models : list, optional
+        Names from MODEL_TRAINERS (all three by default)
+    params : dict, optional
+        Model name -> hyperparameters overriding the defaults in config
+    n_jobs : int
+        Cores to use (-1 for all free cores of the shared budget)
+    gb_engine : str, optional
+        Gradient boosting engine ('exact' or 'hist'; config.GB_ENGINE by default)
+    verbose : bool
+        Print each model's output and the fit timings
+    
+    Returns:
+    --------
+    dict
+        Model name -> dict with model, y_pred, y_prob, seconds (train and
+        evaluate) and output (printed text)
+    """
+    models = list(MODEL_TRAINERS) if models is None else list(models)
+    params = params or {}
+    columns = list(X_train.columns)
+    threaded = [name for name in models
+                if name == 'Random Forest' or (name == 'Gradient Boosting' and (gb_engine or GB_ENGINE) == 'hist')]
+    
+    n_cores = CORES.acquire(n_jobs)
+    try:
+        with tempfile.TemporaryDirectory(prefix='train_') as data_dir:
+            _share_arrays(data_dir, X_train=X_train.to_numpy(dtype=np.float64),
+                          X_test=X_test.to_numpy(dtype=np.float64), y_train=np.asarray(y_train),
+                          y_test=np.asarray(y_test), X_train_scaled=X_train_scaled, X_test_scaled=X_test_scaled)
+            
+            n_workers = max(1, min(len(models), n_cores))
+            # One core per worker; the cores left over go to the multi-threaded models
+            spare = n_cores - n_workers
+            jobs = dict.fromkeys(models, 1)
+            for i, name in enumerate(threaded):
+                jobs[name] += spare // len(threaded) + (i < spare % len(threaded))
+            if n_workers == 1:
+                # A single core: worker processes would only add start-up time. The
+                # core goes back to the budget, as the multi-threaded models reserve their own
+                CORES.release(n_cores)
+                n_cores = 0
+                outputs = {name: _train_worker(name, data_dir, columns, params.get(name), jobs[name], gb_engine)
+                           for name in models}
+            else:
+                # Spawned rather than forked: the estimators' OpenMP/BLAS thread
+                # pools are not fork-safe once this process has trained a model
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as executor:
+                    # Slowest first, so it is not left running on its own at the end
+                    order = sorted(models, key=lambda name: name != 'Gradient Boosting')
+                    futures = {name: executor.submit(_train_worker, name, data_dir, columns,
+                                                     params.get(name), jobs[name], gb_engine)
+                               for name in order}
+                    outputs = {name: futures[name].result() for name in models}
+            
+            results = {}
+            for name in models:
+                model, y_pred, y_prob, seconds, output = outputs[name]
+                results[name] = {'model': model, 'y_pred': y_pred, 'y_prob': y_prob,
+                                 'seconds': seconds, 'output': output}
+    finally:
+        CORES.release(n_cores)
+    
+    if verbose:
+        for name in models:
+            print(results[name]['output'], end='')
+        print_training_times(results)
+    return results
+
+
+def print_training_times(results):
+    """Print the train-and-evaluate time of each model from train_models."""
+    print("\n📊 Training times:")
+    for name, result in results.items():
+        print(f"   • {name:20} {result['seconds']:>7.1f}s")
+
+
 def get_logistic_regression_odds_ratios(model, feature_names):
     """
     Calculate odds ratios from logistic regression coefficients.
@@ -267,7 +464,7 @@ def get_logistic_regression_odds_ratios(model, feature_names):
         Trained model
     feature_names : list
         Feature names
-        
+    
     Returns:
     --------
     pd.DataFrame
@@ -297,7 +494,7 @@ def get_logistic_regression_odds_ratios(model, feature_names):
     return odds_ratios
 
 
-def score_customers(model, X, model_df_dummies):
+def score_customers(model, X, model_df_dummies, inplace=False):
     """
     Score all customers with churn probability.
     
@@ -309,13 +506,15 @@ def score_customers(model, X, model_df_dummies):
         Feature matrix
     model_df_dummies : pd.DataFrame
         Full dataframe with target
-        
+    inplace : bool
+        Add the score columns to model_df_dummies itself instead of a copy
+    
     Returns:
     --------
     pd.DataFrame
         Dataframe with churn probabilities and risk categories
     """
-    customer_scores = model_df_dummies.copy()
+    customer_scores = model_df_dummies if inplace else model_df_dummies.copy()
     customer_scores['churn_probability'] = model.predict_proba(X)[:, 1]
     customer_scores['risk_category'] = pd.cut(
         customer_scores['churn_probability'], 
@@ -326,6 +525,37 @@ def score_customers(model, X, model_df_dummies):
     return customer_scores
 
 
+def export_customer_scores(customer_scores, customer_index=None, filename='customer_scores.csv'):
+    """
+    Write customer churn scores to CSV, translating customer keys back to email.
+    
+    Parameters:
+    -----------
+    customer_scores : pd.DataFrame
+        Output of score_customers
+    customer_index : pd.Index, optional
+        Mapping table from data_loader.encode_customer_keys; required when
+        the scores are keyed by customer_key
+    filename : str
+        Output file name within the results directory
+    
+    Returns:
+    --------
+    str
+        Path of the written file
+    """
+    export_cols = ['churn_probability', 'risk_category', 'churned']
+    if 'customer_key' in customer_scores.columns:
+        export = decode_customer_keys(customer_scores[['customer_key'] + export_cols], customer_index)
+    else:
+        export = customer_scores[['email_address'] + export_cols]
+    
+    filepath = os.path.join(RESULTS_DIR, filename)
+    export.to_csv(filepath, index=False)
+    print(f"✓ Customer scores exported to {filepath}")
+    return filepath
+
+
 def save_models(lr_model, rf_model, gb_model, scaler, feature_cols):
     """
     Save trained models and preprocessing objects to disk.
@@ -0,0 +1,453 @@
+"""
+Pipeline module for Hotels.com Churn Analysis
+Stage DAG with on-disk memoization of stage outputs
+"""
+
+import io
+import os
+import time
+import pickle
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config import (DATA_FILE, STAGE_CACHE_DIR, NUMERICAL_COLS, SEGMENT_COLS,
+                    LR_PARAMS, RF_PARAMS, GB_ENGINE, GB_ENGINE_PARAMS, CV_FOLDS)
+from data_loader import (load_preprocessed_data, encode_customer_keys, aggregate_to_customer_level,
+                         file_fingerprint, PREPROCESS_VERSION)
+from statistical_tests import (perform_ttest, perform_chi_square_tests, perform_resampling_tests,
+                               perform_segmented_tests)
+from models import (prepare_features, split_and_scale_data, train_logistic_regression,
+                    train_random_forest, train_gradient_boosting, get_logistic_regression_odds_ratios,
+                    score_customers, train_models, print_training_times)
+from cross_validation import prepare_folds, cross_validate_models
+from code_sources import code_digest
+from profiling import track_peak_memory, tee_stdout, thread_stdout
+
+# Model training stages and the train_models name of their model
+MODEL_STAGES = {'train_lr': 'Logistic Regression', 'train_rf': 'Random Forest',
+                'train_gb': 'Gradient Boosting'}
+
+# Chi-square columns of the significance tests
+CHI_SQUARE_COLS = ['customer_type', 'loyalty_tier', 'platform', 'marketing_channel',
+                   'coupon_flag', 'pay_now_flag', 'cancel_flag']
+
+
+class Stage:
+    """
+    One step of the pipeline.
+    
+    The stage is called with the outputs of its input stages (in order)
+    followed by params and options as keyword arguments.
+    
+    Parameters:
+    -----------
+    name : str
+        Stage name
+    func : callable
+        Function computing the stage output
+    inputs : tuple
+        Names of the upstream stages
+    params : dict
+        Keyword arguments that change the output (part of the key)
+    options : dict
+        Keyword arguments that do not change the output, e.g. in-place
+        transforms (not part of the key)
+    code : tuple
+        Functions whose source is part of the key (func by default), together
+        with the source of the repository functions and classes they use and
+        the constants they read (see code_sources.code_digest)
+    version : int
+        Bump to invalidate the stage after changes not visible in code
+    fingerprint : callable, optional
+        Returns a hash of external inputs such as the source file
+    store : bool
+        False for stages backed by a cache of their own (e.g. the column
+        cache of load_preprocessed_data): the output is not pickled to the
+        stage cache and the function runs whenever a stage needs it
+    """
+    
+    def __init__(self, name, func, inputs=(), params=None, options=None, code=None, version=1,
+                 fingerprint=None, store=True):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = params or {}
+        self.options = options or {}
+        self.code = tuple(code) if code is not None else (func,)
+        self.version = version
+        self.fingerprint = fingerprint
+        self.store = store
+
+
+class Pipeline:
+    """
+    DAG of stages whose outputs are memoized on disk.
+    
+    A stage's key hashes its code, version, params and external inputs
+    together with the keys of its upstream stages, so changing anything
+    invalidates the stage and everything downstream of it. Outputs are
+    computed or loaded on first access (pipeline['stage']); an upstream
+    stage is not even loaded when all the stages that need it are hits.
+    What a stage printed is stored with its output and replayed on a hit.
+    
+    Independent stages can be started in background threads with start();
+    their printed output is held back and printed when the thread that
+    built the pipeline accesses them, so the report keeps its step order.
+    
+    Parameters:
+    -----------
+    stages : list
+        Stage objects
+    cache_dir : str
+        Directory for the stored outputs (one file per stage, the latest key)
+    use_cache : bool
+        Whether to read and write stored outputs
+    memory_report : list, optional
+        Collects the peak memory of every computed stage (see profiling)
+    """
+    
+    def __init__(self, stages, cache_dir=STAGE_CACHE_DIR, use_cache=True, memory_report=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.memory_report = memory_report
+        self.status = {}
+        self._keys = {}
+        self._outputs = {}
+        self._pending = {}
+        self._locks = {name: threading.Lock() for name in self.stages}
+        self._owner = threading.get_ident()
+        if use_cache:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    def key(self, name):
+        """Content key of a stage."""
+        if name not in self._keys:
+            stage = self.stages[name]
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(f"{name}|v{stage.version}|{sorted(stage.params.items())!r}".encode())
+            digest.update(code_digest(stage.code).encode())
+            if stage.fingerprint is not None:
+                digest.update(stage.fingerprint().encode())
+            for upstream in stage.inputs:
+                digest.update(self.key(upstream).encode())
+            self._keys[name] = digest.hexdigest()
+        return self._keys[name]
+    
+    def __getitem__(self, name):
+        future = self._pending.get(name)
+        if future is not None:
+            output, printed = future.result()
+            if threading.get_ident() == self._owner:
+                del self._pending[name]
+                print(printed, end='')
+            return output
+        return self._get(name)
+    
+    def _get(self, name):
+        with self._locks[name]:
+            if name not in self._outputs:
+                self._outputs[name] = self._resolve(name)
+        return self._outputs[name]
+    
+    def start(self, names):
+        """
+        Resolve stages concurrently in background threads.
+        
+        Stages that need each other's outputs wait for them; heavy work
+        inside the stages (process pools, multi-threaded estimators) draws
+        its workers from the shared core budget (scheduler.CORES).
+        
+        Parameters:
+        -----------
+        names : list
+            Stages to start; access them with pipeline[name] as usual
+        """
+        names = [name for name in names if name not in self._outputs and name not in self._pending]
+        if not names:
+            return
+        executor = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix='stage')
+        for name in names:
+            self._pending[name] = executor.submit(self._get_quietly, name)
+        executor.shutdown(wait=False)
+    
+    def is_cached(self, name):
+        """Whether the stage output is already available (in memory, in flight or stored)."""
+        if name in self._outputs or name in self._pending:
+            return True
+        return self.use_cache and self.stages[name].store and os.path.exists(os.path.join(self.cache_dir, f"{name}-{self.key(name)}.pkl"))
+    
+    def provide(self, name, output, printed='', seconds=0.0):
+        """
+        Record a stage output computed outside the stage function.
+        
+        Used when several stages are computed together (e.g. models trained
+        concurrently); the output is stored under the stage key and printed
+        text is replayed when the stage is accessed, as for start().
+        """
+        future = Future()
+        future.set_result((output, printed))
+        self._pending[name] = future
+        self._outputs[name] = output
+        self.status[name] = ('miss', seconds)
+        if self.use_cache:
+            self._store(name, os.path.join(self.cache_dir, f"{name}-{self.key(name)}.pkl"), output, printed)
+    
+    def _get_quietly(self, name):
+        with thread_stdout(io.StringIO()) as printed:
+            output = self._get(name)
+        return output, printed.getvalue()
+    
+    def _resolve(self, name):
+        stage = self.stages[name]
+        path = os.path.join(self.cache_dir, f"{name}-{self.key(name)}.pkl")
+        
+        store = self.use_cache and stage.store
+        if store and os.path.exists(path):
+            started = time.perf_counter()
+            with open(path, 'rb') as f:
+                output, printed = pickle.load(f)
+            print(printed, end='')
+            self.status[name] = ('hit', time.perf_counter() - started)
+            return output
+        
+        inputs = [self[upstream] for upstream in stage.inputs]
+        started = time.perf_counter()
+        with track_peak_memory(name, self.memory_report, enabled=self.memory_report is not None):
+            with tee_stdout() as printed:
+                output = stage.func(*inputs, **stage.params, **stage.options)
+        self.status[name] = ('miss' if stage.store else 'run', time.perf_counter() - started)
+        if store:
+            self._store(name, path, output, printed.getvalue())
+        return output
+    
+    def _store(self, name, path, output, printed):
+        """Write a stage output, replacing the one stored under its previous key."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((output, printed), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(f"{name}-") and filename != os.path.basename(path):
+                os.remove(os.path.join(self.cache_dir, filename))
+    
+    def report(self):
+        """Print which stages were hits, misses (recomputed), run on their own cache or not needed."""
+        print("📊 Pipeline stages:")
+        for name in self.stages:
+            if name not in self.status:
+                print(f"   • {name:12} not needed")
+                continue
+            status, seconds = self.status[name]
+            label = {'hit': 'hit (cached)', 'miss': 'miss (recomputed)', 'run': 'run (own cache)'}[status]
+            print(f"   • {name:12} {label:18} {seconds:>7.1f}s")
+        n_hits = sum(status == 'hit' for status, _ in self.status.values())
+        n_misses = sum(status == 'miss' for status, _ in self.status.values())
+        print(f"   {n_hits} hits, {n_misses} misses\n")
+
+
+# =============================================================================
+# CHURN ANALYSIS STAGES
+# =============================================================================
+
+def _preprocess_stage(filepath, use_cache=True):
+    """
+    Load and preprocess bookings (through the column cache) and switch them to integer customer keys.
+    
+    Returns the preprocessed frame, the customer index and the raw frame.
+    """
+    df, df_processed = load_preprocessed_data(filepath, use_cache=use_cache, return_raw=True)
+    customer_index = encode_customer_keys(df_processed)
+    return df_processed, customer_index, df
+
+
+def _aggregate_stage(preprocessed):
+    return aggregate_to_customer_level(preprocessed[0])
+
+
+def _tests_stage(preprocessed, numerical_cols, chi_square_cols, segment_cols, resampling):
+    """Significance tests: overall, optionally resampled, and per segment."""
+    df_processed = preprocessed[0]
+    results = {
+        'ttest': perform_ttest(df_processed, numerical_cols),
+        'chi_square': perform_chi_square_tests(df_processed, chi_square_cols),
+    }
+    
+    # Distribution-free p-values for the heavy-tailed engagement metrics
+    if resampling:
+        results['permutation'], results['bootstrap'] = perform_resampling_tests(
+            df_processed, numerical_cols, chi_square_cols, n_jobs=-1)
+    
+    # The same tests within every platform × channel × customer type segment
+    segment_test_cols = [col for col in chi_square_cols if col not in segment_cols]
+    results['segmented'] = perform_segmented_tests(df_processed, numerical_cols, segment_test_cols,
+                                                   segment_cols=segment_cols, n_jobs=-1)
+    return results
+
+
+def _features_stage(customer_df, inplace=False):
+    """Model features, train/test split and scaling."""
+    X, y, feature_cols, model_df_dummies = prepare_features(customer_df, inplace=inplace)
+    (X_train, X_test, y_train, y_test,
+     X_train_scaled, X_test_scaled, scaler) = split_and_scale_data(X, y)
+    return {'X': X, 'y': y, 'feature_cols': feature_cols, 'model_df_dummies': model_df_dummies,
+            'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test,
+            'X_train_scaled': X_train_scaled, 'X_test_scaled': X_test_scaled, 'scaler': scaler}
+
+
+def _train_lr_stage(features, params):
+    """Logistic regression on scaled features, with its odds ratios."""
+    model, y_pred, y_prob = train_logistic_regression(
+        features['X_train_scaled'], features['y_train'], features['X_test_scaled'], features['y_test'],
+        params=params)
+    odds_ratios = get_logistic_regression_odds_ratios(model, features['feature_cols'])
+    return model, y_pred, y_prob, odds_ratios
+
+
+def _train_rf_stage(features, params):
+    return train_random_forest(features['X_train'], features['y_train'], features['X_test'],
+                               features['y_test'], params=params)
+
+
+def _train_gb_stage(features, params, engine):
+    return train_gradient_boosting(features['X_train'], features['y_train'], features['X_test'],
+                                   features['y_test'], params=params, engine=engine)
+
+
+def _score_stage(features, rf_output, inplace=False):
+    """Churn probability and risk category of every customer (Random Forest)."""
+    return score_customers(rf_output[0], features['X'], features['model_df_dummies'], inplace=inplace)
+
+
+def train_model_stages(pipeline, n_jobs=-1):
+    """
+    Train the models whose stages are not cached concurrently (models.train_models).
+    
+    Each model is stored as the output of its own stage, so a later change
+    to one model's hyperparameters still retrains only that model. With
+    fewer than two models to train, nothing is done here and the stage
+    trains its model when accessed.
+    
+    Parameters:
+    -----------
+    pipeline : Pipeline
+        Pipeline from build_analysis_pipeline
+    n_jobs : int
+        Cores to use (-1 for all free cores of the shared budget)
+    
+    Returns:
+    --------
+    dict
+        Results of train_models (including per-model timings); empty when
+        nothing was trained
+    """
+    names = [name for name in MODEL_STAGES if not pipeline.is_cached(name)]
+    if len(names) < 2:
+        return {}
+    
+    features = pipeline['features']
+    results = train_models(features['X_train'], features['X_test'], features['y_train'], features['y_test'],
+                           features['X_train_scaled'], features['X_test_scaled'],
+                           models=[MODEL_STAGES[name] for name in names],
+                           params={MODEL_STAGES[name]: pipeline.stages[name].params['params'] for name in names},
+                           n_jobs=n_jobs, gb_engine=pipeline.stages['train_gb'].params['engine'],
+                           verbose=False)
+    
+    for name in names:
+        result = results[MODEL_STAGES[name]]
+        output = (result['model'], result['y_pred'], result['y_prob'])
+        printed = result['output']
+        if name == 'train_lr':
+            with thread_stdout(io.StringIO()) as odds_printed:
+                odds_ratios = get_logistic_regression_odds_ratios(result['model'], features['feature_cols'])
+            output += (odds_ratios,)
+            printed += odds_printed.getvalue()
+        pipeline.provide(name, output, printed, result['seconds'])
+    return results
+
+
+def cross_validate_stages(pipeline, n_splits=CV_FOLDS, n_jobs=-1):
+    """
+    Cross-validate the models of the pipeline's training stages.
+    
+    The folds are built from the features stage's full X and y (and
+    reused from the fold cache when these are unchanged); each model is
+    trained with the hyperparameters and engine of its stage.
+    
+    Parameters:
+    -----------
+    pipeline : Pipeline
+        Pipeline from build_analysis_pipeline
+    n_splits : int
+        Number of folds
+    n_jobs : int
+        Cores to use (-1 for all free cores of the shared budget)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Per-fold results of cross_validation.cross_validate_models
+    """
+    features = pipeline['features']
+    folds = prepare_folds(features['X'], features['y'], n_splits=n_splits)
+    return cross_validate_models(folds, models=list(MODEL_STAGES.values()),
+                                 params={MODEL_STAGES[name]: pipeline.stages[name].params['params']
+                                         for name in MODEL_STAGES},
+                                 gb_engine=pipeline.stages['train_gb'].params['engine'], n_jobs=n_jobs)
+
+
+def build_analysis_pipeline(filepath=DATA_FILE, resampling=False, low_memory=False, lr_params=None,
+                            rf_params=None, gb_params=None, gb_engine=GB_ENGINE, cache_dir=STAGE_CACHE_DIR,
+                            use_cache=True, memory_report=None):
+    """
+    Describe the churn analysis as a memoized stage DAG.
+    
+    Stages: preprocess → aggregate / tests → features →
+    train_lr / train_rf / train_gb → score (from features and train_rf).
+    
+    Parameters:
+    -----------
+    filepath : str
+        Path to the booking CSV (its content hash keys the preprocess stage)
+    resampling : bool
+        Also run permutation and bootstrap tests in the tests stage
+    low_memory : bool
+        Transform the feature and score frames in place
+    lr_params, rf_params, gb_params : dict, optional
+        Hyperparameters overriding config.LR_PARAMS / RF_PARAMS and the
+        gradient boosting engine's defaults (config.GB_ENGINE_PARAMS); only
+        the affected model stage (and scoring, for the Random Forest) is
+        recomputed when they change
+    gb_engine : str
+        Gradient boosting engine, 'exact' or 'hist'
+    cache_dir : str
+        Directory for the stored stage outputs
+    use_cache : bool
+        False recomputes every stage
+    memory_report : list, optional
+        Collects the peak memory of every computed stage
+    
+    Returns:
+    --------
+    Pipeline
+    """
+    stages = [
+        # Memory-mapped from the column cache rather than pickled with the other stages
+        Stage('preprocess', _preprocess_stage, params={'filepath': filepath},
+              options={'use_cache': use_cache}, version=PREPROCESS_VERSION,
+              fingerprint=lambda: file_fingerprint(filepath), store=False),
+        Stage('aggregate', _aggregate_stage, inputs=['preprocess']),
+        Stage('tests', _tests_stage, inputs=['preprocess'],
+              params={'numerical_cols': NUMERICAL_COLS, 'chi_square_cols': CHI_SQUARE_COLS,
+                      'segment_cols': SEGMENT_COLS, 'resampling': resampling}),
+        Stage('features', _features_stage, inputs=['aggregate'], options={'inplace': low_memory}),
+        Stage('train_lr', _train_lr_stage, inputs=['features'],
+              params={'params': {**LR_PARAMS, **(lr_params or {})}}),
+        Stage('train_rf', _train_rf_stage, inputs=['features'],
+              params={'params': {**RF_PARAMS, **(rf_params or {})}}),
+        Stage('train_gb', _train_gb_stage, inputs=['features'],
+              params={'params': {**GB_ENGINE_PARAMS[gb_engine], **(gb_params or {})}, 'engine': gb_engine}),
+        Stage('score', _score_stage, inputs=['features', 'train_rf'], options={'inplace': low_memory}),
+    ]
+    return Pipeline(stages, cache_dir=cache_dir, use_cache=use_cache, memory_report=memory_report)
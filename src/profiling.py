@@ -0,0 +1,180 @@
+"""
+Memory profiling helpers for Hotels.com Churn Analysis
+Peak resident memory reporting and output capture for the pipeline stages
+"""
+
+import io
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """Return the current resident set size in MB (None if unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1024 ** 2
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+@contextmanager
+def sample_peak_memory(interval=0.01):
+    """
+    Measure the peak resident memory reached inside the block.
+    
+    The current RSS is sampled from a background thread; where that is not
+    available the process-wide high-water mark is used instead (and the
+    starting RSS is None).
+    
+    Parameters:
+    -----------
+    interval : float
+        Sampling interval in seconds
+    
+    Yields:
+    -------
+    dict
+        'start_mb' and 'peak_mb', the latter filled in when the block exits;
+        peak_mb - start_mb is what the block itself added
+    """
+    start_mb = current_rss_mb()
+    memory = {'start_mb': start_mb, 'peak_mb': None}
+    samples = [start_mb or 0.0]
+    stop = threading.Event()
+    
+    def sample():
+        while not stop.wait(interval):
+            samples.append(current_rss_mb() or 0.0)
+    
+    sampler = threading.Thread(target=sample, daemon=True) if start_mb is not None else None
+    if sampler is not None:
+        sampler.start()
+    try:
+        yield memory
+    finally:
+        stop.set()
+        if sampler is not None:
+            sampler.join()
+            samples.append(current_rss_mb() or 0.0)
+            memory['peak_mb'] = max(samples)
+        else:
+            memory['peak_mb'] = peak_rss_mb()
+
+
+@contextmanager
+def track_peak_memory(stage, report=None, enabled=True, interval=0.01):
+    """
+    Report the peak resident memory reached while a pipeline stage runs.
+    
+    Measured with sample_peak_memory.
+    
+    Parameters:
+    -----------
+    stage : str
+        Stage name used in the printed line
+    report : list, optional
+        If given, a dict with the stage measurements is appended to it
+    enabled : bool
+        When False the block runs without tracking
+    interval : float
+        Sampling interval in seconds
+    """
+    if not enabled:
+        yield
+        return
+    
+    started = time.perf_counter()
+    try:
+        with sample_peak_memory(interval) as memory:
+            yield
+    finally:
+        start_mb, peak_mb = memory['start_mb'], memory['peak_mb']
+        entry = {'stage': stage, 'seconds': time.perf_counter() - started,
+                 'start_mb': start_mb, 'peak_mb': peak_mb}
+        if report is not None:
+            report.append(entry)
+        if peak_mb is not None:
+            growth = f" (+{peak_mb - start_mb:,.0f} MB)" if start_mb is not None else ""
+            print(f"  [memory] {stage}: peak RSS {peak_mb:,.0f} MB{growth}")
+
+
+class _Tee(io.StringIO):
+    """Capture text while passing it through to another stream."""
+    
+    def __init__(self, stream):
+        super().__init__()
+        self._stream = stream
+    
+    def write(self, text):
+        self._stream.write(text)
+        return super().write(text)
+
+
+class _ThreadStdout:
+    """sys.stdout stand-in that lets each thread send its output to its own stream."""
+    
+    def __init__(self, stream):
+        self._default = stream
+        self._local = threading.local()
+    
+    def current(self):
+        return getattr(self._local, 'stream', None) or self._default
+    
+    def write(self, text):
+        return self.current().write(text)
+    
+    def flush(self):
+        self.current().flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.current(), name)
+
+
+_STDOUT_LOCK = threading.Lock()
+
+
+@contextmanager
+def thread_stdout(stream):
+    """
+    Send what the calling thread prints to stream; other threads are unaffected.
+    
+    Unlike contextlib.redirect_stdout this is safe when several threads
+    capture their output at the same time.
+    """
+    with _STDOUT_LOCK:
+        if not isinstance(sys.stdout, _ThreadStdout):
+            sys.stdout = _ThreadStdout(sys.stdout)
+        proxy = sys.stdout
+    previous = getattr(proxy._local, 'stream', None)
+    proxy._local.stream = stream
+    try:
+        yield stream
+    finally:
+        proxy._local.stream = previous
+
+
+@contextmanager
+def tee_stdout():
+    """Capture everything printed in the block while still printing it; yields the buffer."""
+    current = sys.stdout.current() if isinstance(sys.stdout, _ThreadStdout) else sys.stdout
+    with thread_stdout(_Tee(current)) as output:
+        yield output
@@ -0,0 +1,74 @@
+"""
+Scheduling helpers for Hotels.com Churn Analysis
+Global core budget shared by the pipeline steps that run concurrently
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+from config import N_CORES
+
+
+class CoreBudget:
+    """
+    Cores shared by everything that runs at the same time in this process.
+
+    Process pools and multi-threaded estimators ask for workers with
+    acquire() and get at most the cores that are currently free, so steps
+    running concurrently with n_jobs=-1 do not oversubscribe the machine.
+
+    Parameters:
+    -----------
+    total : int, optional
+        Cores in the budget (all cores by default)
+    """
+
+    def __init__(self, total=None):
+        self.total = total or os.cpu_count() or 1
+        self._free = self.total
+        self._condition = threading.Condition()
+
+    def _wanted(self, n_jobs):
+        """Translate n_jobs (joblib convention: -1 all cores, -2 all but one) into a core count."""
+        if n_jobs is None:
+            return 1
+        if n_jobs < 0:
+            n_jobs = self.total + 1 + n_jobs
+        return max(1, min(n_jobs, self.total))
+
+    def acquire(self, n_jobs=-1, minimum=1):
+        """
+        Reserve up to n_jobs cores, waiting until at least minimum are free.
+
+        Returns:
+        --------
+        int
+            Number of cores granted (to be passed back to release)
+        """
+        wanted = self._wanted(n_jobs)
+        minimum = min(minimum, wanted)
+        with self._condition:
+            self._condition.wait_for(lambda: self._free >= minimum)
+            granted = min(wanted, self._free)
+            self._free -= granted
+        return granted
+
+    def release(self, n_cores):
+        """Return cores obtained from acquire."""
+        with self._condition:
+            self._free += n_cores
+            self._condition.notify_all()
+
+    @contextmanager
+    def reserve(self, n_jobs=-1, minimum=1):
+        """Hold cores for the duration of the block; yields the number granted."""
+        granted = self.acquire(n_jobs, minimum)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+
+# Budget of this process (forked workers inherit an independent copy)
+CORES = CoreBudget(N_CORES)
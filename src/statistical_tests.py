@@ -1,14 +1,28 @@
 """
 Statistical Testing module for Hotels.com Churn Analysis
 Contains functions for significance testing
+
+scipy is imported where a distribution or sparse matrix is needed, so
+importing this module stays cheap.
 """
 
+import os
+import tempfile
+import contextlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from scipy import stats
+
+from config import (ALPHA, N_RESAMPLES, RESAMPLE_BATCH_SIZE, RESAMPLE_SEED, SEGMENT_COLS,
+                    CORRELATION_CHUNKSIZE)
+from data_loader import data_fingerprint
+from scheduler import CORES
 
 
-def perform_ttest(df_processed, numerical_cols):
+def perform_ttest(df_processed, numerical_cols, equal_var=True):
     """
     Perform t-tests comparing churned vs non-churned customers on numerical variables.
     
@@ -18,7 +32,9 @@ def perform_ttest(df_processed, numerical_cols):
         Preprocessed dataframe
     numerical_cols : list
         List of numerical column names
-        
+    equal_var : bool
+        Student's t-test if True (as scipy.stats.ttest_ind), Welch's otherwise
+    
     Returns:
     --------
     pd.DataFrame
@@ -30,28 +46,106 @@ def perform_ttest(df_processed, numerical_cols):
     print("\nTwo-sample t-tests comparing churned vs non-churned customers:")
     print("-" * 60)
     
-    results = []
-    for col in numerical_cols:
-        churned = df_processed[df_processed['churn_flag'] == 1][col].dropna()
-        not_churned = df_processed[df_processed['churn_flag'] == 0][col].dropna()
-        
-        t_stat, p_value = stats.ttest_ind(churned, not_churned)
-        significance = "***" if p_value < 0.001 else "**" if p_value < 0.01 else "*" if p_value < 0.05 else ""
-        
-        results.append({
-            'Feature': col,
-            'T-Statistic': round(t_stat, 3),
-            'P-Value': f"{p_value:.2e}",
-            'Significant': significance
-        })
-    
-    results_df = pd.DataFrame(results)
+    results_df = MomentAccumulator(numerical_cols).update(df_processed).ttest_results(equal_var)
     print(results_df.to_string(index=False))
     print("\n*** p < 0.001, ** p < 0.01, * p < 0.05")
     
     return results_df
 
 
+def group_moments(df, cols, group_col='churn_flag'):
+    """
+    Per-group count, mean and sum of squared deviations for many columns.
+    
+    All columns are reduced together in one sweep over the data: values are
+    shifted by a per-column estimate of the mean (which keeps the
+    sum-of-squares formula numerically stable) and the group sums come from
+    a single matrix product. NaNs are ignored column by column.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe with the columns and the group column
+    cols : list
+        Numerical column names
+    group_col : str
+        Column defining the groups
+    
+    Returns:
+    --------
+    tuple
+        group labels (pd.Index), then n, mean and m2 arrays of shape
+        (n_groups, n_cols)
+    """
+    codes, labels = pd.factorize(df[group_col], sort=True)
+    n, mean, m2 = _moments_by_code(df[cols].to_numpy(dtype=np.float64), codes, len(labels))
+    return pd.Index(labels), n, mean, m2
+
+
+def _moments_by_code(values, codes, n_groups):
+    """Count, mean and M2 per group of a float array; rows with code -1 are dropped."""
+    values = np.array(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    
+    shift = np.nan_to_num(np.nanmean(values[:10_000], axis=0)) if len(values) else np.zeros(values.shape[1])
+    values -= shift
+    values[~valid] = 0.0
+    
+    # One-hot group membership: dense BLAS for a few groups, sparse for many
+    keep = codes >= 0
+    if n_groups <= 8:
+        onehot = np.zeros((n_groups, len(values)))
+        onehot[codes[keep], np.flatnonzero(keep)] = 1.0
+    else:
+        from scipy import sparse
+        onehot = sparse.csr_matrix((np.ones(keep.sum()), (codes[keep], np.flatnonzero(keep))),
+                                   shape=(n_groups, len(values)))
+    
+    n = onehot @ valid.astype(np.float64)
+    s1 = onehot @ values
+    s2 = onehot @ (values * values)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = s1 / n
+        mean = shift + delta
+        m2 = np.maximum(s2 - s1 * delta, 0.0)
+    return n, mean, m2
+
+
+def ttest_from_moments(n_a, mean_a, m2_a, n_b, mean_b, m2_b, equal_var=True):
+    """
+    Two-sample t statistics and two-sided p-values from group moments.
+    
+    Parameters:
+    -----------
+    n_a, mean_a, m2_a : array
+        Count, mean and sum of squared deviations of the first group
+    n_b, mean_b, m2_b : array
+        The same for the second group
+    equal_var : bool
+        Pooled-variance (Student) test if True, Welch's test otherwise
+    
+    Returns:
+    --------
+    tuple
+        t statistics, p-values
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_a, var_b = m2_a / (n_a - 1), m2_b / (n_b - 1)
+        if equal_var:
+            dof = n_a + n_b - 2
+            pooled = (m2_a + m2_b) / dof
+            se = np.sqrt(pooled * (1 / n_a + 1 / n_b))
+        else:
+            se_a, se_b = var_a / n_a, var_b / n_b
+            se = np.sqrt(se_a + se_b)
+            dof = (se_a + se_b) ** 2 / (se_a ** 2 / (n_a - 1) + se_b ** 2 / (n_b - 1))
+        t_stats = (mean_a - mean_b) / se
+    from scipy import stats
+    p_values = 2 * stats.t.sf(np.abs(t_stats), dof)
+    return t_stats, p_values
+
+
 def perform_chi_square_tests(df_processed, categorical_cols):
     """
     Perform chi-square tests for categorical variables against churn.
@@ -62,7 +156,7 @@ def perform_chi_square_tests(df_processed, categorical_cols):
         Preprocessed dataframe
     categorical_cols : list
         List of categorical column names
-        
+    
     Returns:
     --------
     pd.DataFrame
@@ -74,29 +168,7 @@ def perform_chi_square_tests(df_processed, categorical_cols):
     print("\nTesting independence between categorical features and churn:")
     print("-" * 60)
     
-    results = []
-    for col in categorical_cols:
-        contingency_table = pd.crosstab(df_processed[col], df_processed['churn_flag'])
-        chi2, p_value, dof, expected = stats.chi2_contingency(contingency_table)
-        
-        # Cramér's V for effect size
-        n = contingency_table.sum().sum()
-        min_dim = min(contingency_table.shape) - 1
-        cramers_v = np.sqrt(chi2 / (n * min_dim)) if min_dim > 0 else 0
-        
-        significance = "***" if p_value < 0.001 else "**" if p_value < 0.01 else "*" if p_value < 0.05 else ""
-        effect_size = 'Large' if cramers_v > 0.25 else 'Medium' if cramers_v > 0.1 else 'Small'
-        
-        results.append({
-            'Feature': col,
-            'Chi-Square': round(chi2, 2),
-            'P-Value': f"{p_value:.2e}",
-            "Cramér's V": round(cramers_v, 4),
-            'Effect Size': effect_size,
-            'Sig': significance
-        })
-    
-    results_df = pd.DataFrame(results)
+    results_df = ContingencyAccumulator(categorical_cols).update(df_processed).chi_square_results()
     print(results_df.to_string(index=False))
     print("\n*** p < 0.001, ** p < 0.01, * p < 0.05")
     print("Cramér's V: Small < 0.1, Medium 0.1-0.25, Large > 0.25")
@@ -104,6 +176,134 @@ def perform_chi_square_tests(df_processed, categorical_cols):
     return results_df
 
 
+def contingency_tables(df, cols, target_col='churn_flag'):
+    """
+    Build category × target contingency tables for many columns in one sweep.
+    
+    Each column is reduced to integer codes, the (column, category, target)
+    triples are offset into one shared index space and counted with a single
+    np.bincount. Rows with a missing category or target are dropped, as in
+    pd.crosstab.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe with the columns and the target column
+    cols : list
+        Categorical (or flag) column names
+    target_col : str
+        Target column
+    
+    Returns:
+    --------
+    dict
+        Column name -> pd.DataFrame of counts (categories × target values)
+    """
+    target_codes, target_labels = pd.factorize(df[target_col], sort=True)
+    cat_codes, levels = _category_codes(df, cols)
+    sizes = [len(uniques) for uniques in levels]
+    counts = _contingency_counts(cat_codes, sizes, target_codes, len(target_labels))[0]
+    offsets = np.cumsum([0] + sizes)
+    
+    tables = {}
+    for i, col in enumerate(cols):
+        tables[col] = pd.DataFrame(counts[offsets[i]:offsets[i + 1]], index=pd.Index(levels[i], name=col),
+                                   columns=pd.Index(target_labels, name=target_col))
+    return tables
+
+
+def _category_codes(df, cols):
+    """Integer codes (-1 for missing) and sorted levels of each column."""
+    cat_codes, levels = [], []
+    for col in cols:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values, sort=True)
+        cat_codes.append(codes.astype(np.int64))
+        levels.append(uniques)
+    return cat_codes, levels
+
+
+def _contingency_counts(cat_codes, sizes, target_codes, n_targets, group_codes=None, n_groups=1):
+    """
+    Category × target counts of many columns (and groups) from one bincount.
+    
+    Returns an array of shape (n_groups, sum(sizes), n_targets); rows with a
+    missing category, target or group (code -1) are not counted.
+    """
+    n_levels = int(np.sum(sizes))
+    if group_codes is None:
+        group_codes = np.zeros(len(target_codes), dtype=np.int64)
+    
+    keys, offset = [], 0
+    for codes, size in zip(cat_codes, sizes):
+        valid = (codes >= 0) & (target_codes >= 0) & (group_codes >= 0)
+        keys.append(((group_codes[valid] * n_levels + offset + codes[valid]) * n_targets
+                     + target_codes[valid]).astype(np.int64))
+        offset += size
+    
+    n_cells = n_groups * n_levels * n_targets
+    counts = np.bincount(np.concatenate(keys), minlength=n_cells) if keys else np.zeros(n_cells, dtype=np.int64)
+    return counts.reshape(n_groups, n_levels, n_targets)
+
+
+def chi_square_from_tables(tables):
+    """
+    Chi-square tests of independence for many contingency tables at once.
+    
+    Tables are zero-padded into one 3-d array. Empty rows and columns are
+    ignored, and Yates' continuity correction is applied to tables with one
+    degree of freedom, as scipy.stats.chi2_contingency does by default.
+    
+    Parameters:
+    -----------
+    tables : list
+        Contingency tables (2-d arrays or dataframes of counts)
+    
+    Returns:
+    --------
+    tuple
+        chi-square statistics, p-values, degrees of freedom, Cramér's V
+    """
+    tables = [np.asarray(table, dtype=np.float64) for table in tables]
+    if not tables:
+        return (np.array([]),) * 4
+    
+    n_rows = max(table.shape[0] for table in tables)
+    n_cols = max(table.shape[1] for table in tables)
+    observed = np.zeros((len(tables), n_rows, n_cols))
+    for i, table in enumerate(tables):
+        observed[i, :table.shape[0], :table.shape[1]] = table
+    
+    row_sums = observed.sum(axis=2, keepdims=True)
+    col_sums = observed.sum(axis=1, keepdims=True)
+    n = observed.sum(axis=(1, 2))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = row_sums * col_sums / n[:, None, None]
+    
+    r = (row_sums[:, :, 0] > 0).sum(axis=1)
+    c = (col_sums[:, 0, :] > 0).sum(axis=1)
+    dof = np.maximum(r - 1, 0) * np.maximum(c - 1, 0)
+    
+    # Yates' continuity correction for 2x2 tables
+    diff = expected - observed
+    correction = np.sign(diff) * np.minimum(0.5, np.abs(diff))
+    observed = observed + np.where((dof == 1)[:, None, None], correction, 0.0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        terms = np.where(expected > 0, (observed - expected) ** 2 / expected, 0.0)
+    chi2 = terms.sum(axis=(1, 2))
+    from scipy import stats
+    p_values = np.where(dof > 0, stats.chi2.sf(chi2, np.maximum(dof, 1)), 1.0)
+    
+    min_dim = np.minimum(r, c) - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cramers_v = np.where(min_dim > 0, np.sqrt(chi2 / (n * min_dim)), 0.0)
+    return chi2, p_values, dof, cramers_v
+
+
 def calculate_mean_comparison(df_processed, numerical_cols):
     """
     Calculate and display mean values comparison between churned and non-churned.
@@ -114,7 +314,7 @@ def calculate_mean_comparison(df_processed, numerical_cols):
         Preprocessed dataframe
     numerical_cols : list
         List of numerical column names
-        
+    
     Returns:
     --------
     pd.DataFrame
@@ -124,16 +324,1011 @@ def calculate_mean_comparison(df_processed, numerical_cols):
     print("MEAN VALUES BY CHURN STATUS")
     print("=" * 60)
     
-    mean_by_churn = df_processed.groupby('churn_flag')[numerical_cols].mean()
-    mean_comparison = pd.DataFrame({
-        'Feature': numerical_cols,
-        'Non-Churned (Mean)': mean_by_churn.loc[0].values,
-        'Churned (Mean)': mean_by_churn.loc[1].values,
-        'Difference': mean_by_churn.loc[1].values - mean_by_churn.loc[0].values,
-        'Diff %': ((mean_by_churn.loc[1].values - mean_by_churn.loc[0].values) / mean_by_churn.loc[0].values * 100)
-    })
-    mean_comparison = mean_comparison.round(2)
+    mean_comparison = MomentAccumulator(numerical_cols).update(df_processed).mean_comparison()
     print(mean_comparison.to_string(index=False))
     
     return mean_comparison
 
+
+# =============================================================================
+# MERGEABLE ACCUMULATORS FOR CHUNKED OR DISTRIBUTED DATA
+# =============================================================================
+
+class MomentAccumulator:
+    """
+    Per-group count, mean and M2 of numerical columns, updated chunk by chunk.
+    
+    Accumulators built on different chunks or in different processes are
+    combined with merge() (Chan et al. parallel update), and finalize into
+    the same tables as perform_ttest and calculate_mean_comparison.
+    
+    Parameters:
+    -----------
+    cols : list
+        Numerical column names
+    group_col : str
+        Column defining the groups (churned = 1, retained = 0)
+    """
+    
+    def __init__(self, cols, group_col='churn_flag'):
+        self.cols = list(cols)
+        self.group_col = group_col
+        self.labels = pd.Index([])
+        self.n = np.zeros((0, len(self.cols)))
+        self.mean = np.zeros((0, len(self.cols)))
+        self.m2 = np.zeros((0, len(self.cols)))
+    
+    def update(self, df):
+        """Fold in a chunk of rows; returns self."""
+        self._combine(*group_moments(df, self.cols, self.group_col))
+        return self
+    
+    def merge(self, other):
+        """Fold in another accumulator over the same columns; returns self."""
+        self._combine(other.labels, other.n, other.mean, other.m2)
+        return self
+    
+    def _combine(self, labels, n, mean, m2):
+        all_labels = self.labels.union(labels)
+        n_a, mean_a, m2_a = self._aligned(all_labels, self.labels, self.n, self.mean, self.m2)
+        n_b, mean_b, m2_b = self._aligned(all_labels, labels, n, mean, m2)
+        
+        total = n_a + n_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean_b - mean_a
+            combined_mean = np.where(n_a == 0, mean_b, np.where(n_b == 0, mean_a, mean_a + delta * n_b / total))
+            correction = np.where((n_a > 0) & (n_b > 0), delta ** 2 * n_a * n_b / total, 0.0)
+        
+        self.labels, self.n = all_labels, total
+        self.mean = combined_mean
+        self.m2 = m2_a + m2_b + correction
+    
+    def _aligned(self, all_labels, labels, n, mean, m2):
+        """Expand moment arrays to all_labels, with empty groups for missing labels."""
+        shape = (len(all_labels), len(self.cols))
+        out_n, out_mean, out_m2 = np.zeros(shape), np.full(shape, np.nan), np.zeros(shape)
+        if len(labels):
+            rows = all_labels.get_indexer(labels)
+            out_n[rows] = n
+            out_mean[rows] = np.where(n > 0, mean, np.nan)
+            out_m2[rows] = np.where(n > 0, m2, 0.0)
+        return out_n, out_mean, out_m2
+    
+    def ttest_results(self, equal_var=True):
+        """Churned vs retained t-tests, in the format of perform_ttest."""
+        churned, retained = self.labels.get_loc(1), self.labels.get_loc(0)
+        t_stats, p_values = ttest_from_moments(self.n[churned], self.mean[churned], self.m2[churned],
+                                               self.n[retained], self.mean[retained], self.m2[retained],
+                                               equal_var=equal_var)
+        
+        results = []
+        for col, t_stat, p_value in zip(self.cols, t_stats, p_values):
+            significance = "***" if p_value < 0.001 else "**" if p_value < 0.01 else "*" if p_value < 0.05 else ""
+            
+            results.append({
+                'Feature': col,
+                'T-Statistic': round(t_stat, 3),
+                'P-Value': f"{p_value:.2e}",
+                'Significant': significance
+            })
+        
+        return pd.DataFrame(results)
+    
+    def mean_comparison(self):
+        """Group means side by side, in the format of calculate_mean_comparison."""
+        churned = self.mean[self.labels.get_loc(1)]
+        retained = self.mean[self.labels.get_loc(0)]
+        mean_comparison = pd.DataFrame({
+            'Feature': self.cols,
+            'Non-Churned (Mean)': retained,
+            'Churned (Mean)': churned,
+            'Difference': churned - retained,
+            'Diff %': (churned - retained) / retained * 100
+        })
+        return mean_comparison.round(2)
+
+
+class ContingencyAccumulator:
+    """
+    Category × target counts for categorical columns, updated chunk by chunk.
+    
+    Accumulators built on different chunks or in different processes are
+    combined with merge(), and finalize into the same table as
+    perform_chi_square_tests.
+    
+    Parameters:
+    -----------
+    cols : list
+        Categorical (or flag) column names
+    target_col : str
+        Target column
+    """
+    
+    def __init__(self, cols, target_col='churn_flag'):
+        self.cols = list(cols)
+        self.target_col = target_col
+        self.tables = {}
+    
+    def update(self, df):
+        """Fold in a chunk of rows; returns self."""
+        self._combine(contingency_tables(df, self.cols, self.target_col))
+        return self
+    
+    def merge(self, other):
+        """Fold in another accumulator over the same columns; returns self."""
+        self._combine(other.tables)
+        return self
+    
+    def _combine(self, tables):
+        for col, table in tables.items():
+            if col in self.tables:
+                table = self.tables[col].add(table, fill_value=0).fillna(0).astype(np.int64)
+            self.tables[col] = table.sort_index().sort_index(axis=1)
+    
+    def chi_square_results(self):
+        """Chi-square tests against the target, in the format of perform_chi_square_tests."""
+        chi2_values, p_values, dofs, cramers_vs = chi_square_from_tables(
+            [self.tables[col] for col in self.cols])
+        
+        results = []
+        for col, chi2, p_value, cramers_v in zip(self.cols, chi2_values, p_values, cramers_vs):
+            significance = "***" if p_value < 0.001 else "**" if p_value < 0.01 else "*" if p_value < 0.05 else ""
+            effect_size = 'Large' if cramers_v > 0.25 else 'Medium' if cramers_v > 0.1 else 'Small'
+            
+            results.append({
+                'Feature': col,
+                'Chi-Square': round(chi2, 2),
+                'P-Value': f"{p_value:.2e}",
+                "Cramér's V": round(cramers_v, 4),
+                'Effect Size': effect_size,
+                'Sig': significance
+            })
+        
+        return pd.DataFrame(results)
+
+
+
+class CovarianceAccumulator:
+    """
+    Pairwise-complete co-moments of numerical columns, updated chunk by chunk.
+    
+    For every pair of columns the accumulator keeps the count, means and
+    co-moments over the rows where both values are present, so the result
+    matches pandas' pairwise NaN handling. Chunks are converted to float64
+    one at a time (float32 inputs are never copied in full), and partial
+    accumulators are combined with merge() (Chan et al. update).
+    
+    Parameters:
+    -----------
+    cols : list
+        Numerical column names
+    """
+    
+    def __init__(self, cols):
+        self.cols = list(cols)
+        k = len(self.cols)
+        self.n = np.zeros((k, k))
+        self.mean = np.zeros((k, k))    # mean[i, j]: mean of column i over rows where i and j are present
+        self.m2 = np.zeros((k, k))      # m2[i, j]: squared deviations of column i over those rows
+        self.comoment = np.zeros((k, k))
+    
+    def update(self, df, chunksize=CORRELATION_CHUNKSIZE):
+        """Fold in the rows of df, chunksize rows at a time; returns self."""
+        columns = [df[col].to_numpy() for col in self.cols]
+        for start in range(0, len(df), chunksize):
+            values = np.column_stack([col[start:start + chunksize] for col in columns]).astype(np.float64)
+            self._combine(*self._chunk_moments(values))
+        return self
+    
+    def merge(self, other):
+        """Fold in another accumulator over the same columns; returns self."""
+        self._combine(other.n, other.mean, other.m2, other.comoment)
+        return self
+    
+    @staticmethod
+    def _chunk_moments(values):
+        valid = ~np.isnan(values)
+        counts = valid.sum(axis=0)
+        shift = np.where(counts > 0, np.where(valid, values, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+        values = np.where(valid, values - shift, 0.0)
+        present = valid.astype(np.float64)
+        
+        n = present.T @ present
+        sums = values.T @ present              # sums[i, j]: sum of column i where j is present
+        squares = (values * values).T @ present
+        products = values.T @ values
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = np.where(n > 0, sums / n, 0.0)
+            m2 = np.maximum(squares - sums * delta, 0.0)
+            comoment = products - sums * delta.T
+        return n, shift[:, None] + delta, m2, comoment
+    
+    def _combine(self, n, mean, m2, comoment):
+        total = self.n + n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, self.n * n / total, 0.0)
+            share = np.where(total > 0, n / total, 0.0)
+        delta = np.where((self.n > 0) & (n > 0), mean - self.mean, 0.0)
+        
+        self.mean = np.where(self.n > 0, self.mean + delta * share, mean)
+        self.m2 = self.m2 + m2 + delta * delta * weight
+        self.comoment = self.comoment + comoment + delta * delta.T * weight
+        self.n = total
+    
+    def covariance(self):
+        """Pairwise-complete sample covariance matrix."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = np.where(self.n > 1, self.comoment / (self.n - 1), np.nan)
+        return pd.DataFrame(cov, index=self.cols, columns=self.cols)
+    
+    def correlation(self):
+        """Pairwise-complete Pearson correlation matrix."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        corr = np.where(self.n > 1, np.clip(corr, -1.0, 1.0), np.nan)
+        return pd.DataFrame(corr, index=self.cols, columns=self.cols)
+
+
+# Correlation matrices by (data fingerprint, columns, method), most recent last
+_CORRELATION_CACHE = OrderedDict()
+_CORRELATION_CACHE_SIZE = 8
+
+
+def correlation_matrix(df, cols, method='pearson', chunksize=CORRELATION_CHUNKSIZE, use_cache=True):
+    """
+    Pairwise-complete correlation matrix, streamed in chunks and cached.
+    
+    Equivalent to df[cols].corr(method) for 'pearson' and 'spearman'.
+    Results are cached in memory by a fingerprint of the data, so repeated
+    calls on unchanged data return the stored matrix.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe with the columns
+    cols : list
+        Numerical column names
+    method : str
+        'pearson' or 'spearman'
+    chunksize : int
+        Rows converted to float64 at a time
+    use_cache : bool
+        Reuse (and store) the matrix for identical data
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Correlation matrix
+    """
+    if method not in ('pearson', 'spearman'):
+        raise ValueError(f"Unknown method '{method}' (use 'pearson' or 'spearman')")
+    cols = list(cols)
+    
+    key = (data_fingerprint(df, cols), tuple(cols), method) if use_cache else None
+    if key in _CORRELATION_CACHE:
+        _CORRELATION_CACHE.move_to_end(key)
+        return _CORRELATION_CACHE[key].copy()
+    
+    if method == 'pearson':
+        corr = CovarianceAccumulator(cols).update(df, chunksize).correlation()
+    else:
+        corr = _spearman_matrix(df, cols, chunksize)
+    
+    if use_cache:
+        _CORRELATION_CACHE[key] = corr.copy()
+        while len(_CORRELATION_CACHE) > _CORRELATION_CACHE_SIZE:
+            _CORRELATION_CACHE.popitem(last=False)
+    return corr
+
+
+def _spearman_matrix(df, cols, chunksize):
+    """
+    Spearman correlations: Pearson on average ranks.
+    
+    Ranking needs whole columns, so only the co-moments are streamed. Pairs
+    involving a column with missing values are re-ranked on the rows where
+    both values are present, as pandas does; each column is sorted once and
+    re-ranked on a subset in linear time.
+    """
+    values = {col: df[col].to_numpy(dtype=np.float64) for col in cols}
+    present = {col: ~np.isnan(values[col]) for col in cols}
+    orders = {}
+    for col in cols:
+        order = np.argsort(values[col], kind='stable')
+        sorted_values = values[col][order]
+        tie_start = np.ones(len(order), dtype=bool)
+        tie_start[1:] = sorted_values[1:] != sorted_values[:-1]
+        orders[col] = (order, tie_start)
+    
+    ranks = pd.DataFrame({col: _subset_ranks(*orders[col], present[col]) for col in cols})
+    corr = CovarianceAccumulator(cols).update(ranks, chunksize).correlation()
+    
+    # Pairs sharing the same columns with missing values share a row subset,
+    # so they are re-ranked and accumulated together
+    has_nan = [col for col in cols if not present[col].all()]
+    pairs_by_subset = {}
+    for i, col_a in enumerate(cols):
+        for col_b in cols[i + 1:]:
+            subset = tuple(col for col in has_nan if col in (col_a, col_b))
+            if subset:
+                pairs_by_subset.setdefault(subset, []).append((col_a, col_b))
+    
+    for subset, pairs in pairs_by_subset.items():
+        rows = np.logical_and.reduce([present[col] for col in subset])
+        pair_cols = list(dict.fromkeys(col for pair in pairs for col in pair))
+        subset_ranks = pd.DataFrame({col: _subset_ranks(*orders[col], rows) for col in pair_cols})
+        subset_corr = CovarianceAccumulator(pair_cols).update(subset_ranks, chunksize).correlation()
+        for col_a, col_b in pairs:
+            corr.loc[col_a, col_b] = corr.loc[col_b, col_a] = subset_corr.loc[col_a, col_b]
+    return corr
+
+
+def _subset_ranks(order, tie_start, mask):
+    """Average ranks of a column among the rows in mask (NaN elsewhere), from its sort order."""
+    in_subset = mask[order].astype(np.float64)
+    before = np.cumsum(in_subset) - in_subset
+    group = np.cumsum(tie_start) - 1
+    group_count = np.bincount(group, weights=in_subset)
+    
+    ranks = np.full(len(order), np.nan)
+    ranks[order] = before[tie_start][group] + (group_count[group] + 1) / 2
+    ranks[~mask] = np.nan
+    return ranks
+
+
+# =============================================================================
+# RESAMPLING (PERMUTATION / BOOTSTRAP) TESTS
+# =============================================================================
+
+# Arrays shared with worker processes, set once per process by the pool initializer
+_WORKER_DATA = {}
+
+
+class _SharedArray:
+    """An array of the worker data written to a .npy file for the workers to memory-map."""
+    
+    def __init__(self, path):
+        self.path = path
+
+
+def _share(value, path):
+    """Write the arrays in value (an array or a list of them) under path; other values are kept."""
+    if isinstance(value, np.ndarray):
+        np.save(f'{path}.npy', value)
+        return _SharedArray(f'{path}.npy')
+    if isinstance(value, list):
+        return [_share(item, f'{path}_{i}') for i, item in enumerate(value)]
+    return value
+
+
+def _unshare(value):
+    if isinstance(value, _SharedArray):
+        return np.load(value.path, mmap_mode='r')
+    if isinstance(value, list):
+        return [_unshare(item) for item in value]
+    return value
+
+
+def _init_worker(data):
+    _WORKER_DATA.clear()
+    _WORKER_DATA.update({key: _unshare(value) for key, value in data.items()})
+
+
+@contextlib.contextmanager
+def _process_pool(n_jobs, data):
+    """
+    Process pool whose workers hold data.
+    
+    Workers are spawned rather than forked, as in models.train_models: the
+    tests run next to other pipeline stages, and forking a process while
+    other threads run can deadlock the child. The arrays of data are passed
+    as memory-mapped .npy files instead of being pickled to every worker.
+    """
+    with tempfile.TemporaryDirectory(prefix='resample_') as data_dir:
+        shared = {key: _share(value, os.path.join(data_dir, key)) for key, value in data.items()}
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(shared,)) as executor:
+            yield executor
+
+
+def _categorical_onehot(df, categorical_cols):
+    """One-hot block per categorical column (missing values get no column), plus block sizes."""
+    blocks, sizes = [], []
+    for col in categorical_cols:
+        codes, uniques = pd.factorize(df[col], sort=True)
+        onehot = np.zeros((len(codes), len(uniques)))
+        keep = codes >= 0
+        onehot[np.flatnonzero(keep), codes[keep]] = 1.0
+        blocks.append(onehot)
+        sizes.append(len(uniques))
+    return blocks, np.array(sizes, dtype=np.int64)
+
+
+def _permutation_data(df, numerical_cols, categorical_cols, target_col):
+    """
+    Design matrix and margins for the permutation test.
+    
+    A batch of permuted label vectors L (one row per replicate) yields every
+    statistic from one product L @ design: churned sums of each numerical
+    column, churned non-missing counts (only for columns with NaNs) and
+    churned counts per category of each categorical column.
+    """
+    target = df[target_col].to_numpy(dtype=np.float64)
+    values = df[numerical_cols].to_numpy(dtype=np.float64, copy=True)
+    valid = ~np.isnan(values)
+    values[~valid] = 0.0
+    nan_cols = np.flatnonzero(~valid.all(axis=0))
+    
+    onehots, block_sizes = _categorical_onehot(df, categorical_cols)
+    design = np.hstack([values, valid[:, nan_cols].astype(np.float64)] + onehots)
+    
+    data = {
+        'target': target,
+        'design': design,
+        'n_numerical': len(numerical_cols),
+        'nan_cols': nan_cols,
+        'n_churned': target.sum(),
+        'totals': design.sum(axis=0),
+        'n_valid': valid.sum(axis=0).astype(np.float64),
+        'block_sizes': block_sizes,
+        'block_starts': np.concatenate([[0], np.cumsum(block_sizes)[:-1]]).astype(np.int64),
+    }
+    data['observed'] = _permutation_statistics(target[None, :] @ design, data)[0]
+    return data
+
+
+def _permutation_statistics(sums, data):
+    """Mean differences (churned - retained) and chi-square statistics from churned sums."""
+    n_num, nan_cols = data['n_numerical'], data['nan_cols']
+    totals = data['totals']
+    
+    s1 = sums[:, :n_num]
+    n1 = np.full(s1.shape, data['n_churned'])
+    n1[:, nan_cols] = sums[:, n_num:n_num + len(nan_cols)]
+    n0 = data['n_valid'] - n1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_diff = s1 / n1 - (totals[:n_num] - s1) / n0
+    
+    offset = n_num + len(nan_cols)
+    if not len(data['block_sizes']):
+        return mean_diff
+    
+    # Pearson chi-square of each 2 x k table; the churned margin of a column
+    # varies across replicates when that column has missing values
+    starts, sizes = data['block_starts'], data['block_sizes']
+    observed_1 = sums[:, offset:]
+    cat_totals = totals[offset:]
+    churned_total = np.repeat(np.add.reduceat(observed_1, starts, axis=1), sizes, axis=1)
+    col_total = np.repeat(np.add.reduceat(cat_totals, starts), sizes)
+    expected_1 = cat_totals * churned_total / col_total
+    expected_0 = cat_totals - expected_1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        terms = ((observed_1 - expected_1) ** 2 / expected_1
+                 + ((cat_totals - observed_1) - expected_0) ** 2 / expected_0)
+    chi2 = np.add.reduceat(np.nan_to_num(terms), starts, axis=1)
+    return np.hstack([mean_diff, chi2])
+
+
+def _permutation_batch(seed_seq, batch_size):
+    """Statistics for one batch of label permutations."""
+    data = _WORKER_DATA
+    rng = np.random.default_rng(seed_seq)
+    n_rows, n_churned = len(data['target']), int(data['n_churned'])
+    
+    # A uniformly drawn subset of rows for the smaller group is a permutation
+    # of the labels, and much cheaper to draw than shuffling every row
+    flip = n_churned > n_rows / 2
+    n_marked = n_rows - n_churned if flip else n_churned
+    labels = np.full((batch_size, n_rows), float(flip))
+    for row in labels:
+        row[rng.choice(n_rows, n_marked, replace=False, shuffle=False)] = float(not flip)
+    return _permutation_statistics(labels @ data['design'], data)
+
+
+def _bootstrap_data(df, numerical_cols, target_col):
+    """
+    Design matrix for the bootstrap.
+    
+    With a batch of row weights W (how often each row is drawn), W @ design gives weighted sums
+    and weighted non-missing counts of every column within each group.
+    """
+    churned = df[target_col].to_numpy(dtype=np.float64)[:, None]
+    retained = 1.0 - churned
+    values = df[numerical_cols].to_numpy(dtype=np.float64, copy=True)
+    valid = ~np.isnan(values)
+    values[~valid] = 0.0
+    valid = valid.astype(np.float64)
+    
+    design = np.hstack([values * churned, values * retained, valid * churned, valid * retained])
+    n_num = len(numerical_cols)
+    data = {'design': design, 'n_numerical': n_num}
+    data['observed'] = _bootstrap_statistics(np.ones((1, len(design))) @ design, n_num)[0]
+    return data
+
+
+def _bootstrap_statistics(sums, n_num):
+    s1, s0, n1, n0 = (sums[:, i * n_num:(i + 1) * n_num] for i in range(4))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return s1 / n1 - s0 / n0
+
+
+def _bootstrap_batch(seed_seq, batch_size):
+    """Mean differences for one batch of bootstrap replicates."""
+    data = _WORKER_DATA
+    rng = np.random.default_rng(seed_seq)
+    n_rows = len(data['design'])
+    weights = np.empty((batch_size, n_rows))
+    for row in weights:
+        row[:] = np.bincount(rng.integers(0, n_rows, n_rows), minlength=n_rows)
+    return _bootstrap_statistics(weights @ data['design'], data['n_numerical'])
+
+
+def _wilson_interval(p, m, z=2.576):
+    """Wilson score interval for a proportion p estimated from m draws."""
+    denom = 1 + z ** 2 / m
+    center = (p + z ** 2 / (2 * m)) / denom
+    half = z * np.sqrt(p * (1 - p) / m + z ** 2 / (4 * m ** 2)) / denom
+    return center - half, center + half
+
+
+def _run_resampling(batch_fn, data, p_value_fn, n_resamples, batch_size, alpha,
+                    n_jobs, seed, early_stopping, check_every=8):
+    """
+    Drive batched resampling, optionally over a process pool, with early stopping.
+    
+    Batch i always draws from the i-th child of SeedSequence(seed) and batches
+    are checked in fixed rounds of check_every, so results do not depend on
+    n_jobs. After each round, a statistic stops collecting replicates once the
+    99% interval of its p-value lies entirely above or below alpha.
+    
+    Returns:
+    --------
+    tuple
+        p-values (array) and the replicates of each statistic (list of arrays)
+    """
+    n_batches = -(-n_resamples // batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    sizes = [batch_size] * (n_batches - 1) + [n_resamples - batch_size * (n_batches - 1)]
+    
+    n_stats = len(data['observed'])
+    replicates = [[] for _ in range(n_stats)]
+    active = np.ones(n_stats, dtype=bool)
+    p_values = np.ones(n_stats)
+    
+    # Workers come from the shared core budget (results do not depend on how many)
+    n_jobs = CORES.acquire(n_jobs)
+    pool = contextlib.ExitStack()
+    if n_jobs > 1:
+        run = pool.enter_context(_process_pool(n_jobs, data)).map
+    else:
+        _init_worker(data)
+        run = map
+    
+    try:
+        for start in range(0, n_batches, check_every):
+            stop = min(start + check_every, n_batches)
+            stats_round = np.vstack(list(run(batch_fn, seeds[start:stop], sizes[start:stop])))
+            for j in np.flatnonzero(active):
+                replicates[j].append(stats_round[:, j])
+                reps = np.concatenate(replicates[j])
+                replicates[j] = [reps]
+                p_values[j] = p_value_fn(reps, j)
+                if early_stopping:
+                    lower, upper = _wilson_interval(p_values[j], len(reps))
+                    active[j] = lower <= alpha <= upper
+            if not active.any():
+                break
+    finally:
+        pool.close()
+        _WORKER_DATA.clear()
+        CORES.release(n_jobs)
+    
+    return p_values, [reps[0] for reps in replicates]
+
+
+def permutation_test(df_processed, numerical_cols=(), categorical_cols=(), target_col='churn_flag',
+                     n_resamples=N_RESAMPLES, alpha=ALPHA, n_jobs=1, batch_size=RESAMPLE_BATCH_SIZE,
+                     seed=RESAMPLE_SEED, early_stopping=True):
+    """
+    Permutation tests of churned vs non-churned customers.
+    
+    Numerical columns are tested on the difference in means and categorical
+    columns on the Pearson chi-square statistic, all from the same permuted
+    labels. Unlike perform_ttest, no distributional assumption is made, which
+    matters for heavy-tailed engagement metrics.
+    
+    Parameters:
+    -----------
+    df_processed : pd.DataFrame
+        Preprocessed dataframe
+    numerical_cols : list
+        Numerical column names
+    categorical_cols : list
+        Categorical (or flag) column names
+    target_col : str
+        Binary target column
+    n_resamples : int
+        Maximum number of permutations
+    alpha : float
+        Significance level used for early stopping and the Significant column
+    n_jobs : int
+        Worker processes (-1 for all free cores of the shared budget)
+    batch_size : int
+        Permutations generated and reduced together in one matrix product
+    seed : int
+        Seed of the random streams (results are reproducible for any n_jobs)
+    early_stopping : bool
+        Stop resampling a feature once its p-value is clearly above or below alpha
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Observed statistic, permutation p-value and replicates used per feature
+    """
+    numerical_cols, categorical_cols = list(numerical_cols), list(categorical_cols)
+    df = df_processed[df_processed[target_col].notna()]
+    data = _permutation_data(df, numerical_cols, categorical_cols, target_col)
+    threshold = np.abs(data['observed']) * (1 - 1e-9)
+    
+    def p_value(reps, j):
+        return (np.sum(np.abs(reps) >= threshold[j]) + 1) / (len(reps) + 1)
+    
+    p_values, replicates = _run_resampling(_permutation_batch, data, p_value, n_resamples, batch_size,
+                                           alpha, n_jobs, seed, early_stopping)
+    
+    tests = ['Mean Diff'] * len(numerical_cols) + ['Chi-Square'] * len(categorical_cols)
+    results = []
+    for col, test, observed, p_val, reps in zip(numerical_cols + categorical_cols, tests,
+                                                 data['observed'], p_values, replicates):
+        results.append({
+            'Feature': col,
+            'Test': test,
+            'Observed': round(observed, 4),
+            'P-Value': f"{p_val:.2e}",
+            'Replicates': len(reps),
+            'Significant': "*" if p_val < alpha else ""
+        })
+    return pd.DataFrame(results)
+
+
+def bootstrap_test(df_processed, numerical_cols, target_col='churn_flag', confidence=0.95,
+                   n_resamples=N_RESAMPLES, alpha=ALPHA, n_jobs=1, batch_size=RESAMPLE_BATCH_SIZE,
+                   seed=RESAMPLE_SEED, early_stopping=True):
+    """
+    Bootstrap of the churned - non-churned difference in means.
+    
+    Each replicate is expressed as row weights (how often each row is drawn),
+    so a batch of replicates is one matrix product and no rows are copied.
+    
+    Parameters:
+    -----------
+    df_processed : pd.DataFrame
+        Preprocessed dataframe
+    numerical_cols : list
+        Numerical column names
+    target_col : str
+        Binary target column
+    confidence : float
+        Level of the percentile confidence interval
+    n_resamples, alpha, n_jobs, batch_size, seed, early_stopping :
+        As for permutation_test
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Observed difference, percentile interval, bootstrap p-value and
+        replicates used per feature
+    """
+    numerical_cols = list(numerical_cols)
+    df = df_processed[df_processed[target_col].notna()]
+    data = _bootstrap_data(df, numerical_cols, target_col)
+    
+    def p_value(reps, j):
+        tail = min(np.sum(reps <= 0), np.sum(reps >= 0))
+        return min(1.0, 2 * (tail + 1) / (len(reps) + 1))
+    
+    p_values, replicates = _run_resampling(_bootstrap_batch, data, p_value, n_resamples, batch_size,
+                                           alpha, n_jobs, seed, early_stopping)
+    
+    tail = (1 - confidence) / 2 * 100
+    results = []
+    for col, observed, p_val, reps in zip(numerical_cols, data['observed'], p_values, replicates):
+        lower, upper = np.nanpercentile(reps, [tail, 100 - tail])
+        results.append({
+            'Feature': col,
+            'Mean Diff': round(observed, 4),
+            'CI Lower': round(lower, 4),
+            'CI Upper': round(upper, 4),
+            'P-Value': f"{p_val:.2e}",
+            'Replicates': len(reps),
+            'Significant': "*" if p_val < alpha else ""
+        })
+    return pd.DataFrame(results)
+
+
+def perform_resampling_tests(df_processed, numerical_cols, categorical_cols, **kwargs):
+    """
+    Run and print permutation and bootstrap tests.
+    
+    Parameters:
+    -----------
+    df_processed : pd.DataFrame
+        Preprocessed dataframe
+    numerical_cols : list
+        Numerical column names
+    categorical_cols : list
+        Categorical (or flag) column names
+    **kwargs :
+        Passed to permutation_test and bootstrap_test (n_resamples, n_jobs, ...)
+    
+    Returns:
+    --------
+    tuple
+        Permutation results, bootstrap results
+    """
+    print("=" * 60)
+    print("RESAMPLING TESTS (PERMUTATION / BOOTSTRAP)")
+    print("=" * 60)
+    alpha = kwargs.get('alpha', ALPHA)
+    
+    print("\nPermutation tests (churned vs non-churned labels shuffled):")
+    print("-" * 60)
+    permutation_results = permutation_test(df_processed, numerical_cols, categorical_cols, **kwargs)
+    print(permutation_results.to_string(index=False))
+    
+    print("\nBootstrap of the difference in means:")
+    print("-" * 60)
+    bootstrap_results = bootstrap_test(df_processed, numerical_cols, **kwargs)
+    print(bootstrap_results.to_string(index=False))
+    print(f"\n* p < {alpha}; features stop resampling once clearly above or below alpha")
+    
+    return permutation_results, bootstrap_results
+
+
+# =============================================================================
+# SEGMENTED TESTING WITH MULTIPLE-TESTING CORRECTION
+# =============================================================================
+
+def adjust_pvalues(p_values, method='fdr_bh'):
+    """
+    Adjust p-values for multiple testing.
+    
+    Parameters:
+    -----------
+    p_values : array-like
+        Raw p-values; NaNs (tests that could not be run) are left out of the
+        family and stay NaN
+    method : str
+        'fdr_bh' (Benjamini-Hochberg), 'holm' or 'bonferroni'
+    
+    Returns:
+    --------
+    np.ndarray
+        Adjusted p-values, capped at 1
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full(p_values.shape, np.nan)
+    tested = ~np.isnan(p_values)
+    m = tested.sum()
+    if m == 0:
+        return adjusted
+    
+    order = np.argsort(p_values[tested], kind='stable')
+    ranked = p_values[tested][order]
+    rank = np.arange(1, m + 1)
+    if method == 'fdr_bh':
+        ranked = np.minimum.accumulate((ranked * m / rank)[::-1])[::-1]
+    elif method == 'holm':
+        ranked = np.maximum.accumulate(ranked * (m - rank + 1))
+    elif method == 'bonferroni':
+        ranked = ranked * m
+    else:
+        raise ValueError(f"Unknown method '{method}' (use 'fdr_bh', 'holm' or 'bonferroni')")
+    
+    result = np.empty(m)
+    result[order] = np.minimum(ranked, 1.0)
+    adjusted[tested] = result
+    return adjusted
+
+
+def _segment_statistics(row_start, row_stop, segment_start, segment_stop):
+    """
+    Sufficient statistics of a range of segments (rows sorted by segment when
+    the range is a partition): moments per segment × target and contingency
+    counts per segment × category × target.
+    """
+    data = _WORKER_DATA
+    rows = slice(row_start, row_stop)
+    n_segments, n_targets = segment_stop - segment_start, data['n_targets']
+    
+    segment_codes = data['segment_codes'][rows] - segment_start
+    target_codes = data['target_codes'][rows]
+    group_codes = np.where((segment_codes >= 0) & (target_codes >= 0),
+                           segment_codes * n_targets + target_codes, -1)
+    
+    n, mean, m2 = _moments_by_code(data['values'][rows], group_codes, n_segments * n_targets)
+    counts = _contingency_counts([codes[rows] for codes in data['cat_codes']], data['sizes'],
+                                 target_codes, n_targets, segment_codes, n_segments)
+    shape = (n_segments, n_targets, -1)
+    return n.reshape(shape), mean.reshape(shape), m2.reshape(shape), counts
+
+
+def _segment_partitions(segment_codes, n_segments, n_parts):
+    """Contiguous segment ranges with roughly equal rows, as (row and segment) bounds."""
+    cumulative = np.cumsum(np.bincount(segment_codes[segment_codes >= 0], minlength=n_segments))
+    targets = np.linspace(0, cumulative[-1], n_parts + 1)[1:-1]
+    edges = np.unique(np.concatenate([[0], np.searchsorted(cumulative, targets) + 1, [n_segments]]))
+    edges = edges[edges <= n_segments]
+    row_edges = np.searchsorted(segment_codes, edges)
+    return [(row_edges[i], row_edges[i + 1], edges[i], edges[i + 1]) for i in range(len(edges) - 1)]
+
+
+def segmented_tests(df_processed, numerical_cols=(), categorical_cols=(), segment_cols=SEGMENT_COLS,
+                    target_col='churn_flag', equal_var=True, alpha=ALPHA, n_jobs=1,
+                    min_segments_parallel=64):
+    """
+    Churn t-tests and chi-square tests within every segment, in one grouped pass.
+    
+    Moments of the numerical columns per segment × churn group and category
+    counts per segment × category × churn group are computed together, then
+    all tests are finalized at once and adjusted for multiple testing over
+    the whole table.
+    
+    Parameters:
+    -----------
+    df_processed : pd.DataFrame
+        Preprocessed dataframe
+    numerical_cols : list
+        Columns for t-tests
+    categorical_cols : list
+        Columns for chi-square tests (should not include segment_cols)
+    segment_cols : list
+        Columns whose observed combinations define the segments
+    target_col : str
+        Binary target column
+    equal_var : bool
+        Student's t-test if True, Welch's otherwise
+    alpha : float
+        Level for the Significant column (on the BH-adjusted p-value)
+    n_jobs : int
+        Worker processes (-1 for all free cores of the shared budget) used
+        when there are at least min_segments_parallel segments
+    min_segments_parallel : int
+        Below this many segments the single pass runs in process
+    
+    Returns:
+    --------
+    pd.DataFrame
+        One row per segment × feature with the test statistic, raw p-value,
+        Benjamini-Hochberg and Holm adjusted p-values. Tests that cannot be
+        run (a churn group missing in the segment) have NaN p-values.
+    """
+    numerical_cols, categorical_cols = list(numerical_cols), list(categorical_cols)
+    segment_cols = list(segment_cols)
+    
+    grouped = df_processed.groupby(segment_cols, sort=True, observed=True)
+    segment_codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    segments = grouped.size().index
+    n_segments = len(segments)
+    
+    target_codes, target_labels = pd.factorize(df_processed[target_col], sort=True)
+    churned, retained = target_labels.tolist().index(1), target_labels.tolist().index(0)
+    cat_codes, levels = _category_codes(df_processed, categorical_cols)
+    sizes = [len(uniques) for uniques in levels]
+    
+    data = {
+        'values': df_processed[numerical_cols].to_numpy(dtype=np.float64),
+        'segment_codes': segment_codes,
+        'target_codes': target_codes,
+        'n_targets': len(target_labels),
+        'cat_codes': cat_codes,
+        'sizes': sizes,
+    }
+    
+    if n_jobs != 1 and n_segments >= min_segments_parallel:
+        # Sort rows by segment so each task reads one contiguous block
+        order = np.argsort(segment_codes, kind='stable')
+        data = {key: value[order] if isinstance(value, np.ndarray) else value for key, value in data.items()}
+        data['cat_codes'] = [codes[order] for codes in cat_codes]
+        with CORES.reserve(n_jobs) as n_workers:
+            tasks = list(zip(*_segment_partitions(data['segment_codes'], n_segments, n_workers * 4)))
+            with _process_pool(n_workers, data) as executor:
+                parts = list(executor.map(_segment_statistics, *tasks))
+        n, mean, m2, counts = (np.concatenate(arrays) for arrays in zip(*parts))
+    else:
+        _init_worker(data)
+        try:
+            n, mean, m2, counts = _segment_statistics(0, len(segment_codes), 0, n_segments)
+        finally:
+            _WORKER_DATA.clear()
+    
+    segment_frame = segments.to_frame(index=False)
+    results = []
+    
+    if numerical_cols:
+        t_stats, p_values = ttest_from_moments(n[:, churned], mean[:, churned], m2[:, churned],
+                                               n[:, retained], mean[:, retained], m2[:, retained],
+                                               equal_var=equal_var)
+        part = segment_frame.loc[np.repeat(np.arange(n_segments), len(numerical_cols))].reset_index(drop=True)
+        part['Feature'] = np.tile(numerical_cols, n_segments)
+        part['Test'] = 't-test'
+        part['N'] = (n[:, churned] + n[:, retained]).ravel().astype(np.int64)
+        part['Churned'] = n[:, churned].ravel().astype(np.int64)
+        part['Statistic'] = t_stats.ravel()
+        part['P-Value'] = p_values.ravel()
+        results.append(part)
+    
+    if categorical_cols:
+        offsets = np.cumsum([0] + sizes)
+        tables = [counts[s, offsets[j]:offsets[j + 1]]
+                  for s in range(n_segments) for j in range(len(categorical_cols))]
+        chi2_values, p_values, dofs, _ = chi_square_from_tables(tables)
+        part = segment_frame.loc[np.repeat(np.arange(n_segments), len(categorical_cols))].reset_index(drop=True)
+        part['Feature'] = np.tile(categorical_cols, n_segments)
+        part['Test'] = 'chi-square'
+        part['N'] = [table.sum() for table in tables]
+        part['Churned'] = [table[:, churned].sum() for table in tables]
+        part['Statistic'] = chi2_values
+        part['P-Value'] = np.where(dofs > 0, p_values, np.nan)
+        results.append(part)
+    
+    if not results:
+        return pd.DataFrame(columns=segment_cols + ['Feature', 'Test', 'N', 'Churned', 'Statistic',
+                                                    'P-Value', 'P-Adj (BH)', 'P-Adj (Holm)', 'Significant'])
+    
+    results = pd.concat(results, ignore_index=True)
+    results['P-Adj (BH)'] = adjust_pvalues(results['P-Value'], 'fdr_bh')
+    results['P-Adj (Holm)'] = adjust_pvalues(results['P-Value'], 'holm')
+    results['Significant'] = np.where(results['P-Adj (BH)'] < alpha, '*', '')
+    return results
+
+
+def perform_segmented_tests(df_processed, numerical_cols, categorical_cols, segment_cols=SEGMENT_COLS,
+                            top_n=10, **kwargs):
+    """
+    Run segmented tests and print a summary with the strongest results.
+    
+    Parameters:
+    -----------
+    df_processed : pd.DataFrame
+        Preprocessed dataframe
+    numerical_cols : list
+        Columns for t-tests
+    categorical_cols : list
+        Columns for chi-square tests
+    segment_cols : list
+        Columns defining the segments
+    top_n : int
+        Number of results to print, by adjusted p-value
+    **kwargs :
+        Passed to segmented_tests (equal_var, alpha, n_jobs, ...)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Long results table from segmented_tests
+    """
+    print("=" * 60)
+    print("SEGMENTED SIGNIFICANCE TESTING")
+    print("=" * 60)
+    
+    results = segmented_tests(df_processed, numerical_cols, categorical_cols, segment_cols, **kwargs)
+    segment_cols = list(segment_cols)
+    n_segments = len(results.drop_duplicates(segment_cols))
+    tested = results['P-Value'].notna()
+    alpha = kwargs.get('alpha', ALPHA)
+    
+    print(f"\nSegments ({' × '.join(segment_cols)}): {n_segments}")
+    print(f"Tests run: {tested.sum():,} of {len(results):,} (the rest lack a churn group or category in the segment)")
+    print(f"Significant at {alpha} after Benjamini-Hochberg: {(results['P-Adj (BH)'] < alpha).sum():,}")
+    print(f"Significant at {alpha} after Holm:               {(results['P-Adj (Holm)'] < alpha).sum():,}")
+    
+    print(f"\nTop {top_n} by adjusted p-value:")
+    print("-" * 60)
+    top = results[tested].nsmallest(top_n, 'P-Adj (BH)').copy()
+    top['Statistic'] = top['Statistic'].round(3)
+    for col in ['P-Value', 'P-Adj (BH)', 'P-Adj (Holm)']:
+        top[col] = top[col].map(lambda p: f"{p:.2e}")
+    print(top.to_string(index=False))
+    
+    return results
@@ -0,0 +1,291 @@
+"""
+Hyperparameter tuning module for Hotels.com Churn Analysis
+Successive halving over Random Forest and Gradient Boosting configurations
+
+Every candidate configuration is trained on a small budget (few trees, or a
+small sample of customers) and scored on a validation split of the training
+set; the best 1/eta go on to the next round with eta times the budget.
+With the tree budget, forests and boosters are warm-started: a surviving
+candidate only grows the trees it is missing. Candidates of a round are
+trained in parallel worker processes on memory-mapped matrices.
+
+Forests are tuned on the tree budget by default. Boosting is tuned on the
+sample budget: a booster truncated to a few trees favours the largest
+learning rates, which then overfit at the full tree count.
+"""
+
+import os
+import json
+import time
+import tempfile
+import warnings
+import itertools
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from config import (RF_PARAMS, GB_ENGINE, GB_ENGINE_PARAMS, RF_PARAM_SPACE, GB_PARAM_SPACE,
+                    HIST_GB_PARAM_SPACE, TUNING_CANDIDATES, TUNING_ETA, TUNING_VALIDATION_SIZE,
+                    TUNING_SEED)
+from models import RESULTS_DIR, _share_arrays, _load_shared
+from scheduler import CORES
+
+TUNED_MODELS = ['random_forest', 'gradient_boosting']
+
+# Budget grown between rounds when none is given
+DEFAULT_RESOURCE = {'random_forest': 'trees', 'gradient_boosting': 'samples'}
+
+
+def _search_setup(model_name, engine):
+    """Default hyperparameters, search space and budget parameter of a tuned model."""
+    if model_name == 'random_forest':
+        return RF_PARAMS, RF_PARAM_SPACE, 'n_estimators'
+    if model_name == 'gradient_boosting':
+        if engine == 'hist':
+            return GB_ENGINE_PARAMS['hist'], HIST_GB_PARAM_SPACE, 'max_iter'
+        return GB_ENGINE_PARAMS['exact'], GB_PARAM_SPACE, 'n_estimators'
+    raise ValueError(f"Unknown model {model_name!r}; expected one of {TUNED_MODELS}")
+
+
+def sample_candidates(space, n_candidates, seed=TUNING_SEED):
+    """
+    Draw distinct configurations from a search space.
+    
+    Parameters:
+    -----------
+    space : dict
+        Hyperparameter -> list of values
+    n_candidates : int
+        Number of configurations (all of them if the grid is smaller)
+    seed : int
+        Random seed
+    
+    Returns:
+    --------
+    list
+        Hyperparameter dicts
+    """
+    grid = list(itertools.product(*space.values()))
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(grid), size=min(n_candidates, len(grid)), replace=False)
+    return [dict(zip(space, grid[i])) for i in sorted(picks)]
+
+
+def _fit_candidate(data_dir, model_name, engine, params, budget, resource, n_threads, model=None):
+    """
+    Train one candidate on its budget and score it on the validation split.
+    
+    Returns:
+    --------
+    tuple
+        model (None unless warm-startable), validation ROC-AUC, seconds
+    """
+    from sklearn.metrics import roc_auc_score
+    from threadpoolctl import threadpool_limits
+    
+    defaults, _, budget_param = _search_setup(model_name, engine)
+    X_fit, y_fit = _load_shared(data_dir, 'X_fit'), _load_shared(data_dir, 'y_fit')
+    if resource == 'samples':
+        # The fit split is shuffled, so its first rows are a random sample
+        X_fit, y_fit = X_fit[:budget], y_fit[:budget]
+    
+    started = time.perf_counter()
+    with threadpool_limits(n_threads, user_api='openmp'), warnings.catch_warnings():
+        # Warm starts always refit on the same data, so balanced class weights stay valid
+        warnings.filterwarnings('ignore', message='class_weight presets')
+        if model is None:
+            model = _make_estimator(model_name, engine, {**defaults, **params},
+                                    warm_start=resource == 'trees')
+        if resource == 'trees':
+            model.set_params(**{budget_param: budget})
+        if model_name == 'random_forest':
+            model.set_params(n_jobs=n_threads)
+        model.fit(X_fit, y_fit)
+        score = roc_auc_score(_load_shared(data_dir, 'y_val'),
+                              model.predict_proba(_load_shared(data_dir, 'X_val'))[:, 1])
+    seconds = time.perf_counter() - started
+    return (model if resource == 'trees' else None), score, seconds
+
+
+def _make_estimator(model_name, engine, params, warm_start):
+    """Unfitted estimator for a candidate (early stopping off: candidates are scored on our own split)."""
+    if model_name == 'random_forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(**{**params, 'warm_start': warm_start})
+    if engine == 'hist':
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(**{**params, 'early_stopping': False, 'warm_start': warm_start})
+    from sklearn.ensemble import GradientBoostingClassifier
+    return GradientBoostingClassifier(**{**params, 'warm_start': warm_start})
+
+
+def halving_budgets(n_candidates, eta, max_budget):
+    """
+    Candidates and budget of every successive halving round.
+    
+    Returns:
+    --------
+    list
+        (number of candidates, budget) per round; the last round trains
+        the survivors on max_budget
+    """
+    n_rounds = 1
+    while n_candidates // eta ** n_rounds >= 1 and eta ** n_rounds <= max_budget:
+        n_rounds += 1
+    return [(max(1, n_candidates // eta ** i), max(1, round(max_budget / eta ** (n_rounds - 1 - i))))
+            for i in range(n_rounds)]
+
+
+def tune_model(X_train, y_train, model_name='random_forest', engine=None, resource=None,
+               n_candidates=TUNING_CANDIDATES, eta=TUNING_ETA, max_budget=None,
+               validation_size=TUNING_VALIDATION_SIZE, seed=TUNING_SEED, n_jobs=-1, save=True):
+    """
+    Tune a model's hyperparameters with successive halving.
+    
+    Parameters:
+    -----------
+    X_train : pd.DataFrame
+        Training features (the test set is left untouched)
+    y_train : array
+        Training target
+    model_name : str
+        'random_forest' or 'gradient_boosting'
+    engine : str, optional
+        Gradient boosting engine ('exact' or 'hist'; config.GB_ENGINE by default)
+    resource : str, optional
+        Budget that grows between rounds: 'trees' (warm-started) or 'samples';
+        DEFAULT_RESOURCE of the model by default
+    n_candidates : int
+        Configurations sampled from the search space in config
+    eta : int
+        Halving factor
+    max_budget : int, optional
+        Budget of the last round (default trees of the model, or all fit samples)
+    validation_size : float
+        Share of the training set used to score candidates
+    seed : int
+        Random seed for sampling configurations and the validation split
+    n_jobs : int
+        Cores to use (-1 for all free cores of the shared budget)
+    save : bool
+        Persist the results to RESULTS_DIR/tuning_<model_name>.json
+    
+    Returns:
+    --------
+    dict
+        Best parameters and score with the scores of every round
+    """
+    from sklearn.model_selection import train_test_split
+    
+    engine = (engine or GB_ENGINE) if model_name == 'gradient_boosting' else None
+    defaults, space, budget_param = _search_setup(model_name, engine)
+    resource = resource or DEFAULT_RESOURCE[model_name]
+    if resource not in ('trees', 'samples'):
+        raise ValueError(f"Unknown resource {resource!r}; expected 'trees' or 'samples'")
+    
+    print("=" * 60)
+    print(f"HYPERPARAMETER TUNING: {model_name.replace('_', ' ').upper()}"
+          + (f" ({engine})" if engine else ""))
+    print("=" * 60)
+    
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train.to_numpy(dtype=np.float64), np.asarray(y_train), test_size=validation_size,
+        random_state=seed, stratify=y_train
+    )
+    if max_budget is None:
+        max_budget = defaults[budget_param] if resource == 'trees' else len(X_fit)
+    candidates = sample_candidates(space, n_candidates, seed)
+    rounds = halving_budgets(len(candidates), eta, max_budget)
+    print(f"✓ {len(candidates)} candidates, {len(rounds)} rounds, {resource} budget "
+          f"{rounds[0][1]:,} → {rounds[-1][1]:,}")
+    print(f"✓ Fit / validation split: {len(X_fit):,} / {len(X_val):,} customers\n")
+    
+    alive = [{'params': params, 'model': None} for params in candidates]
+    history, used, previous = [], 0, 0
+    n_cores = CORES.acquire(n_jobs)
+    executor = None
+    started = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(prefix='tune_') as data_dir:
+            _share_arrays(data_dir, X_fit=X_fit, y_fit=y_fit, X_val=X_val, y_val=y_val)
+            if n_cores > 1:
+                # Spawned rather than forked, as in models.train_models
+                executor = ProcessPoolExecutor(max_workers=min(n_cores, len(alive)),
+                                               mp_context=multiprocessing.get_context('spawn'))
+            
+            for round_no, (_, budget) in enumerate(rounds, start=1):
+                # Cores beyond one per candidate become threads of the candidates
+                n_threads = max(1, n_cores // len(alive))
+                round_started = time.perf_counter()
+                args = [(data_dir, model_name, engine, candidate['params'], budget, resource, n_threads,
+                         candidate['model']) for candidate in alive]
+                outputs = (list(executor.map(_fit_candidate, *zip(*args))) if executor is not None
+                           else [_fit_candidate(*task) for task in args])
+                for candidate, (model, score, seconds) in zip(alive, outputs):
+                    candidate.update(model=model, score=score, seconds=seconds)
+                # Warm starts only grow the missing trees
+                used += len(alive) * (budget - previous if resource == 'trees' else budget)
+                previous = budget
+                
+                alive.sort(key=lambda candidate: candidate['score'], reverse=True)
+                history.append({'round': round_no, 'budget': budget,
+                                'candidates': [{'params': c['params'], 'score': c['score'],
+                                                'seconds': c['seconds']} for c in alive]})
+                print(f"Round {round_no}: {len(alive):>3} candidates × {budget:>7,} {resource}  "
+                      f"best ROC-AUC {alive[0]['score']:.4f}  ({time.perf_counter() - round_started:.1f}s)")
+                if round_no < len(rounds):
+                    alive = alive[:rounds[round_no][0]]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        CORES.release(n_cores)
+    
+    best = alive[0]
+    full_cost = len(candidates) * max_budget
+    results = {
+        'model': model_name,
+        'engine': engine,
+        'resource': resource,
+        'eta': eta,
+        'seed': seed,
+        'scoring': 'roc_auc',
+        'best_params': {**best['params'], budget_param: max_budget} if resource == 'trees' else best['params'],
+        'best_score': best['score'],
+        'budget_used': used,
+        'budget_full_search': full_cost,
+        'seconds': time.perf_counter() - started,
+        'n_fit': len(X_fit),
+        'n_validation': len(X_val),
+        'tuned_at': datetime.now().isoformat(timespec='seconds'),
+        'rounds': history,
+    }
+    
+    print(f"\n✓ Best validation ROC-AUC: {results['best_score']:.4f}")
+    print(f"✓ Best parameters: {results['best_params']}")
+    print(f"✓ Budget used: {used:,} {resource} ({used / full_cost:.0%} of training every candidate in full)")
+    
+    if save:
+        filepath = os.path.join(RESULTS_DIR, f'tuning_{model_name}.json')
+        with open(filepath, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results saved to {filepath}")
+    
+    return results
+
+
+def load_tuning_results(model_name):
+    """
+    Results of the last tune_model run for a model.
+    
+    Returns:
+    --------
+    dict or None
+        The saved results (best_params, engine, rounds, ...), None if the
+        model has not been tuned
+    """
+    filepath = os.path.join(RESULTS_DIR, f'tuning_{model_name}.json')
+    if not os.path.exists(filepath):
+        return None
+    with open(filepath) as f:
+        return json.load(f)
@@ -3,14 +3,392 @@ Visualization module for Hotels.com Churn Analysis
 Contains all plotting functions using unified colour scheme
 """
 
+import io
+import os
+import sys
+import hashlib
+import re
+import shutil
+import inspect
+import tempfile
+import functools
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import pandas as pd
 from config import (COLORS, CHURN_COLORS, RISK_COLORS, MODEL_COLORS, 
-                    get_custom_cmap, get_confusion_matrix_cmap, NUMERICAL_COLS)
+                    get_custom_cmap, get_confusion_matrix_cmap, NUMERICAL_COLS,
+                    FIGURES_DIR, FIGURE_FORMATS, FIGURE_DPI, QUANTILE_BINS, CORRELATION_COLS,
+                    FIGURE_CACHE_DIR, FIGURE_CACHE_MAX_MB)
+from data_loader import data_fingerprint, _write_column_cache, _read_column_cache
+from figure_cache import FigureCache
+from profiling import tee_stdout
+from scheduler import CORES
+from statistical_tests import correlation_matrix
+
+# Bump when the layout of cached figure entries changes
+FIGURE_CACHE_VERSION = 2
+
+# Modules whose source is part of every figure key besides the chart's own
+# module: settings and colour maps, and the statistics drawn by the charts
+_FIGURE_CODE_MODULES = ('config', 'statistical_tests')
+
+# rcParams that do not affect how a saved figure looks
+_NON_STYLE_RC = {'backend', 'backend_fallback', 'interactive'}
+
+# Where figures go: shown interactively (output_dir None) or saved to files,
+# reusing cached renders when a figure cache is enabled
+_RENDER = {'output_dir': None, 'formats': FIGURE_FORMATS, 'dpi': FIGURE_DPI,
+           'cache_dir': FIGURE_CACHE_DIR, 'cache_max_mb': FIGURE_CACHE_MAX_MB, 'cache': None}
+
+# Paths of the figures saved by this process, in order
+_SAVED_FIGURES = []
+
+# Dataframes of chart tasks mapped by a render worker, by column cache path
+_RENDER_FRAMES = {}
+
+
+# =============================================================================
+# RENDER MODE AND PARALLEL CHART PACKS
+# =============================================================================
+
+def set_render_mode(output_dir=FIGURES_DIR, formats=FIGURE_FORMATS, dpi=FIGURE_DPI,
+                    cache_dir=FIGURE_CACHE_DIR, cache_max_mb=FIGURE_CACHE_MAX_MB):
+    """
+    Save figures to files with the Agg backend instead of showing them.
+    
+    Parameters:
+    -----------
+    output_dir : str or None
+        Directory for the figures; None restores interactive plt.show()
+    formats : tuple
+        File formats to write for each figure (e.g. 'png', 'svg')
+    dpi : int
+        Resolution of raster formats
+    cache_dir : str or None
+        Figure cache directory; a chart whose inputs, parameters, style and
+        code are unchanged is copied from it instead of being recomputed
+        and redrawn (None disables the cache)
+    cache_max_mb : float
+        Size budget of the figure cache, least recently used charts are
+        evicted beyond it
+    """
+    cache = None
+    if output_dir is not None:
+        plt.switch_backend('Agg')
+        os.makedirs(output_dir, exist_ok=True)
+        if cache_dir is not None:
+            cache = FigureCache(cache_dir, cache_max_mb)
+    _RENDER.update(output_dir=output_dir, formats=tuple(formats), dpi=dpi,
+                   cache_dir=cache_dir, cache_max_mb=cache_max_mb, cache=cache)
+
+
+def _finish_figure(name):
+    """Show the current figure, or save it under name and close it in render mode."""
+    if _RENDER['output_dir'] is None:
+        plt.show()
+        return
+    fig = plt.gcf()
+    for fmt in _RENDER['formats']:
+        path = os.path.join(_RENDER['output_dir'], f'{name}.{fmt}')
+        fig.savefig(path, dpi=_RENDER['dpi'], bbox_inches='tight')
+        _SAVED_FIGURES.append(path)
+    plt.close(fig)
+
+
+# =============================================================================
+# FIGURE CACHE
+# =============================================================================
+
+def _fingerprint_arg(value, columns):
+    """
+    Hash a chart argument: dataframes by the columns the chart reads, series
+    and arrays by their values, lists, tuples and dicts item by item.
+    """
+    if isinstance(value, pd.DataFrame):
+        if columns is not None:
+            columns = [col for col in columns if col in value.columns]
+        return data_fingerprint(value, columns)
+    if isinstance(value, pd.Series):
+        return data_fingerprint(value.to_frame(name='value'))
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{value.dtype.str}|{value.shape}".encode())
+        if value.dtype.hasobject:
+            digest.update(pd.util.hash_array(value.ravel()))
+        else:
+            digest.update(np.ascontiguousarray(value))
+        return digest.hexdigest()
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{','.join(_fingerprint_arg(item, columns) for item in value)}]"
+    if isinstance(value, dict):
+        return repr(sorted((repr(key), _fingerprint_arg(item, columns)) for key, item in value.items()))
+    return repr(value)
+
+
+def _module_digest(module_name):
+    """Hash of a module's source, computed once per process."""
+    if module_name not in _MODULE_DIGESTS:
+        source = inspect.getsource(sys.modules[module_name])
+        _MODULE_DIGESTS[module_name] = hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+    return _MODULE_DIGESTS[module_name]
+
+
+_MODULE_DIGESTS = {}
+
+
+def _figure_key(func, arguments, columns):
+    """
+    Content key of a chart: code, inputs, parameters, plot style and output settings.
+    
+    The code is the source of the chart's whole module, so changes to shared
+    helpers (compute_box_stats, styling functions, ...) invalidate the chart,
+    and of _FIGURE_CODE_MODULES.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{FIGURE_CACHE_VERSION}|{func.__qualname__}".encode())
+    for module_name in (func.__module__, *_FIGURE_CODE_MODULES):
+        digest.update(_module_digest(module_name).encode())
+    for name, value in arguments.items():
+        digest.update(f"|{name}=".encode())
+        digest.update(_fingerprint_arg(value, columns).encode())
+    style = sorted((key, repr(value)) for key, value in plt.rcParams.items()
+                   if key not in _NON_STYLE_RC)
+    digest.update(repr((style, COLORS, _RENDER['formats'], _RENDER['dpi'])).encode())
+    return digest.hexdigest()
+
+
+def _cached_figure(columns=None):
+    """
+    Serve a chart function from the figure cache in render mode.
+    
+    A hit copies the stored images to the output directory, replays the
+    printed output and returns the stored return value without running
+    the function; a miss runs it and stores what it saved and returned.
+    
+    Parameters:
+    -----------
+    columns : callable, optional
+        Maps the bound arguments to the dataframe columns the chart reads,
+        so only those are hashed (all columns by default)
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = _RENDER['cache']
+            if cache is None or _RENDER['output_dir'] is None:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = _figure_key(func, bound.arguments,
+                              columns(bound.arguments) if columns is not None else None)
+            entry = cache.get(key)
+            if entry is not None:
+                paths, (output, result) = entry
+                for path in paths:
+                    shutil.copyfile(path, os.path.join(_RENDER['output_dir'], os.path.basename(path)))
+                print(output, end='')
+                return result
+            n_saved = len(_SAVED_FIGURES)
+            with tee_stdout() as output:
+                result = func(*args, **kwargs)
+            cache.put(key, _SAVED_FIGURES[n_saved:], (output.getvalue(), result))
+            return result
+        
+        return wrapper
+    return decorator
+
+
+def figure_cache_stats():
+    """
+    Return figure cache counters for this run.
+    
+    Returns:
+    --------
+    dict or None
+        hits, misses, entries and size_mb; None when the cache is disabled
+    """
+    cache = _RENDER['cache']
+    return cache.stats() if cache is not None else None
+
+
+def _slugify(title):
+    return re.sub(r'[^a-z0-9]+', '_', title.lower()).strip('_')
+
 
+class _SharedFrame:
+    """A dataframe argument of a chart task written as a column cache for the render workers."""
+    
+    def __init__(self, path):
+        self.path = path
+
+
+def _share_frames(values, frames_dir, shared):
+    """Replace the dataframes in values (a tuple or dict) with _SharedFrame, writing each one once."""
+    def share(value):
+        if not isinstance(value, pd.DataFrame):
+            return value
+        if id(value) not in shared:
+            path = os.path.join(frames_dir, f'frame_{len(shared)}.cols')
+            _write_column_cache(value, path)
+            shared[id(value)] = _SharedFrame(path)
+        return shared[id(value)]
+    if isinstance(values, dict):
+        return {key: share(value) for key, value in values.items()}
+    return tuple(share(value) for value in values)
+
+
+def _unshare_frame(value):
+    if not isinstance(value, _SharedFrame):
+        return value
+    if value.path not in _RENDER_FRAMES:
+        _RENDER_FRAMES[value.path] = _read_column_cache(value.path)
+    return _RENDER_FRAMES[value.path]
+
+
+def _init_render_worker(render_settings, rc_params):
+    plt.rcParams.update(rc_params)
+    set_render_mode(**render_settings)
+
+
+def _render_task(func, args, kwargs):
+    """Run one chart task, returning its printed output, return value and cache hits/misses."""
+    args = [_unshare_frame(value) for value in args]
+    kwargs = {key: _unshare_frame(value) for key, value in kwargs.items()}
+    cache = _RENDER['cache']
+    counts = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        result = func(*args, **kwargs)
+    if cache is not None:
+        counts = (cache.hits - counts[0], cache.misses - counts[1])
+    return output.getvalue(), result, counts
 
+
+class ChartPack:
+    """
+    Chart tasks rendering in a process pool.
+    
+    collect() waits for them, prints each task's heading and output in task
+    order and returns their results.
+    """
+    
+    def __init__(self, tasks, executor, n_cores=0, frames_dir=None):
+        self.tasks = tasks
+        self._executor = executor
+        self._n_cores = n_cores
+        self._frames_dir = frames_dir
+        self._remaining = len(tasks)
+        self._lock = threading.Lock()
+        
+        # Each task goes only to the worker that runs it, its dataframes as column caches
+        shared = {}
+        self._futures = []
+        for _, func, args, kwargs in tasks:
+            if frames_dir is not None:
+                args = _share_frames(args, frames_dir.name, shared)
+                kwargs = _share_frames(kwargs, frames_dir.name, shared)
+            self._futures.append(executor.submit(_render_task, func, args, kwargs))
+        for future in self._futures:
+            future.add_done_callback(self._task_done)
+        if not tasks:
+            CORES.release(n_cores)
+    
+    def _task_done(self, future):
+        # Hand the cores back to the shared budget as soon as the last chart is done
+        with self._lock:
+            self._remaining -= 1
+            if self._remaining == 0:
+                CORES.release(self._n_cores)
+    
+    def done(self):
+        return all(future.done() for future in self._futures)
+    
+    def collect(self):
+        results = []
+        try:
+            cache = _RENDER['cache']
+            for (heading, _, _, _), future in zip(self.tasks, self._futures):
+                output, result, (hits, misses) = future.result()
+                if cache is not None:
+                    cache.hits += hits
+                    cache.misses += misses
+                if heading:
+                    print(heading)
+                print(output, end='')
+                results.append(result)
+        finally:
+            self._executor.shutdown()
+            if self._frames_dir is not None:
+                self._frames_dir.cleanup()
+        return results
+
+
+def render_figures(tasks, output_dir=FIGURES_DIR, formats=FIGURE_FORMATS, dpi=FIGURE_DPI,
+                   n_jobs=-1, wait=True, start_method='spawn'):
+    """
+    Render independent charts concurrently to files.
+    
+    Each worker uses the Agg backend, inherits the current plot style and
+    closes every figure after saving it. Workers are spawned and each task is
+    sent only to the worker that runs it; the dataframes among its arguments
+    are written once as column caches (as for the preprocessed data) that
+    the workers memory-map instead of unpickling a copy each. Workers share the figure cache set by set_render_mode, so unchanged
+    charts are copied rather than redrawn.
+    
+    Parameters:
+    -----------
+    tasks : list
+        (heading, function, args, kwargs) tuples; heading is printed before
+        the function's own output (None for no heading)
+    output_dir : str
+        Directory for the figures
+    formats : tuple
+        File formats to write for each figure
+    dpi : int
+        Resolution of raster formats
+    n_jobs : int
+        Worker processes (-1 for all free cores of the shared budget, never
+        more than there are tasks; the cores are returned as soon as the last
+        chart is done)
+    wait : bool
+        Block until done and return the results; otherwise return a
+        ChartPack whose collect() does so later
+    start_method : str
+        'spawn' or 'forkserver'; 'fork' (Linux only) lets the workers inherit
+        the dataframes instead of mapping them, but is only safe when no other
+        thread of this process is running, so it must be asked for
+    
+    Returns:
+    --------
+    list or ChartPack
+        Return values of the chart functions, in task order
+    """
+    if start_method == 'fork' and not sys.platform.startswith('linux'):
+        raise ValueError(f"The fork start method is only supported on Linux, not {sys.platform}")
+    os.makedirs(output_dir, exist_ok=True)
+    # Cores beyond one per task go straight back to the shared budget
+    granted = CORES.acquire(n_jobs)
+    n_cores = min(granted, max(len(tasks), 1))
+    CORES.release(granted - n_cores)
+    frames_dir = tempfile.TemporaryDirectory(prefix='charts_') if start_method != 'fork' else None
+    executor = ProcessPoolExecutor(
+        max_workers=n_cores,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_render_worker,
+        initargs=({'output_dir': output_dir, 'formats': formats, 'dpi': dpi,
+                          'cache_dir': _RENDER['cache_dir'], 'cache_max_mb': _RENDER['cache_max_mb']},
+                  {key: value for key, value in plt.rcParams.items() if key != 'backend'}))
+    pack = ChartPack(tasks, executor, n_cores, frames_dir)
+    return pack.collect() if wait else pack
+
+
+@_cached_figure(columns=lambda args: ['churn_flag'])
 def plot_churn_distribution(df):
     """
     Plot overall churn distribution with pie and bar charts.
@@ -48,9 +426,10 @@ def plot_churn_distribution(df):
                      f'{count:,}', ha='center', va='bottom', fontsize=11, fontweight='bold')
     
     plt.tight_layout()
-    plt.show()
+    _finish_figure('churn_distribution')
 
 
+@_cached_figure(columns=lambda args: [args['column'], 'churn_flag'])
 def plot_churn_by_category(data, column, title, figsize=(10, 5)):
     """
     Plot churn rate by categorical variable with count and rate charts.
@@ -65,7 +444,7 @@ def plot_churn_by_category(data, column, title, figsize=(10, 5)):
         Display title for the column
     figsize : tuple
         Figure size
-        
+    
     Returns:
     --------
     pd.DataFrame
@@ -103,11 +482,12 @@ def plot_churn_by_category(data, column, title, figsize=(10, 5)):
                      f'{rate*100:.1f}%', va='center', fontsize=9, fontweight='bold')
     
     plt.tight_layout()
-    plt.show()
+    _finish_figure(f'churn_by_{column}')
     
     return churn_by_cat
 
 
+@_cached_figure(columns=lambda args: [col for col, _ in args['binary_flags']] + ['churn_flag'])
 def plot_binary_flags(df_processed, binary_flags):
     """
     Plot churn rate by binary flags (coupon, pay now, cancel).
@@ -139,7 +519,7 @@ def plot_binary_flags(df_processed, binary_flags):
                            f'{rate:.1f}%', ha='center', fontsize=11, fontweight='bold')
     
     plt.tight_layout()
-    plt.show()
+    _finish_figure('binary_flags')
     
     # Print summary
     print("\n📊 Summary Statistics:")
@@ -151,29 +531,33 @@ def plot_binary_flags(df_processed, binary_flags):
         print(f"  • Difference: {abs(churn_by_flag[1] - churn_by_flag[0]):.2f}pp")
 
 
-def plot_numerical_distributions(df_processed, numerical_cols=NUMERICAL_COLS):
+@_cached_figure(columns=lambda args: list(args['numerical_cols']) + ['churn_flag'])
+def plot_numerical_distributions(df_processed, numerical_cols=NUMERICAL_COLS, approximate=False):
     """
     Plot box plots and summary chart for numerical variables by churn status.
     
+    Boxes are drawn from precomputed statistics, so rendering cost does not
+    depend on the number of bookings.
+    
     Parameters:
     -----------
     df_processed : pd.DataFrame
         Preprocessed dataframe
     numerical_cols : list
         List of numerical column names
+    approximate : bool
+        Use histogram-based quantiles (see compute_box_stats) for very large data
     """
+    # Box statistics for both groups of every column, computed up front
+    box_stats = compute_box_stats(df_processed, numerical_cols, approximate=approximate,
+                                  group_labels={0: 'Retained', 1: 'Churned'})
+    
     # Box plots
     fig, axes = plt.subplots(3, 3, figsize=(18, 14))
     axes = axes.flatten()
     
     for idx, col in enumerate(numerical_cols):
-        data_to_plot = [
-            df_processed[df_processed['churn_flag'] == 0][col].dropna(),
-            df_processed[df_processed['churn_flag'] == 1][col].dropna()
-        ]
-        
-        bp = axes[idx].boxplot(data_to_plot, labels=['Retained', 'Churned'], patch_artist=True,
-                               widths=0.6, showfliers=False)
+        bp = axes[idx].bxp(box_stats[col], patch_artist=True, widths=0.6, showfliers=False)
         
         bp['boxes'][0].set_facecolor(COLORS['retained'])
         bp['boxes'][1].set_facecolor(COLORS['churned'])
@@ -196,8 +580,8 @@ def plot_numerical_distributions(df_processed, numerical_cols=NUMERICAL_COLS):
         y_min, y_max = axes[idx].get_ylim()
         y_range = y_max - y_min
         
-        mean_retained = data_to_plot[0].mean()
-        mean_churned = data_to_plot[1].mean()
+        mean_retained = box_stats[col][0]['mean']
+        mean_churned = box_stats[col][1]['mean']
         
         axes[idx].text(1, y_max - y_range * 0.08, f'μ={mean_retained:.1f}', 
                        ha='center', fontsize=11, fontweight='bold', color=COLORS['retained'],
@@ -215,7 +599,7 @@ def plot_numerical_distributions(df_processed, numerical_cols=NUMERICAL_COLS):
     plt.tight_layout()
     plt.suptitle('Numerical Feature Distributions: Retained vs Churned Customers', 
                  fontsize=16, fontweight='bold', y=1.02)
-    plt.show()
+    _finish_figure('numerical_distributions')
     
     # Summary bar chart
     print("\n" + "=" * 60)
@@ -224,8 +608,8 @@ def plot_numerical_distributions(df_processed, numerical_cols=NUMERICAL_COLS):
     
     fig, ax = plt.subplots(figsize=(16, 7))
     
-    means_retained = df_processed[df_processed['churn_flag'] == 0][numerical_cols].mean()
-    means_churned = df_processed[df_processed['churn_flag'] == 1][numerical_cols].mean()
+    means_retained = pd.Series({col: box_stats[col][0]['mean'] for col in numerical_cols})
+    means_churned = pd.Series({col: box_stats[col][1]['mean'] for col in numerical_cols})
     pct_diff = ((means_churned - means_retained) / means_retained * 100)
     
     x = np.arange(len(numerical_cols))
@@ -253,10 +637,139 @@ def plot_numerical_distributions(df_processed, numerical_cols=NUMERICAL_COLS):
                 fontsize=12, fontweight='bold')
     
     plt.tight_layout()
-    plt.show()
+    _finish_figure('numerical_mean_difference')
 
 
-def plot_correlation_heatmap(df_processed):
+def compute_box_stats(df, cols, group_col='churn_flag', approximate=False, bins=QUANTILE_BINS,
+                      group_labels=None, whis=1.5):
+    """
+    Box plot statistics per group for many columns, in the format of ax.bxp.
+    
+    Quartiles use linear interpolation and whiskers extend to the most
+    extreme values within whis × IQR of the box, as ax.boxplot does; NaNs
+    are ignored. The approximate path reads each column once into a
+    per-group histogram of the given number of bins instead of sorting it;
+    quartiles and whiskers are then within about one bin width of the
+    exact values.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe with the columns and the group column
+    cols : list
+        Numerical column names
+    group_col : str
+        Column defining the boxes of each column
+    approximate : bool
+        Histogram-based quantiles instead of exact ones
+    bins : int
+        Histogram resolution of the approximate path
+    group_labels : dict, optional
+        Group value -> box label (group values as strings by default)
+    whis : float
+        Whisker reach as a multiple of the IQR
+    
+    Returns:
+    --------
+    dict
+        Column name -> list of stats dicts (one per group, in sorted order)
+    """
+    codes, groups = pd.factorize(df[group_col], sort=True)
+    n_groups = len(groups)
+    keep = codes >= 0
+    labels = [str(group) if group_labels is None else group_labels.get(group, str(group)) for group in groups]
+    
+    box_stats = {}
+    for col in cols:
+        values = df[col].to_numpy(dtype=np.float64)
+        valid = keep & ~np.isnan(values)
+        col_codes, col_values = codes[valid], values[valid]
+        
+        count = np.bincount(col_codes, minlength=n_groups)
+        mean = np.bincount(col_codes, weights=col_values, minlength=n_groups) / np.maximum(count, 1)
+        if approximate:
+            q1, med, q3, whislo, whishi = _histogram_box(col_codes, col_values, n_groups, bins, whis)
+        else:
+            # One sort by (group, value) gives every group's order statistics
+            order = np.lexsort((col_values, col_codes))
+            sorted_values = col_values[order]
+            starts = np.concatenate([[0], np.cumsum(count)[:-1]])
+            q1, med, q3 = (_sorted_quantile(sorted_values, starts, count, q) for q in (0.25, 0.5, 0.75))
+            lower_fence, upper_fence = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+            
+            # Most extreme values inside the fences, by binary search in each group's sorted slice
+            whislo, whishi = q1.copy(), q3.copy()
+            for g in np.flatnonzero(count):
+                group_values = sorted_values[starts[g]:starts[g] + count[g]]
+                first = np.searchsorted(group_values, lower_fence[g], side='left')
+                last = np.searchsorted(group_values, upper_fence[g], side='right') - 1
+                whislo[g] = min(group_values[first], q1[g]) if first < count[g] else q1[g]
+                whishi[g] = max(group_values[last], q3[g]) if last >= 0 else q3[g]
+        
+        box_stats[col] = [
+            {'label': labels[g], 'mean': mean[g], 'med': med[g], 'q1': q1[g], 'q3': q3[g],
+             'iqr': q3[g] - q1[g], 'whislo': whislo[g], 'whishi': whishi[g], 'fliers': np.array([])}
+            for g in range(n_groups) if count[g] > 0
+        ]
+    return box_stats
+
+
+def _sorted_quantile(sorted_values, starts, counts, q):
+    """Linear-interpolation quantile of each group's slice of group-sorted values."""
+    position = q * np.maximum(counts - 1, 0)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, np.maximum(counts - 1, 0))
+    fraction = position - below
+    lower = sorted_values[np.minimum(starts + below, len(sorted_values) - 1)]
+    upper = sorted_values[np.minimum(starts + above, len(sorted_values) - 1)]
+    return lower + (upper - lower) * fraction
+
+
+def _histogram_box(codes, values, n_groups, bins, whis):
+    """
+    Approximate quartiles and whiskers per group from one histogram pass.
+    
+    Each bin also records its smallest and largest value, so bins holding a
+    single distinct value (as with count data) give exact results.
+    """
+    if not len(values):
+        empty = np.full(n_groups, np.nan)
+        return empty, empty, empty, empty, empty
+    lo, hi = values.min(), values.max()
+    width = (hi - lo) / bins if hi > lo else 1.0
+    keys = codes * bins + np.minimum(((values - lo) / width).astype(np.int64), bins - 1)
+    
+    counts = np.bincount(keys, minlength=n_groups * bins).reshape(n_groups, bins)
+    bin_min = np.full(n_groups * bins, np.inf)
+    bin_max = np.full(n_groups * bins, -np.inf)
+    np.minimum.at(bin_min, keys, values)
+    np.maximum.at(bin_max, keys, values)
+    bin_min, bin_max = bin_min.reshape(n_groups, bins), bin_max.reshape(n_groups, bins)
+    cumulative = np.cumsum(counts, axis=1)
+    rows = np.arange(n_groups)
+    
+    def quantile(q):
+        # Order statistics are assumed evenly spread between a bin's extremes
+        target = q * np.maximum(cumulative[:, -1] - 1, 0)
+        b = np.minimum((cumulative <= target[:, None]).sum(axis=1), bins - 1)
+        in_bin = counts[rows, b]
+        fraction = np.clip((target - (cumulative[rows, b] - in_bin)) / np.maximum(in_bin - 1, 1), 0, 1)
+        return bin_min[rows, b] + (bin_max[rows, b] - bin_min[rows, b]) * fraction
+    
+    q1, med, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    lower_fence, upper_fence = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+    
+    # Whiskers end in the outermost occupied bins reaching inside the fences
+    nonempty = counts > 0
+    first = np.argmax(nonempty & (bin_max >= lower_fence[:, None]), axis=1)
+    last = bins - 1 - np.argmax((nonempty & (bin_min <= upper_fence[:, None]))[:, ::-1], axis=1)
+    whislo = np.maximum(bin_min[rows, first], lower_fence)
+    whishi = np.minimum(bin_max[rows, last], upper_fence)
+    return q1, med, q3, np.minimum(whislo, q1), np.maximum(whishi, q3)
+
+
+@_cached_figure(columns=lambda args: CORRELATION_COLS)
+def plot_correlation_heatmap(df_processed, method='pearson'):
     """
     Plot correlation heatmap for selected features.
     
@@ -264,17 +777,15 @@ def plot_correlation_heatmap(df_processed):
     -----------
     df_processed : pd.DataFrame
         Preprocessed dataframe
+    method : str
+        'pearson' or 'spearman' (pairwise-complete, cached by data fingerprint)
     """
     print("=" * 60)
     print("CORRELATION ANALYSIS")
     print("=" * 60)
     
-    correlation_cols = ['churn_flag', 'coupon_flag', 'pay_now_flag', 'cancel_flag', 'loyalty_tier',
-                        'total_visit_minutes', 'total_visit_pages', 'search_pages_count', 
-                        'property_pages_count', 'bounce_visits_count', 'searched_destinations_count',
-                        'hotel_star_rating', 'pages_per_minute', 'property_page_ratio']
-    
-    corr_matrix = df_processed[correlation_cols].corr()
+    import seaborn as sns
+    corr_matrix = correlation_matrix(df_processed, CORRELATION_COLS, method=method)
     
     plt.figure(figsize=(14, 10))
     mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
@@ -283,7 +794,7 @@ def plot_correlation_heatmap(df_processed):
                 annot_kws={'fontsize': 9, 'fontweight': 'bold'})
     plt.title('Correlation Matrix - Features vs Churn', fontsize=14, fontweight='bold')
     plt.tight_layout()
-    plt.show()
+    _finish_figure('correlation_heatmap' if method == 'pearson' else f'correlation_heatmap_{method}')
     
     # Print correlations with churn
     print("\n📊 Correlations with Churn Flag (sorted by absolute value):")
@@ -293,6 +804,7 @@ def plot_correlation_heatmap(df_processed):
         print(f"  {direction} {feature}: {corr:.4f}")
 
 
+@_cached_figure()
 def plot_model_comparison(y_test, y_prob_lr, y_prob_rf, y_prob_gb, 
                           y_pred_lr, y_pred_rf, y_pred_gb):
     """
@@ -368,7 +880,7 @@ def plot_model_comparison(y_test, y_prob_lr, y_prob_rf, y_prob_gb,
     ax2.grid(True, alpha=0.3, axis='y')
     
     plt.tight_layout()
-    plt.show()
+    _finish_figure('model_comparison')
     
     print("\n📊 Model Performance Summary:")
     print(metrics_comparison.round(4).to_string(index=False))
@@ -376,6 +888,47 @@ def plot_model_comparison(y_test, y_prob_lr, y_prob_rf, y_prob_gb,
     return metrics_comparison
 
 
+@_cached_figure()
+def plot_cv_comparison(cv_summary, n_splits):
+    """
+    Plot cross-validated metrics of all models (mean with ± std error bars).
+    
+    Parameters:
+    -----------
+    cv_summary : pd.DataFrame
+        Summary from cross_validation.summarize_cv_results
+    n_splits : int
+        Number of folds (for the title)
+    """
+    print("=" * 60)
+    print("CROSS-VALIDATED MODEL COMPARISON")
+    print("=" * 60)
+    
+    fig, ax = plt.subplots(figsize=(12, 5))
+    
+    x = np.arange(len(cv_summary))
+    width = 0.15
+    metrics_list = ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'ROC-AUC']
+    metric_colors = [COLORS['cat_1'], COLORS['cat_2'], COLORS['cat_3'], COLORS['accent'], COLORS['model_3']]
+    
+    for i, (metric, color) in enumerate(zip(metrics_list, metric_colors)):
+        ax.bar(x + i*width, cv_summary[metric], width, yerr=cv_summary[f'{metric} std'], capsize=3,
+               label=metric, color=color, edgecolor='white', error_kw={'ecolor': COLORS['text'], 'alpha': 0.8})
+    
+    ax.set_ylabel('Score', fontsize=12)
+    ax.set_title(f'Model Performance Metrics - {n_splits}-Fold Cross-Validation (mean ± std)',
+                 fontsize=14, fontweight='bold')
+    ax.set_xticks(x + width * 2)
+    ax.set_xticklabels(cv_summary['Model'], rotation=15)
+    ax.legend(loc='lower right')
+    ax.set_ylim(0, 1)
+    ax.grid(True, alpha=0.3, axis='y')
+    
+    plt.tight_layout()
+    _finish_figure('cv_comparison')
+
+
+@_cached_figure()
 def plot_confusion_matrices(y_test, y_pred_lr, y_pred_rf, y_pred_gb):
     """
     Plot confusion matrices for all models.
@@ -387,6 +940,7 @@ def plot_confusion_matrices(y_test, y_pred_lr, y_pred_rf, y_pred_gb):
     y_pred_* : array
         Predicted labels for each model
     """
+    import seaborn as sns
     from sklearn.metrics import confusion_matrix
     
     fig, axes = plt.subplots(1, 3, figsize=(15, 4))
@@ -409,9 +963,10 @@ def plot_confusion_matrices(y_test, y_pred_lr, y_pred_rf, y_pred_gb):
         ax.set_title(f'{name}\nConfusion Matrix', fontsize=14, fontweight='bold')
     
     plt.tight_layout()
-    plt.show()
+    _finish_figure('confusion_matrices')
 
 
+@_cached_figure()
 def plot_feature_importance(feature_names, importances, title='Feature Importance', top_n=15):
     """
     Plot horizontal bar chart of feature importance.
@@ -443,11 +998,12 @@ def plot_feature_importance(feature_names, importances, title='Feature Importanc
     ax.set_title(title, fontsize=14, fontweight='bold')
     plt.tight_layout()
     plt.gca().invert_yaxis()
-    plt.show()
+    _finish_figure(_slugify(title))
     
     return importance_df
 
 
+@_cached_figure(columns=lambda args: ['risk_category', 'churned', 'churn_probability'])
 def plot_risk_segmentation(customer_scores):
     """
     Plot customer risk segmentation charts.
@@ -489,7 +1045,7 @@ def plot_risk_segmentation(customer_scores):
     axes[1].legend(loc='upper right')
     
     plt.tight_layout()
-    plt.show()
+    _finish_figure('risk_segmentation')
     
     high_risk_count = (customer_scores['risk_category'].isin(['High Risk', 'Critical Risk'])).sum()
     total_customers = len(customer_scores)
@@ -0,0 +1,36 @@
+"""
+Shared fixtures for the tests
+Small synthetic booking data shaped like the case study file
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT_DIR, 'src'), os.path.join(ROOT_DIR, 'benchmarks')]
+# Charts render off screen
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from data_loader import preprocess_data  # noqa: E402
+from synthetic import make_booking_data, write_booking_csv  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def bookings():
+    """Raw bookings, about three per customer."""
+    return make_booking_data(n_rows=6000, n_customers=2000, seed=7)
+
+
+@pytest.fixture(scope='session')
+def processed(bookings):
+    """Preprocessed bookings keyed by email_address."""
+    return preprocess_data(bookings, verbose=False)
+
+
+@pytest.fixture(scope='session')
+def booking_csv(tmp_path_factory):
+    """The bookings fixture's data written to a CSV file."""
+    return write_booking_csv(str(tmp_path_factory.mktemp('data') / 'bookings.csv'),
+                             n_rows=6000, n_customers=2000, seed=7)
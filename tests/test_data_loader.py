@@ -0,0 +1,97 @@
+"""
+Tests for data_loader: the fast loading and aggregation paths against the plain ones
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_loader
+from data_loader import (load_data, preprocess_data, aggregate_to_customer_level, aggregate_incremental,
+                         aggregate_out_of_core, encode_customer_keys, _grouped_mode)
+from profiling import current_rss_mb
+from scheduler import CoreBudget
+
+
+def _as_object(df):
+    """Categorical columns as object, to compare compact and plain dtypes by value."""
+    return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+@pytest.mark.parametrize('chunksize', [None, 700])
+def test_streaming_load_matches_eager(booking_csv, chunksize):
+    eager = preprocess_data(load_data(booking_csv), verbose=False)
+    streamed = preprocess_data(load_data(booking_csv, streaming=True, chunksize=chunksize), verbose=False)
+    pd.testing.assert_frame_equal(_as_object(streamed), eager, check_dtype=False)
+
+
+def test_streaming_chunks_match_single_read(booking_csv):
+    one_chunk = load_data(booking_csv, streaming=True)
+    pd.testing.assert_frame_equal(load_data(booking_csv, streaming=True, chunksize=500), one_chunk)
+
+
+@pytest.mark.skipif(current_rss_mb() is None, reason="RSS sampling needs /proc")
+def test_streaming_reports_ingest_growth(booking_csv, capsys):
+    load_data(booking_csv, streaming=True, memory_budget_mb=512)
+    assert 'peak RSS +' in capsys.readouterr().out
+
+
+def _naive_mode(values):
+    modes = values.mode()
+    return modes.iloc[0] if len(modes) > 0 else 'Unknown'
+
+
+@pytest.mark.parametrize('col, output', [('platform', 'primary_platform'),
+                                         ('marketing_channel', 'primary_channel')])
+def test_primary_value_matches_per_customer_mode(processed, col, output):
+    customer_df = aggregate_to_customer_level(processed)
+    expected = processed.groupby('email_address')[col].agg(_naive_mode)
+    pd.testing.assert_series_equal(customer_df.set_index('email_address')[output], expected,
+                                   check_names=False)
+
+
+def test_grouped_mode_breaks_ties_towards_the_smallest_value():
+    values = pd.Series(['b', 'a', 'c', 'c', None, None], dtype=object)
+    group_codes = np.array([0, 0, 1, 1, 2, 2])
+    assert list(_grouped_mode(group_codes, 3, values)) == ['a', 'c', 'Unknown']
+
+
+def test_incremental_matches_one_shot_aggregation(processed, tmp_path):
+    # Bookings arrive in date order, which decides each customer's first booking
+    ordered = processed.sort_values('bk_date', kind='stable', ignore_index=True)
+    cuts = ordered['bk_date'].quantile([0.5, 0.8]).to_numpy()
+    state_dir = str(tmp_path / 'state')
+    for cut in cuts:
+        aggregate_incremental(ordered[ordered['bk_date'] <= cut], state_dir=state_dir)
+    customer_df = aggregate_incremental(ordered, state_dir=state_dir)
+    
+    expected = aggregate_to_customer_level(ordered)
+    pd.testing.assert_frame_equal(customer_df, expected, check_dtype=False)
+
+
+def test_incremental_update_is_a_no_op_without_new_days(processed, tmp_path):
+    state_dir = str(tmp_path / 'state')
+    first = aggregate_incremental(processed, state_dir=state_dir)
+    pd.testing.assert_frame_equal(aggregate_incremental(processed, state_dir=state_dir), first)
+
+
+@pytest.mark.parametrize('keyed', [False, True], ids=['email_address', 'customer_key'])
+def test_partitioned_aggregation_matches_serial(processed, keyed, monkeypatch):
+    df = processed.copy()
+    if keyed:
+        encode_customer_keys(df)
+    # Enough cores for a partitioned run whatever the machine has
+    monkeypatch.setattr(data_loader, 'CORES', CoreBudget(3))
+    pd.testing.assert_frame_equal(aggregate_to_customer_level(df, n_jobs=3), aggregate_to_customer_level(df))
+
+
+@pytest.mark.parametrize('n_partitions', [1, 4])
+def test_out_of_core_aggregation_matches_in_memory(booking_csv, n_partitions, tmp_path, monkeypatch, capsys):
+    # Several chunks spill into each partition
+    monkeypatch.setattr(data_loader, '_rows_per_chunk', lambda filepath, memory_budget_mb: 1000)
+    customer_df = aggregate_out_of_core(booking_csv, scratch_dir=str(tmp_path), n_partitions=n_partitions)
+    assert '(1,000 rows/chunk)' in capsys.readouterr().out
+    expected = aggregate_to_customer_level(preprocess_data(load_data(booking_csv), verbose=False))
+    pd.testing.assert_frame_equal(_as_object(customer_df), expected, check_dtype=False)
+    # Spill partitions are removed with the scratch directory
+    assert not list(tmp_path.iterdir())
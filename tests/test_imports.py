@@ -0,0 +1,25 @@
+"""
+Tests for import cost: the budgets of benchmarks/bench_import_time.py
+Each module is imported in a fresh interpreter, best of a few runs
+"""
+
+import pytest
+
+from bench_import_time import BUDGETS, time_import
+
+REPEATS = 3
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    """Import time of numpy and pandas, which every module pays."""
+    return time_import('import numpy, pandas', REPEATS)[0]
+
+
+@pytest.mark.parametrize('module', list(BUDGETS))
+def test_import_within_budget(module, baseline):
+    allowance, allowed_heavy = BUDGETS[module]
+    elapsed, loaded = time_import(f'import {module}', REPEATS)
+    unexpected = [name for name in loaded if name not in allowed_heavy]
+    assert not unexpected, f"import {module} loads {', '.join(unexpected)}"
+    assert elapsed <= baseline + allowance, f"import {module}: {elapsed:.3f}s, budget {baseline + allowance:.3f}s"
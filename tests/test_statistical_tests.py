@@ -0,0 +1,108 @@
+"""
+Tests for statistical_tests: the vectorized engines against scipy
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from config import NUMERICAL_COLS
+from statistical_tests import (group_moments, ttest_from_moments, perform_ttest, contingency_tables,
+                               chi_square_from_tables, MomentAccumulator, ContingencyAccumulator)
+
+# Engagement columns plus derived ratios
+TTEST_COLS = NUMERICAL_COLS + ['pages_per_minute', 'property_page_ratio']
+
+# Two-level flags (2x2 tables, with Yates' correction) and many-level categories
+CHI_SQUARE_COLS = ['customer_type', 'loyalty_tier', 'platform', 'marketing_channel',
+                   'coupon_flag', 'pay_now_flag', 'cancel_flag']
+
+
+@pytest.fixture(scope='module')
+def with_missing(processed):
+    """Preprocessed bookings with missing values in different rows of two columns."""
+    df = processed.copy()
+    df.loc[df.index[::7], 'total_visit_minutes'] = np.nan
+    df.loc[df.index[3::11], 'pages_per_minute'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('equal_var', [True, False])
+def test_ttest_from_moments_matches_scipy(with_missing, equal_var):
+    labels, n, mean, m2 = group_moments(with_missing, TTEST_COLS)
+    churned, retained = labels.get_loc(1), labels.get_loc(0)
+    t_stats, p_values = ttest_from_moments(n[churned], mean[churned], m2[churned],
+                                           n[retained], mean[retained], m2[retained], equal_var=equal_var)
+    
+    is_churned = with_missing['churn_flag'] == 1
+    for col, t_stat, p_value in zip(TTEST_COLS, t_stats, p_values):
+        expected = stats.ttest_ind(with_missing.loc[is_churned, col], with_missing.loc[~is_churned, col],
+                                   equal_var=equal_var, nan_policy='omit')
+        assert t_stat == pytest.approx(expected.statistic, rel=1e-9)
+        assert p_value == pytest.approx(expected.pvalue, rel=1e-6, abs=1e-300)
+
+
+def test_perform_ttest_table(processed):
+    results = perform_ttest(processed, NUMERICAL_COLS)
+    assert list(results.columns) == ['Feature', 'T-Statistic', 'P-Value', 'Significant']
+    assert list(results['Feature']) == NUMERICAL_COLS
+    
+    is_churned = processed['churn_flag'] == 1
+    expected = stats.ttest_ind(processed.loc[is_churned, NUMERICAL_COLS],
+                               processed.loc[~is_churned, NUMERICAL_COLS])
+    np.testing.assert_allclose(results['T-Statistic'], np.round(expected.statistic, 3), atol=1e-3)
+    np.testing.assert_allclose(results['P-Value'].astype(float), expected.pvalue, rtol=1e-2)
+
+
+def test_contingency_tables_match_crosstab(processed):
+    tables = contingency_tables(processed, CHI_SQUARE_COLS)
+    for col in CHI_SQUARE_COLS:
+        pd.testing.assert_frame_equal(tables[col], pd.crosstab(processed[col], processed['churn_flag']),
+                                      check_dtype=False)
+
+
+def test_chi_square_from_tables_matches_scipy(processed):
+    tables = [pd.crosstab(processed[col], processed['churn_flag']) for col in CHI_SQUARE_COLS]
+    chi2_values, p_values, dofs, cramers_vs = chi_square_from_tables(tables)
+    
+    for table, chi2, p_value, dof, cramers_v in zip(tables, chi2_values, p_values, dofs, cramers_vs):
+        expected = stats.chi2_contingency(table)
+        assert chi2 == pytest.approx(expected.statistic, rel=1e-9)
+        assert p_value == pytest.approx(expected.pvalue, rel=1e-6, abs=1e-300)
+        assert dof == expected.dof
+        n, min_dim = table.to_numpy().sum(), min(table.shape) - 1
+        assert cramers_v == pytest.approx(np.sqrt(expected.statistic / (n * min_dim)), rel=1e-9)
+
+
+def _chunks(df):
+    """Uneven chunks of df, the first holding churned bookings only."""
+    churned_first = df.sort_values('churn_flag', ascending=False, kind='stable')
+    return [churned_first.iloc[start:stop] for start, stop in [(0, 50), (50, 1900), (1900, 4000), (4000, None)]]
+
+
+def _merged(accumulator_class, cols, chunks):
+    """Two accumulators fed alternate chunks (as in two worker processes), then merged."""
+    first, second = accumulator_class(cols), accumulator_class(cols)
+    for i, chunk in enumerate(chunks):
+        (first if i % 2 == 0 else second).update(chunk)
+    return first.merge(second)
+
+
+def test_moment_accumulator_merges_to_one_pass(with_missing):
+    one_pass = MomentAccumulator(TTEST_COLS).update(with_missing)
+    merged = _merged(MomentAccumulator, TTEST_COLS, _chunks(with_missing))
+    np.testing.assert_array_equal(merged.n, one_pass.n)
+    np.testing.assert_allclose(merged.mean, one_pass.mean, rtol=1e-12)
+    np.testing.assert_allclose(merged.m2, one_pass.m2, rtol=1e-9)
+    for equal_var in (True, False):
+        pd.testing.assert_frame_equal(merged.ttest_results(equal_var), one_pass.ttest_results(equal_var))
+    pd.testing.assert_frame_equal(merged.mean_comparison(), one_pass.mean_comparison())
+
+
+def test_contingency_accumulator_merges_to_one_pass(processed):
+    one_pass = ContingencyAccumulator(CHI_SQUARE_COLS).update(processed)
+    merged = _merged(ContingencyAccumulator, CHI_SQUARE_COLS, _chunks(processed))
+    for col in CHI_SQUARE_COLS:
+        pd.testing.assert_frame_equal(merged.tables[col], one_pass.tables[col], check_dtype=False)
+    pd.testing.assert_frame_equal(merged.chi_square_results(), one_pass.chi_square_results())
@@ -0,0 +1,46 @@
+"""
+Tests for visualizations: precomputed box plot statistics against matplotlib
+"""
+
+import numpy as np
+import pytest
+from matplotlib import cbook
+
+from config import NUMERICAL_COLS
+from visualizations import compute_box_stats
+
+BOX_KEYS = ['mean', 'med', 'q1', 'q3', 'iqr', 'whislo', 'whishi']
+
+
+@pytest.fixture(scope='module')
+def with_missing(processed):
+    """Preprocessed bookings with missing values in one column."""
+    df = processed.copy()
+    df.loc[df.index[::5], 'total_visit_minutes'] = np.nan
+    return df
+
+
+def _expected(df, col):
+    """matplotlib's statistics per churn group, missing values dropped."""
+    return [cbook.boxplot_stats(df.loc[df['churn_flag'] == group, col].dropna().to_numpy(), labels=[str(group)])[0]
+            for group in (0, 1)]
+
+
+def test_box_stats_match_matplotlib(with_missing):
+    box_stats = compute_box_stats(with_missing, NUMERICAL_COLS)
+    for col in NUMERICAL_COLS:
+        for stats, expected in zip(box_stats[col], _expected(with_missing, col)):
+            assert stats['label'] == expected['label']
+            for key in BOX_KEYS:
+                assert stats[key] == pytest.approx(expected[key], rel=1e-9), (col, key)
+
+
+def test_approximate_box_stats_within_a_bin(with_missing):
+    bins = 200
+    box_stats = compute_box_stats(with_missing, NUMERICAL_COLS, approximate=True, bins=bins)
+    for col in NUMERICAL_COLS:
+        width = (with_missing[col].max() - with_missing[col].min()) / bins
+        for stats, expected in zip(box_stats[col], _expected(with_missing, col)):
+            for key in ['med', 'q1', 'q3', 'whislo', 'whishi']:
+                assert abs(stats[key] - expected[key]) <= width, (col, key)
+            assert stats['mean'] == pytest.approx(expected['mean'], rel=1e-9)
@@ -0,0 +1,61 @@
+"""
+Hotels.com Customer Churn Analysis - Hyperparameter Tuning
+==========================================================
+
+Successive halving search over the Random Forest and Gradient Boosting
+hyperparameters (search spaces in src/config.py). The features come from
+the analysis pipeline's stage cache, so only the search itself runs when
+main.py has run before. Results are saved to results/tuning_<model>.json;
+run main.py with --tuned to train the models with the best parameters.
+
+Usage:
+    python tune.py [random_forest] [gradient_boosting] [--trees | --samples] [--no-cache]
+"""
+
+import os
+import sys
+import warnings
+warnings.filterwarnings('ignore')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from pipeline import build_analysis_pipeline
+from tuning import tune_model, TUNED_MODELS
+
+
+def run_tuning(model_names=TUNED_MODELS, resource=None, use_cache=True):
+    """
+    Tune each model on the training split of the analysis pipeline.
+    
+    Parameters:
+    -----------
+    model_names : list
+        Models to tune ('random_forest', 'gradient_boosting')
+    resource : str, optional
+        Budget grown between halving rounds, 'trees' or 'samples' (default:
+        trees for the Random Forest, samples for Gradient Boosting)
+    use_cache : bool
+        Reuse stage outputs stored by previous runs; False recomputes all
+    
+    Returns:
+    --------
+    dict
+        Model name -> tuning results
+    """
+    pipeline = build_analysis_pipeline(use_cache=use_cache)
+    features = pipeline['features']
+    print()
+    
+    results = {}
+    for model_name in model_names:
+        results[model_name] = tune_model(features['X_train'], features['y_train'], model_name,
+                                         resource=resource)
+        print()
+    return results
+
+
+if __name__ == "__main__":
+    names = [arg for arg in sys.argv[1:] if not arg.startswith('--')] or TUNED_MODELS
+    resource = 'trees' if '--trees' in sys.argv else 'samples' if '--samples' in sys.argv else None
+    results = run_tuning(names, resource=resource,
+                         use_cache='--no-cache' not in sys.argv)